@@ -23,18 +23,44 @@
 import os
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ntfc.compilercache import CompilerCache
+from ntfc.fingerprint import (
+    build_fingerprint,
+    load_fingerprint,
+    store_fingerprint,
+)
 from ntfc.logger import logger
 
 
+class _BuildCancelled(Exception):
+    """Build stopped because another build failed."""
+
+
 class NuttXBuilder:
-    """NuttX configuration builder (CMake only)."""
+    """NuttX configuration builder (CMake only).
+
+    Independent core images are built concurrently. The global job budget
+    (``build_jobs`` in ``config`` section, CPU count by default) is split
+    between concurrent builds, output of each build is stored in
+    ``build.log`` in its build directory. Builds can use compiler cache
+    shared by all build directories.
+    """
 
     IMAGE_BIN_STR = "$IMAGE_BIN"
     IMAGE_HEX_STR = "$IMAGE_HEX"
 
+    BUILD_LOG = "build.log"
+    FLASH_LOG = "flash.log"
+
+    # flash options, can be set for core or in global configuration
+    FLASH_DEFAULTS = {"flash_timeout": 300, "flash_retries": 2}
+
     def __init__(self, config: Dict[str, Any], rebuild: bool = True):
         """Initialize NuttX builder."""
         if not isinstance(config, dict):
@@ -43,11 +69,97 @@ class NuttXBuilder:
         self._cfg_values = config
         self._rebuild = rebuild
 
+        # jobs for every build tool invocation
+        self._parallel = 1
+        # running build processes, terminated when any build fails, and
+        # logs already written, both guarded by lock
+        self._procs: Set["subprocess.Popen[bytes]"] = set()
+        self._procs_lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._logs: Set[str] = set()
+
+        # compiler cache shared by all builds
+        self._ccache = CompilerCache.from_config(config.get("config", {}))
+        # build directory -> build statistics
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        # product/core -> flash statistics
+        self._flash_stats: Dict[str, Dict[str, Any]] = {}
+        self._flash_failed = threading.Event()
+
     def _run_command(
-        self, cmd: List[str], env: Any
-    ) -> None:  # pragma: no cover
-        """Run command."""
-        subprocess.run(cmd, check=True, env=env)
+        self,
+        cmd: List[str],
+        env: Any,
+        log: Optional[str] = None,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> None:
+        """Run command.
+
+        :param cmd: command to run
+        :param env: command environment
+        :param log: path to log file for command output, if not set output
+         is printed to console
+        :param timeout: command timeout in seconds
+        :param cancel: event that stops the command when set, commands
+         without cancel scope (i.e. flashing) are not stopped
+        """
+        if log is None:  # pragma: no cover
+            subprocess.run(cmd, check=True, env=env, timeout=timeout)
+            return
+
+        # the first command of a build truncates the old log
+        with self._procs_lock:
+            mode = "ab" if log in self._logs else "wb"
+            self._logs.add(log)
+
+        with open(log, mode) as f:
+            f.write(f"$ {' '.join(cmd)}\n".encode())
+            f.flush()
+
+            with self._procs_lock:
+                if cancel and cancel.is_set():
+                    raise _BuildCancelled()
+                proc = subprocess.Popen(
+                    cmd, env=env, stdout=f, stderr=subprocess.STDOUT
+                )
+                self._procs.add(proc)
+
+            try:
+                ret = proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+                raise
+            finally:
+                with self._procs_lock:
+                    self._procs.discard(proc)
+
+        if cancel and cancel.is_set():
+            raise _BuildCancelled()
+        if ret != 0:
+            raise subprocess.CalledProcessError(ret, cmd)
+
+    def _cancel_builds(self) -> None:
+        """Stop all running builds."""
+        with self._procs_lock:
+            self._cancel.set()
+            for proc in self._procs:
+                proc.terminate()
+
+    def cancel(self) -> None:
+        """Stop running builds, builds not started yet are not run."""
+        self._cancel_builds()
+
+    def _log_tail(self, log: str, lines: int = 20) -> str:
+        """Get the last lines of build log."""
+        try:
+            with open(log, "rb") as f:
+                data = f.read()
+        except OSError:
+            return ""
+        tail = data.decode("utf-8", "replace").splitlines()[-lines:]
+        return "\n".join(tail)
 
     def _make_dir(self, path: Path) -> None:
         """Create dir."""
@@ -60,6 +172,7 @@ class NuttXBuilder:
         generator: str = "Ninja",
         defines: Optional[Dict[str, str]] = None,
         env: Optional[Dict[str, str]] = None,
+        log: Optional[str] = None,
     ) -> None:
         """Run CMake configure step."""
         build_path = Path(build)
@@ -81,12 +194,15 @@ class NuttXBuilder:
         # merge environment variables
         run_env = os.environ.copy()
         if env:
-            run_env.update(env)  # pragma: no cover
+            run_env.update(env)
 
-        self._run_command(cmd, env=run_env)
+        self._run_command(cmd, env=run_env, log=log, cancel=self._cancel)
 
     def _run_build(
-        self, build: str, env: Optional[Dict[str, str]] = None
+        self,
+        build: str,
+        env: Optional[Dict[str, str]] = None,
+        log: Optional[str] = None,
     ) -> None:
         """Run the CMake build step."""
         build_path = Path(build)
@@ -95,26 +211,34 @@ class NuttXBuilder:
             "cmake",
             "--build",
             str(build_path),
+            "--parallel",
+            str(self._parallel),
         ]
 
         run_env = os.environ.copy()
         if env:
-            run_env.update(env)  # pragma: no cover
+            run_env.update(env)
 
-        self._run_command(cmd, env=run_env)
+        self._run_command(cmd, env=run_env, log=log, cancel=self._cancel)
+
+    def _build_dir(
+        self, core: str, cores: Dict[str, Any], product: str
+    ) -> str:
+        """Get build directory name for core."""
+        return str(
+            product
+            + "-"
+            + self._cfg_values[product]["name"]
+            + "-"
+            + cores[core]["name"]
+        )
 
     def _build_core(
         self, core: str, cores: Dict[str, Any], product: str
     ) -> None:
         """Build single core image."""
         if "defconfig" in cores[core]:
-            build_dir = (
-                product
-                + "-"
-                + self._cfg_values[product]["name"]
-                + "-"
-                + cores[core]["name"]
-            )
+            build_dir = self._build_dir(core, cores, product)
 
             cfg_build_dir = self._cfg_values["config"].get("build_dir", None)
             if not cfg_build_dir:  # pragma: no cover
@@ -132,7 +256,6 @@ class NuttXBuilder:
                 f"build image " f"conf: {build_cfg}, out: {build_path}"
             )
 
-            nuttx_dir = os.path.join(cfg_cwd, "nuttx")
             nuttx_elf_path = os.path.join(build_path, "nuttx")
             nuttx_conf_path = os.path.join(build_path, ".config")
 
@@ -149,35 +272,128 @@ class NuttXBuilder:
             for d in custom_defines:
                 defines[d[0]] = d[1]  # pragma: no cover
 
+            if self._ccache:
+                defines.update(self._ccache.defines())
+
             if not already_build or self._rebuild:
-                # configure build
+                self._build_image(
+                    cfg_cwd, build_path, build_cfg, defines, already_build
+                )
+
+            # add elf and conf path
+            cores[core]["elf_path"] = nuttx_elf_path
+            cores[core]["conf_path"] = nuttx_conf_path
+
+    def _build_image(
+        self,
+        cwd: str,
+        build_path: str,
+        defconfig: str,
+        defines: Dict[str, str],
+        built: bool,
+    ) -> None:
+        """Configure and build image if build inputs changed.
+
+        :param cwd: directory with NuttX and apps repositories
+        :param build_path: path to build directory
+        :param defconfig: board defconfig
+        :param defines: defines passed to CMake
+        :param built: image from the previous build is available
+        """
+        fingerprint = build_fingerprint(cwd, build_path, defconfig, defines)
+        stored = load_fingerprint(build_path)
+
+        if built and fingerprint["build"] and stored == fingerprint:
+            logger.info(f"build {build_path} up to date")
+            return
+
+        log = os.path.join(build_path, self.BUILD_LOG)
+        start = time.monotonic()
+        env = self._ccache.env(build_path) if self._ccache else None
+
+        try:
+            # configure build, if configuration didn't change build system
+            # regenerates itself when needed
+            configured = os.path.isfile(
+                os.path.join(build_path, "CMakeCache.txt")
+            )
+            if (
+                configured
+                and fingerprint["configure"]
+                and stored.get("configure") == fingerprint["configure"]
+            ):
+                logger.info(f"build {build_path} configuration up to date")
+            else:
                 self._run_cmake(
-                    source=nuttx_dir,
+                    source=os.path.join(cwd, "nuttx"),
                     build=build_path,
                     generator="Ninja",
                     defines=defines,
+                    env=env,
+                    log=log,
+                )
+                # toolchain is known only for configured build
+                fingerprint = build_fingerprint(
+                    cwd, build_path, defconfig, defines
+                )
+                store_fingerprint(
+                    build_path, {"configure": fingerprint["configure"]}
                 )
 
-                # build
-                self._run_build(build_path)
+            # build
+            self._run_build(build_path, env=env, log=log)
+            store_fingerprint(build_path, fingerprint)
+        finally:
+            stats: Dict[str, Any] = {}
+            if self._ccache and env is not None:
+                stats = self._ccache.finish(build_path, env)
+
+        duration = time.monotonic() - start
+        stats["time"] = round(duration, 3)
+        self._stats[build_path] = stats
+        summary = f"build {build_path} done in {duration:.1f}s"
+        if self._ccache:
+            summary += (
+                f", {self._ccache.tool} hits: {stats['hits']}, "
+                f"misses: {stats['misses']}"
+            )
+        logger.info(summary)
 
-            # add elf and conf path
-            cores[core]["elf_path"] = nuttx_elf_path
-            cores[core]["conf_path"] = nuttx_conf_path
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get statistics of builds executed by this builder."""
+        return self._stats
+
+    @property
+    def flash_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get statistics of flashed images."""
+        return self._flash_stats
+
+    def _flash_log(self, core: Dict[str, Any]) -> Optional[str]:
+        """Get flash log path stored next to core image."""
+        elf_path = core.get("elf_path")
+        if not elf_path:
+            return None
+        return os.path.join(os.path.dirname(elf_path), self.FLASH_LOG)
 
     def _reboot_core(
-        self, core: str, cores: Dict[str, Any]
-    ) -> None:  # pragma: no cover
+        self, core: str, cores: Dict[str, Any], timeout: Optional[float] = None
+    ) -> None:
         """Reboot single core."""
         reboot_cmd = cores[core].get("reboot", None)
         if reboot_cmd:
             cmd = reboot_cmd.split()
             logger.info(f"reboot core cmd: {cmd}")
-            self._run_command(cmd, env=None)
+            self._run_command(
+                cmd,
+                env=None,
+                log=self._flash_log(cores[core]),
+                timeout=timeout,
+            )
 
     def _flash_core(
-        self, core: str, cores: Dict[str, Any]
-    ) -> None:  # pragma: no cover
+        self, core: str, cores: Dict[str, Any], timeout: Optional[float] = None
+    ) -> None:
         """Flash single core image."""
         flash_cmd = cores[core].get("flash", None)
         if flash_cmd:
@@ -191,7 +407,12 @@ class NuttXBuilder:
             cmd = flash_cmd.split()
 
             logger.info(f"flash image cmd: {cmd}")
-            self._run_command(cmd, env=None)
+            self._run_command(
+                cmd,
+                env=None,
+                log=self._flash_log(cores[core]),
+                timeout=timeout,
+            )
 
     def need_build(self) -> bool:
         """Check if we need build something."""
@@ -203,24 +424,173 @@ class NuttXBuilder:
                         return True
         return False
 
+    def _jobs_budget(self) -> int:
+        """Get number of jobs that can run at the same time."""
+        jobs = self._cfg_values.get("config", {}).get("build_jobs")
+        return max(1, int(jobs or os.cpu_count() or 1))
+
+    def _build_job(
+        self, core: str, cores: Dict[str, Any], product: str
+    ) -> None:
+        """Build single core image, stop other builds on failure."""
+        if self._cancel.is_set():
+            raise _BuildCancelled()
+
+        try:
+            self._build_core(core, cores, product)
+        except _BuildCancelled:
+            raise
+        except BaseException as e:
+            if not self._cancel.is_set():
+                self._cancel_builds()
+                log = os.path.join(
+                    self._cfg_values["config"].get("build_dir", ""),
+                    self._build_dir(core, cores, product),
+                    self.BUILD_LOG,
+                )
+                logger.error(
+                    f"build {product}/{core} failed: {e}\n"
+                    f"{self._log_tail(log)}"
+                )
+            raise
+
     def build_all(self) -> None:
-        """Build all defconfigs from configuration file."""
+        """Build all defconfigs from configuration file.
+
+        Builds run concurrently, the first failed build stops all others
+        and its error is raised.
+        """
+        jobs: List[Tuple[str, Dict[str, Any], str]] = []
         for product in self._cfg_values:
             if "product" in product:
                 cores = self._cfg_values[product]["cores"]
                 for core in cores:
-                    self._build_core(core, cores, product)
+                    if "defconfig" in cores[core]:
+                        jobs.append((core, cores, product))
+
+        if not jobs:
+            return
+
+        budget = self._jobs_budget()
+        workers = min(len(jobs), budget)
+        self._parallel = max(1, budget // workers)
+        self._cancel.clear()
+        logger.info(
+            f"build {len(jobs)} images, {workers} at a time "
+            f"with {self._parallel} jobs each"
+        )
+
+        error: Optional[BaseException] = None
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="ntfc-build"
+        ) as executor:
+            futures = [executor.submit(self._build_job, *job) for job in jobs]
+            for future in as_completed(futures):
+                e = future.exception()
+                if e and not isinstance(e, _BuildCancelled) and not error:
+                    error = e
+
+        if error:
+            raise error
+
+    def _flash_option(self, core: Dict[str, Any], name: str) -> float:
+        """Get flash option from core or global configuration."""
+        value = core.get(name, self._cfg_values.get("config", {}).get(name))
+        return float(self.FLASH_DEFAULTS[name] if value is None else value)
+
+    def _flash_one(
+        self, product: str, core: str, cores: Dict[str, Any]
+    ) -> None:
+        """Flash and reboot single core, retry on failure."""
+        name = f"{product}/{core}"
+        timeout = self._flash_option(cores[core], "flash_timeout")
+        retries = int(self._flash_option(cores[core], "flash_retries"))
+        start = time.monotonic()
+
+        for attempt in range(1, retries + 2):
+            try:
+                self._flash_core(core, cores, timeout)
+                # reboot after flash
+                self._reboot_core(core, cores, timeout)
+                break
+            except (
+                subprocess.CalledProcessError,
+                subprocess.TimeoutExpired,
+            ) as e:
+                if attempt > retries:
+                    logger.error(f"flash {name} failed: {e}")
+                    raise
+                logger.warning(
+                    f"flash {name} failed: {e}, retry {attempt}/{retries}"
+                )
+
+        duration = time.monotonic() - start
+        self._flash_stats[name] = {
+            "time": round(duration, 3),
+            "attempts": attempt,
+        }
+        logger.info(f"flash {name} done in {duration:.1f}s")
+
+    def _flash_probe(
+        self, jobs: List[Tuple[str, str, Dict[str, Any]]]
+    ) -> None:
+        """Flash cores connected to one probe, one by one."""
+        for product, core, cores in jobs:
+            if self._flash_failed.is_set():
+                # other probe failed, don't start new jobs
+                return
+
+            try:
+                self._flash_one(product, core, cores)
+            except BaseException:
+                self._flash_failed.set()
+                raise
 
     def flash_all(self) -> None:
-        """Flash all available images."""
+        """Flash all available images.
+
+        Images are flashed concurrently. Cores connected to the same debug
+        probe (``probe`` core option, cores of one product by default)
+        are flashed one by one in configuration order. The first failed
+        flash stops starting new jobs and its error is raised.
+        """
+        probes: Dict[str, List[Tuple[str, str, Dict[str, Any]]]] = {}
         for product in self._cfg_values:
             if "product" in product:
                 cores = self._cfg_values[product]["cores"]
                 for core in cores:
-                    # flash core image
-                    self._flash_core(core, cores)
-                    # reboot after flash
-                    self._reboot_core(core, cores)
+                    cfg = cores[core]
+                    if not cfg.get("flash") and not cfg.get("reboot"):
+                        continue
+                    probe = str(cfg.get("probe") or product)
+                    probes.setdefault(probe, []).append((product, core, cores))
+
+        if not probes:
+            return
+
+        self._flash_failed.clear()
+        start = time.monotonic()
+
+        error: Optional[BaseException] = None
+        with ThreadPoolExecutor(
+            max_workers=len(probes), thread_name_prefix="ntfc-flash"
+        ) as executor:
+            futures = [
+                executor.submit(self._flash_probe, jobs)
+                for jobs in probes.values()
+            ]
+            for future in as_completed(futures):
+                e = future.exception()
+                if e and not error:
+                    error = e
+
+        if error:
+            raise error
+
+        logger.info(
+            f"flashed {len(self._flash_stats)} images with {len(probes)} "
+            f"probes in {time.monotonic() - start:.1f}s"
+        )
 
     def new_conf(self) -> Dict[str, Any]:
         """Get modified YAML config."""
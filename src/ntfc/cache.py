@@ -0,0 +1,134 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Local on-disk cache shared by NTFC sessions."""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Optional
+
+from ntfc.logger import logger
+
+# environment variable with cache directory, empty value disables cache
+CACHE_DIR_ENV = "NTFC_CACHE_DIR"
+
+###############################################################################
+# Function: cache_dir
+###############################################################################
+
+
+def cache_dir() -> Optional[str]:
+    """Get cache directory.
+
+    :return: path to cache directory or None if cache is disabled
+    """
+    path = os.environ.get(CACHE_DIR_ENV)
+    if path is not None:
+        return path or None
+
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "ntfc")
+
+
+###############################################################################
+# Function: cache_key
+###############################################################################
+
+
+def cache_key(*parts: Any) -> str:
+    """Get cache key for JSON serializable parts.
+
+    :param parts: values that identify cached data
+
+    :return: cache key
+    """
+    data = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+###############################################################################
+# Function: cache_load
+###############################################################################
+
+
+def cache_load(kind: str, key: str) -> Optional[Any]:
+    """Load data from cache.
+
+    :param kind: cached data kind, each kind has its own directory
+    :param key: cache key
+
+    :return: cached data or None if not found
+    """
+    path = cache_dir()
+    if not path:
+        return None
+
+    path = os.path.join(path, kind, key + ".json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.debug(f"ignore broken cache file {path}: {e}")
+        return None
+
+
+###############################################################################
+# Function: cache_store
+###############################################################################
+
+
+def cache_store(kind: str, key: str, data: Any) -> None:
+    """Store data in cache.
+
+    Cache is written atomically, so concurrent sessions never read
+    partially written data. Errors are ignored, cache is optional.
+
+    :param kind: cached data kind, each kind has its own directory
+    :param key: cache key
+    :param data: JSON serializable data
+    """
+    path = cache_dir()
+    if not path:
+        return
+
+    path = os.path.join(path, kind)
+    try:
+        os.makedirs(path, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path, suffix=".tmp")
+    except OSError as e:  # pragma: no cover
+        logger.debug(f"failed to store cache in {path}: {e}")
+        return
+
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, os.path.join(path, key + ".json"))
+    except OSError as e:  # pragma: no cover
+        logger.debug(f"failed to store cache in {path}: {e}")
+    finally:
+        # nothing left after replace, partial file removed on any error
+        if os.path.exists(tmp):
+            os.unlink(tmp)
@@ -58,7 +58,7 @@ _testenv_options = (
     click.option(
         "--rebuild",
         is_flag=True,
-        help="Always rebuild configuration. Default: True",
+        help="Rebuild configuration if build inputs changed. Default: True",
     ),
 )
 
@@ -49,6 +49,10 @@ class DEnvironmentData:
     exitonfail: bool = False
     flash: bool = False
     nologs: bool = False
+    workers: int = 1
+    order: str = "collect"
+    changed_since: Optional[str] = None
+    pipeline: bool = False
     collect: Optional[str] = None
     result: Optional[Any] = None
 
@@ -21,6 +21,7 @@
 """Module containing the CLI logic for NTFC."""
 
 import json
+import os
 import pprint
 import sys
 from typing import Any, Dict, List, Tuple
@@ -31,6 +32,7 @@ import yaml  # type: ignore
 from ntfc.builder import NuttXBuilder
 from ntfc.cli.environment import Environment, pass_environment
 from ntfc.logger import logger
+from ntfc.pipeline import ProductPipeline
 from ntfc.plugins_loader import commands_list
 from ntfc.pytest.mypytest import MyPytest
 
@@ -86,6 +88,16 @@ def collect_print_modules(modules: List[str]) -> None:
         print(m)
 
 
+def collect_print_stats(stats: Dict[str, Tuple[int, int]]) -> None:
+    """Print test filter cache statistics."""
+    tmp = []
+    for name, (hits, lookups) in stats.items():
+        rate = 100.0 * hits / lookups if lookups else 0.0
+        tmp.append(f"{name}: {hits}/{lookups} ({rate:.1f}%)")
+    if tmp:
+        print("  filter cache hits: " + "  ".join(tmp))
+
+
 def collect_run(pt: MyPytest, ctx: Environment) -> None:
     """Collect tests."""
     assert ctx.testpath is not None
@@ -97,6 +109,7 @@ def collect_run(pt: MyPytest, ctx: Environment) -> None:
         f"  filtered: {len(col.items)}"
         f"  skipped: {len(col.skipped)}"
     )
+    collect_print_stats(col.stats)
 
     if ctx.collect == "silent":
         return
@@ -120,7 +133,73 @@ def test_run(pt: MyPytest, ctx: Environment) -> Any:
     """Run tests."""
     assert ctx.testpath is not None
     assert ctx.result is not None
-    return pt.runner(ctx.testpath, ctx.result, ctx.nologs)
+    return pt.runner(
+        ctx.testpath,
+        ctx.result,
+        ctx.nologs,
+        ctx.workers,
+        ctx.order,
+        ctx.changed_since,
+    )
+
+
+def build_run(
+    conf: Dict[str, Any], ctx: Environment
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Build and flash images.
+
+    :return: updated configuration and build statistics
+    """
+    builder = NuttXBuilder(conf, ctx.rebuild)
+    if not builder.need_build():
+        return conf, {}
+
+    builder.build_all()
+    if ctx.flash:
+        builder.flash_all()
+
+    # update config
+    stats = {"build": builder.stats, "flash": builder.flash_stats}
+    return builder.new_conf(), stats
+
+
+def pipeline_args(ctx: Environment) -> Tuple[List[str], List[str]]:
+    """Get options passed to product test sessions in pipeline mode."""
+    assert ctx.testpath is not None
+    assert ctx.result is not None
+
+    main_args = ["--debug"] if ctx.debug else []
+    if ctx.verbose:
+        main_args.append("--verbose")
+
+    args = [
+        f"--testpath={os.path.abspath(ctx.testpath)}",
+        f"--workers={ctx.workers}",
+        f"--order={ctx.order}",
+    ]
+    if ctx.jsonconf:  # pragma: no cover
+        args.append(f"--jsonconf={os.path.abspath(ctx.jsonconf)}")
+    if ctx.nologs:
+        args.append("--nologs")
+    if ctx.exitonfail:
+        args.append("--exitonfail")
+    if ctx.changed_since:  # pragma: no cover
+        args.append(f"--changed-since={os.path.abspath(ctx.changed_since)}")
+    for report in ("html", "json"):
+        if ctx.result.get(report):  # pragma: no cover
+            args.append(f"--{report}")
+
+    return main_args, args
+
+
+def pipeline_run(conf: Dict[str, Any], ctx: Environment) -> int:
+    """Run build, flash and tests for every product on its own."""
+    assert ctx.result is not None
+    pipeline = ProductPipeline(
+        conf, ctx.result["resdir"], ctx.rebuild, ctx.flash
+    )
+    main_args, args = pipeline_args(ctx)
+    return pipeline.run(args, main_args)
 
 
 def print_yaml_config(config: Dict[str, Any]) -> None:
@@ -159,20 +238,18 @@ def cli_on_close(ctx: Environment) -> bool:
     print_yaml_config(conf)
     print_json_config(conf_json)
 
-    builder = NuttXBuilder(conf, ctx.rebuild)
-    if builder.need_build():
-        builder.build_all()
-        if ctx.flash:
-            builder.flash_all()
+    if ctx.runtest and ctx.pipeline:
+        if pipeline_run(conf, ctx) != 0:
+            exit(1)
+        return True
 
-        # update config
-        conf = builder.new_conf()
+    conf, build_stats = build_run(conf, ctx)
 
     # exit now when build only mode
     if ctx.runbuild:
         return True
 
-    pt = MyPytest(conf, ctx.exitonfail, ctx.verbose, conf_json)
+    pt = MyPytest(conf, ctx.exitonfail, ctx.verbose, conf_json, build_stats)
 
     if ctx.runcollect:
         collect_run(pt, ctx)
@@ -21,12 +21,13 @@
 """Module containing NTFC test command."""
 
 import importlib.util
-from typing import Any
+from typing import Any, Optional
 
 import click
 
 from ntfc.cli.clitypes import cli_testenv_options
 from ntfc.cli.environment import Environment, pass_environment
+from ntfc.pytest.history import ORDER_POLICIES
 
 HAS_PYTEST_HTML = importlib.util.find_spec("pytest_html") is not None
 HAS_PYTEST_JSON = importlib.util.find_spec("pytest_json") is not None
@@ -66,6 +67,43 @@ HAS_PYTEST_JSON = importlib.util.find_spec("pytest_json") is not None
     is_flag=True,
     help="Store the XML report.",
 )
+@click.option(
+    "--xmlpath",
+    type=click.Path(resolve_path=False),
+    default=None,
+    help="Store the XML report in this file instead of the results "
+    "directory, implies --xml. Default: None",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of sim/QEMU instances that run tests in parallel. "
+    "Default: 1",
+)
+@click.option(
+    "--order",
+    type=click.Choice(ORDER_POLICIES),
+    default="collect",
+    help="Test order: collection order, the longest tests first or "
+    "recently failed tests first. Uses history from previous runs "
+    "stored in results directory. Default: collect",
+)
+@click.option(
+    "--changed-since",
+    type=click.Path(resolve_path=False),
+    default=None,
+    help="Results directory of the previous run. Tests that passed and "
+    "are not affected by ELF symbols and Kconfig changes since that run "
+    "are deselected.",
+)
+@click.option(
+    "--pipeline",
+    is_flag=True,
+    default=False,
+    help="Build, flash and test every product on its own, so products "
+    "are tested while others are still built. Default: False",
+)
 @click.option(
     "--resdir",
     type=click.Path(resolve_path=False),
@@ -81,6 +119,10 @@ def cmd_test(
     jsonconf: str,
     nologs: bool,
     exitonfail: bool,
+    workers: int,
+    order: str,
+    changed_since: Optional[str],
+    pipeline: bool,
     **kwargs: Any,
 ) -> bool:
     """Run tests."""
@@ -92,12 +134,17 @@ def cmd_test(
     ctx.jsonconf = jsonconf
     ctx.nologs = nologs
     ctx.exitonfail = exitonfail
+    ctx.workers = workers
+    ctx.order = order
+    ctx.changed_since = changed_since
+    ctx.pipeline = pipeline
 
     ctx.result = {}
     ctx.result["resdir"] = kwargs.get("resdir")
     ctx.result["html"] = kwargs.get("html")
     ctx.result["json"] = kwargs.get("json")
     ctx.result["xml"] = kwargs.get("xml")
+    ctx.result["xmlpath"] = kwargs.get("xmlpath")
 
     return True
 
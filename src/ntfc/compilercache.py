@@ -0,0 +1,220 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Compiler cache (ccache or sccache) used by NuttX builder."""
+
+import json
+import os
+import socket
+import subprocess
+from typing import Any, Dict, Optional
+
+from ntfc.cache import cache_dir
+from ntfc.logger import logger
+
+# supported compiler cache tools
+CACHE_TOOLS = ("ccache", "sccache")
+
+###############################################################################
+# Function: ccache_stats
+###############################################################################
+
+
+def ccache_stats(path: str) -> Dict[str, int]:
+    """Get hits and misses from ccache stats log.
+
+    Stats log has a ``# <source file>`` line for every compilation
+    followed by statistics ids updated by this compilation.
+
+    :param path: path to stats log
+
+    :return: dictionary with ``hits`` and ``misses``
+    """
+    hits = misses = 0
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if line in ("direct_cache_hit", "preprocessed_cache_hit"):
+                    hits += 1
+                elif line == "cache_miss":
+                    misses += 1
+    except OSError:
+        pass
+    return {"hits": hits, "misses": misses}
+
+
+###############################################################################
+# Function: sccache_stats
+###############################################################################
+
+
+def sccache_stats(data: str) -> Dict[str, int]:
+    """Get hits and misses from sccache JSON statistics.
+
+    :param data: output of ``sccache --show-stats --stats-format=json``
+
+    :return: dictionary with ``hits`` and ``misses``
+    """
+    try:
+        stats = json.loads(data).get("stats", {})
+    except ValueError:
+        return {"hits": 0, "misses": 0}
+
+    def count(name: str) -> int:
+        return sum(stats.get(name, {}).get("counts", {}).values())
+
+    return {"hits": count("cache_hits"), "misses": count("cache_misses")}
+
+
+###############################################################################
+# Class: CompilerCache
+###############################################################################
+
+
+class CompilerCache:
+    """Compiler cache launcher shared by all builds.
+
+    Configured in ``config`` section of YAML configuration with
+    ``compiler_cache`` (tool name) and optional ``compiler_cache_dir``.
+    Builds in different build directories share one cache directory.
+    """
+
+    def __init__(
+        self, tool: str, directory: Optional[str], basedir: str
+    ) -> None:
+        """Initialize compiler cache.
+
+        :param tool: cache tool, ccache or sccache
+        :param directory: cache directory, tool default if None
+        :param basedir: directory with sources, paths below are hashed
+         as relative, so builds in other build directories share results
+        """
+        if tool not in CACHE_TOOLS:
+            raise ValueError(f"unsupported compiler cache {tool}")
+
+        self._tool = tool
+        self._dir = directory
+        self._basedir = os.path.abspath(basedir)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["CompilerCache"]:
+        """Create compiler cache from global configuration.
+
+        :param config: ``config`` section of YAML configuration
+
+        :return: CompilerCache instance or None if not enabled
+        """
+        tool = config.get("compiler_cache")
+        if not tool:
+            return None
+
+        directory = config.get("compiler_cache_dir")
+        if directory:
+            directory = os.path.abspath(os.path.expanduser(directory))
+        else:
+            base = cache_dir()
+            directory = os.path.join(base, tool) if base else None
+
+        return cls(tool, directory, config.get("cwd", "."))
+
+    @property
+    def tool(self) -> str:
+        """Get cache tool name."""
+        return self._tool
+
+    @property
+    def directory(self) -> Optional[str]:
+        """Get cache directory."""
+        return self._dir
+
+    def defines(self) -> Dict[str, str]:
+        """Get CMake defines that enable compiler launcher."""
+        return {
+            "CMAKE_C_COMPILER_LAUNCHER": self._tool,
+            "CMAKE_CXX_COMPILER_LAUNCHER": self._tool,
+        }
+
+    def _free_port(self) -> int:
+        """Get free TCP port for sccache server."""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("127.0.0.1", 0))
+            return int(s.getsockname()[1])
+
+    def env(self, build_path: str) -> Dict[str, str]:
+        """Get environment for single build.
+
+        :param build_path: path to build directory
+
+        :return: environment variables passed to build commands
+        """
+        env: Dict[str, str] = {}
+        if self._tool == "ccache":
+            if self._dir:
+                env["CCACHE_DIR"] = self._dir
+            env["CCACHE_BASEDIR"] = self._basedir
+            # debug info refers to build directory, don't hash it
+            env["CCACHE_NOHASHDIR"] = "1"
+
+            # stats of this build only
+            stats = os.path.join(build_path, "ccache-stats.log")
+            os.makedirs(build_path, exist_ok=True)
+            open(stats, "w", encoding="utf-8").close()
+            env["CCACHE_STATSLOG"] = stats
+        else:
+            if self._dir:
+                env["SCCACHE_DIR"] = self._dir
+            # server per build, so server statistics are for this build
+            env["SCCACHE_SERVER_PORT"] = str(self._free_port())
+
+        return env
+
+    def finish(self, build_path: str, env: Dict[str, str]) -> Dict[str, int]:
+        """Get statistics of finished build.
+
+        :param build_path: path to build directory
+        :param env: environment returned by env()
+
+        :return: dictionary with ``hits`` and ``misses``
+        """
+        if self._tool == "ccache":
+            return ccache_stats(env["CCACHE_STATSLOG"])
+
+        run_env = os.environ.copy()
+        run_env.update(env)
+        stats = {"hits": 0, "misses": 0}
+        try:
+            out = subprocess.run(
+                [self._tool, "--show-stats", "--stats-format=json"],
+                env=run_env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            ).stdout
+            stats = sccache_stats(out)
+            subprocess.run(
+                [self._tool, "--stop-server"],
+                env=run_env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            logger.warning(f"no {self._tool} stats for {build_path}: {e}")
+        return stats
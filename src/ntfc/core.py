@@ -33,7 +33,10 @@ from typing import (
 
 from ntfc.coreconfig import CoreConfig
 from ntfc.device.common import CmdReturn, CmdStatus
+from ntfc.device.matcher import StreamMatcher
+from ntfc.health import CoreHealth
 from ntfc.logger import logger
+from ntfc.metrics import metrics
 
 if TYPE_CHECKING:
     from ntfc.device.common import DeviceCommon
@@ -46,6 +49,9 @@ if TYPE_CHECKING:
 class ProductCore:
     """This class implements product core under test."""
 
+    # name under which reboot is recorded in command metrics
+    REBOOT_METRIC = "[reboot]"
+
     def __init__(self, device: "DeviceCommon", conf: "CoreConfig") -> None:
         """Initialize product core under test.
 
@@ -93,45 +99,40 @@ class ProductCore:
             cmd = f"{cmd} {' '.join(args)}"
         return cmd
 
-    def _prepare_pattern(
+    def _prepare_matcher(
         self,
         cmd: str,
         expects: Optional[Union[str, List[str]]],
         flag: str,
         match_all: bool,
         regexp: bool,
-    ) -> str:
-        """Build a single regex pattern string."""
+    ) -> StreamMatcher:
+        """Build stream matcher that tracks every expectation separately."""
+        alternatives: List[List[str]]
         if expects:
             expects_list = (
                 expects if isinstance(expects, (list, tuple)) else [expects]
             )
-            pattern = self._build_expect_pattern(
-                expects_list, match_all, regexp
+            items = (
+                list(expects_list)
+                if regexp
+                else [re.escape(e) for e in expects_list]
             )
+            # AND semantics: all expectations in one alternative,
+            # OR semantics: one alternative for each expectation
+            alternatives = [items] if match_all else [[i] for i in items]
         else:
-            pattern = self._default_prompt_pattern(cmd, flag)
+            alternatives = [[self._default_prompt_pattern(cmd, flag)]]
 
         # Add 'command not found' alternative
-        notfound_pattern = re.escape(
-            f"{cmd.split(' ')[0]}: {self._device.no_cmd}"
+        alternatives.append(
+            [re.escape(f"{cmd.split(' ')[0]}: {self._device.no_cmd}")]
         )
-        # Wrap everything and make sure dot matches newlines
-        full_pattern = f"(?s)({pattern}|{notfound_pattern})"
-        return full_pattern
-
-    def _build_expect_pattern(
-        self, expects: List[str], match_all: bool, regexp: bool
-    ) -> str:
-        """Return a single regex string."""
-        items = expects if regexp else [re.escape(e) for e in expects]
 
-        if match_all:
-            # Build stacked lookaheads for AND semantics
-            return "".join(f"(?=.*{item})" for item in items)
-
-        # OR semantics
-        return rf"({'|'.join(items)})"
+        return StreamMatcher(
+            [[p.encode("utf-8") for p in alt] for alt in alternatives],
+            flags=re.DOTALL,
+        )
 
     def _default_prompt_pattern(self, cmd: str, flag: str = "") -> str:
         """Return prompt-based fallback pattern (string)."""
@@ -204,16 +205,15 @@ class ProductCore:
         :return: status : command execution status
         """
         cmd = self._prepare_command(cmd, args)
-        pattern = self._prepare_pattern(cmd, expects, flag, match_all, regexp)
-        cmd_bytes, pattern_bytes = self._encode_for_device(cmd, pattern)
+        matcher = self._prepare_matcher(cmd, expects, flag, match_all, regexp)
 
         logger.debug(
             f"Sending command: {cmd}, expecting: "
-            f"{pattern} (timeout={timeout}s)"
+            f"{matcher.patterns} (timeout={timeout}s)"
         )
 
         cmdret = self._device.send_cmd_read_until_pattern(
-            cmd_bytes, pattern=pattern_bytes, timeout=timeout
+            cmd.encode("utf-8"), pattern=matcher, timeout=timeout
         )
 
         if cmdret.valid_match() and self._match_not_found(cmdret.rematch):
@@ -431,7 +431,11 @@ class ProductCore:
             f"Attempting to reboot the device with " f"timeout: {timeout}s"
         )
 
+        trace = metrics.trace(self.REBOOT_METRIC, self._name)
         success = self._device.reboot(timeout=timeout)
+        if success:
+            trace.matched()
+        metrics.record(trace, "SUCCESS" if success else "FAILED")
 
         if success:
             logger.info("Device rebooted successfully.")
@@ -460,6 +464,18 @@ class ProductCore:
         """Check if the device is dead."""
         return self._device.notalive
 
+    def health(self) -> CoreHealth:
+        """Get snapshot of all core fault flags."""
+        faults = self._device.faults()
+        return CoreHealth(
+            name=self._name,
+            console_offset=self._device.console_offset,
+            crash=faults.get("crash"),
+            busyloop=faults.get("busyloop"),
+            flood=faults.get("flood"),
+            notalive=faults.get("notalive"),
+        )
+
     @property
     def status(self) -> str:
         """Check core status with all failure mode detection.
@@ -508,3 +524,12 @@ class ProductCore:
     def start(self) -> None:
         """Start device."""
         self._device.start()
+
+    def stop(self) -> None:
+        """Stop device."""
+        self._device.stop()
+
+    @property
+    def close_times(self) -> List[Dict[str, float]]:
+        """Get stage timings of device teardowns."""
+        return self._device.close_times
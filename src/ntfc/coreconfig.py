@@ -20,9 +20,10 @@
 
 """Product core configuration handler."""
 
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Optional
 
 from ntfc.lib.elf.elf_parser import ElfParser
+from ntfc.lib.kconfig.kconfig import Kconfig, KconfigValue
 
 
 class CoreConfig:
@@ -32,7 +33,7 @@ class CoreConfig:
         """Initialzie product core configuration."""
         self._config = cfg
 
-        self._kv_values: Dict[str, Any] = {}
+        self._kconfig = Kconfig()
         self._elf: Optional[ElfParser] = None
 
         conf_path = self._config.get("conf_path", None)
@@ -47,26 +48,19 @@ class CoreConfig:
 
     def _load_core_config(self) -> None:
         """Load core configuration."""
-        with open(self._config["conf_path"], "r", encoding="utf-8") as f:
-            for line in f:
-                # ignore all commented lines
-                if line[0] != "#" and line[0] != "\n":
-                    name = line.split("=")[0]
-                    val = line.split("=")[1]
-
-                    # parse option value
-                    if val[0] == "y":
-                        val_parsed: Union[bool, str] = True
-                    else:
-                        val_parsed = val[1:-2]
-
-                    self._kv_values[name] = val_parsed
+        # parsed configuration is shared between cores using the same build
+        self._kconfig = Kconfig.load(self._config["conf_path"])
 
     @property
     def uptime(self) -> Any:
-        """Return core uptime."""
+        """Return core maximum boot time in seconds."""
         return self._config.get("uptime", 3)
 
+    @property
+    def boot_banner(self) -> Optional[str]:
+        """Return regex pattern printed by core when shell starts."""
+        return self._config.get("boot_banner", None)
+
     @property
     def device(self) -> Any:
         """Return core device."""
@@ -102,17 +96,94 @@ class CoreConfig:
         """Return core reboot command."""
         return self._config.get("reboot", "")
 
-    def kv_check(self, cfg: str) -> bool:
-        """Check Kconfig option."""
-        if not self._kv_values:
+    @property
+    def cwd(self) -> Optional[str]:
+        """Return working directory for host based device."""
+        return self._config.get("cwd", None)
+
+    @property
+    def reader_thread(self) -> bool:
+        """Return True if background console reader is enabled."""
+        return bool(self._config.get("reader_thread", False))
+
+    @property
+    def reader_buffer(self) -> int:
+        """Return background console reader buffer size in bytes."""
+        return int(self._config.get("reader_buffer", 1024 * 1024))
+
+    @property
+    def write_mode(self) -> str:
+        """Return console write strategy."""
+        mode = str(self._config.get("write_mode", "char"))
+        if mode not in ("char", "bulk", "chunk", "echo"):
+            raise ValueError(f"invalid write_mode: {mode}")
+        return mode
+
+    @property
+    def reset(self) -> str:
+        """Return device reset mode."""
+        mode = str(self._config.get("reset", "relaunch"))
+        if mode not in ("relaunch", "snapshot"):
+            raise ValueError(f"invalid reset: {mode}")
+        return mode
+
+    @property
+    def launcher(self) -> str:
+        """Return sim launcher."""
+        launcher = str(self._config.get("launcher", "exec"))
+        if launcher not in ("exec", "criu"):
+            raise ValueError(f"invalid launcher: {launcher}")
+        return launcher
+
+    @property
+    def spares(self) -> int:
+        """Return number of pre-booted spare instances."""
+        spares = int(self._config.get("spares", 0))
+        if spares < 0:
+            raise ValueError(f"invalid spares: {spares}")
+        return spares
+
+    @property
+    def write_chunk(self) -> int:
+        """Return console write chunk size in bytes."""
+        return int(self._config.get("write_chunk", 64))
+
+    @property
+    def write_delay(self) -> float:
+        """Return delay between console write chunks in seconds."""
+        return float(self._config.get("write_delay", 0.01))
+
+    @property
+    def elf(self) -> Optional[ElfParser]:
+        """Return core ELF parser."""
+        return self._elf
+
+    @property
+    def kconfig(self) -> Kconfig:
+        """Return core Kconfig configuration."""
+        return self._kconfig
+
+    def kv_check(self, cfg: str) -> KconfigValue:
+        """Check Kconfig option.
+
+        :param cfg: option name
+
+        :return: option value or False if option is not enabled
+        """
+        if not self._kconfig:
             raise AttributeError("no config data")
 
-        return self._kv_values[cfg] if self._kv_values.get(cfg) else False
+        value = self._kconfig.get(cfg, False)
+        return False if value == "" else value
 
     def cmd_check(self, cmd: str, core: int = 0) -> bool:
         """Check if command is available in binary."""
         if not self._elf:
             raise AttributeError("no elf data")
 
-        symbol_name = f"{cmd}_main" if "cmocka" in cmd else cmd
-        return self._elf.has_symbol(symbol_name)
+        return self._elf.has_symbol(self.cmd_symbol(cmd))
+
+    @staticmethod
+    def cmd_symbol(cmd: str) -> str:
+        """Get ELF symbol that provides command."""
+        return f"{cmd}_main" if "cmocka" in cmd else cmd
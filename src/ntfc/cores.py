@@ -20,7 +20,7 @@
 
 """Cores handler class implementation."""
 
-from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import (
     Any,
     Dict,
@@ -33,8 +33,9 @@ from typing import (
 from ntfc.core import ProductCore
 from ntfc.device.common import CmdReturn, CmdStatus
 from ntfc.device.getdev import get_device
+from ntfc.health import HealthSnapshot
 from ntfc.logger import logger
-from ntfc.parallel import run_parallel
+from ntfc.parallel import run_calls, run_parallel
 from ntfc.productconfig import ProductConfig
 
 ###############################################################################
@@ -72,6 +73,15 @@ class CoresHandler:
         for core in self._cores:
             core.start()
 
+    def stop(self) -> None:
+        """Stop all cores in parallel."""
+        run_parallel(self._cores, "stop")
+
+    @property
+    def close_times(self) -> Dict[str, List[Dict[str, float]]]:
+        """Get stage timings of device teardowns for all cores."""
+        return {core.name: core.close_times for core in self._cores}
+
     @property
     def cores(self) -> List[str]:
         """List of cores."""
@@ -193,6 +203,10 @@ class CoresHandler:
                 return True
         return False
 
+    def health(self) -> HealthSnapshot:
+        """Get health snapshot for all cores."""
+        return HealthSnapshot(tuple(core.health() for core in self._cores))
+
     @property
     def cur_core(self) -> Optional[str]:
         """Call for all cores."""
@@ -201,27 +215,12 @@ class CoresHandler:
 
     def start_log_collect(self, logs: Dict[str, Any]) -> None:
         """Start log collection for all cores in parallel."""
-
-        def start_log_for_core(
-            index_core: tuple[int, ProductCore],
-        ) -> tuple[int, None]:
-            """Start log collection for a core.
-
-            :param index_core: Tuple of (index, core)
-            :return: Tuple of (index, None)
-            """
-            index, core = index_core
-            core.start_log_collect(logs[core.name])
-            return (index, None)
-
-        with ThreadPoolExecutor(max_workers=len(self._cores)) as executor:
-            indexed_cores = list(enumerate(self._cores))
-            futures = [
-                executor.submit(start_log_for_core, item)
-                for item in indexed_cores
+        run_calls(
+            [
+                partial(core.start_log_collect, logs[core.name])
+                for core in self._cores
             ]
-            for future in futures:
-                future.result()
+        )
 
     def stop_log_collect(self) -> None:
         """Stop log collection for all cores in parallel."""
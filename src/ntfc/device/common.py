@@ -21,21 +21,37 @@
 """Device common interface."""
 
 import re
+import selectors
 import subprocess
 import time
 from abc import ABC, abstractmethod
 from dataclasses import astuple, dataclass
 from enum import IntEnum
-from threading import Event
-from typing import TYPE_CHECKING, Any, Dict, Optional
-
+from threading import Event, RLock
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Union,
+)
+
+from ntfc.health import Fault
 from ntfc.logger import logger
+from ntfc.metrics import CommandTrace, metrics
 
 from .getos import get_os
+from .matcher import StreamMatcher
+from .reader import ConsoleReader, RingBuffer
 
 if TYPE_CHECKING:
     from ntfc.coreconfig import CoreConfig
 
+# regex pattern to match ANSI escape sequences
+_ANSI_ESCAPE = re.compile(rb"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+
 
 ###############################################################################
 # Class: CmdStatus
@@ -85,6 +101,10 @@ class DeviceCommon(ABC):
     """Device common interface."""
 
     _BUSY_LOOP_TIMEOUT = 180  # 180 sec with no data read from target
+    _ECHO_TIMEOUT = 1.0  # max wait for chunk echo in "echo" write mode
+    _BOOT_TIMEOUT = 5.0  # default max wait for prompt after device start
+    _BOOT_POKE_MIN = 0.1  # the first interval between new lines on boot
+    _BOOT_POKE_MAX = 1.0  # the longest interval between new lines on boot
 
     def __init__(self, conf: "CoreConfig", echo: bool = True):
         """Initialize common device."""
@@ -94,76 +114,365 @@ class DeviceCommon(ABC):
 
         # logs handler
         self._logs: Optional[Dict[str, Any]] = None
+        self._logs_lock = RLock()
+
+        # optional background console reader
+        self._reader: Optional[ConsoleReader] = None
+        self._rx: Optional[RingBuffer] = None
+        self._rx_cursor = 0
+        self._rx_log_cursor = 0
+        self._rx_scan_tail = b""
+
+        # data read ahead while waiting for echo, returned by next read
+        self._pending = b""
 
         # device health
         self._crash = Event()
         self._busy_loop = Event()
         self._flood = Event()
         self._busy_loop_last = 0.0
+        self._faults: Dict[str, Fault] = {}
+        self._rx_offset = 0
         self.clear_fault_flags()
 
         self._read_all_sleep = 0.1
         self._has_echo = echo
 
+        # stage timings of every device teardown
+        self._close_times: List[Dict[str, float]] = []
+
     def _console_log(self, data: bytes) -> None:
         """Log console output."""
-        if self._logs is not None:  # pragma: no cover
-            self._logs["console"].write(data.decode("utf-8"))
+        with self._logs_lock:
+            if self._logs is not None:  # pragma: no cover
+                self._logs["console"].write(data.decode("utf-8"))
 
-    def _wait_for_boot(self, timeout: int = 5) -> bool:
-        """Wait for device booted."""
-        end_time = time.time() + timeout
-        while time.time() < end_time:
-            # send new line and expect prompt in returned data
-            ret = self.send_command(b"\n", 1)
-            if self._dev.prompt in ret:
+    def _console_log_rx(self, data: bytes) -> None:
+        """Log data read from device.
+
+        When the background reader is running, device output is logged by the
+        reader thread as soon as it arrives.
+        """
+        if not self.reader_running:
+            self._console_log(data)
+
+    def _console_log_flush(self) -> None:
+        """Log data collected by the background reader."""
+        with self._logs_lock:
+            if self._logs is None or self._rx is None:
+                return
+
+            data, self._rx_log_cursor = self._rx.read(self._rx_log_cursor)
+            if data:
+                self._console_log(_ANSI_ESCAPE.sub(b"", data))
+
+    def _on_reader_data(self, chunk: bytes) -> None:
+        """Handle data from the background reader thread."""
+        assert self._rx is not None
+        self._rx.write(chunk)
+        self._rx_offset += len(chunk)
+        self._busy_loop_last = time.time()
+
+        # check for any sign of system crash, keep the tail of previous
+        # chunk so keys split between chunks are detected too
+        scan = self._rx_scan_tail + chunk
+        if any(
+            key in scan for key in self._dev.crash_keys
+        ):  # pragma: no cover
+            logger.info("Assertion detected! Set crash flag")
+            self._set_fault("crash")
+
+        overlap = max((len(k) for k in self._dev.crash_keys), default=0)
+        self._rx_scan_tail = scan[-overlap:] if overlap else b""
+
+        self._console_log_flush()
+
+    def _on_reader_idle(self) -> None:
+        """Check device health when the reader thread got no data."""
+        self._check_busy_loop(time.time())
+
+    def _check_busy_loop(self, time_now: float) -> bool:
+        """Set busy loop fault if there was no data for a long time.
+
+        :param time_now: current time
+
+        :return: True if busy loop was detected
+        """
+        last = self._busy_loop_last
+        if not last or time_now - last <= self._BUSY_LOOP_TIMEOUT:
+            return False
+
+        self._busy_loop_last = 0
+        logger.info("No data from device! Set busy loop flag")
+        self._set_fault("busyloop")
+        return True
+
+    def _reader_start(self) -> None:
+        """Start background console reader if enabled in configuration."""
+        if not self._conf.reader_thread or self.reader_running:
+            return
+
+        if self._rx is None:
+            self._rx = RingBuffer(self._conf.reader_buffer)
+
+        # drop data left from previous session
+        self._rx_cursor = self._rx.head
+        self._rx_log_cursor = self._rx_cursor
+        self._rx_scan_tail = b""
+
+        self._reader = ConsoleReader(
+            self._read,
+            self._wait_for_device,
+            self._on_reader_data,
+            self.name,
+            self._on_reader_idle,
+        )
+        self._reader.start()
+
+    def _reader_stop(self) -> None:
+        """Stop background console reader."""
+        if self._reader is None:
+            return
+
+        self._reader.stop()
+        self._reader = None
+        self._console_log_flush()
+
+    def _read_chunk(self) -> bytes:
+        """Read next chunk of device data."""
+        if self._pending:
+            data, self._pending = self._pending, b""
+            return data
+
+        if not self.reader_running:
+            data = self._read()
+            self._rx_offset += len(data)
+            return data
+
+        if not self.dev_is_health():
+            return b""
+
+        assert self._rx is not None
+        data, self._rx_cursor = self._rx.read(self._rx_cursor)
+        return data
+
+    def _wait_for_echo(self, data: bytes) -> None:
+        """Wait until device echoes written data.
+
+        Data read while waiting is kept and returned by the next read, so
+        the echo is still part of the command output.
+
+        :param data: data written to device
+        """
+        expected = data.rstrip(b"\r\n")
+        received = b""
+        end_time = time.time() + self._ECHO_TIMEOUT
+        while True:
+            chunk = self._read_chunk()
+            received += chunk
+            if expected in received:
+                break
+
+            time_left = end_time - time.time()
+            if time_left <= 0:
+                logger.debug(f"no echo for {data!r}")
+                break
+
+            if not chunk:
+                self._wait_for_data(time_left)
+
+        self._pending = received
+
+    def _write_data(self, send: Callable[[bytes], Any], data: bytes) -> None:
+        """Write data to device with the configured write strategy.
+
+        :param send: device write function
+        :param data: data to write, new line is added if missing
+        """
+        # add new line if missing
+        if data[-1] != ord("\n"):
+            data += b"\n"
+
+        mode = self._conf.write_mode
+        if mode == "char":
+            # send char by char to avoid line length full
+            for c in data:
+                send(bytes([c]))
+            return
+
+        if mode == "bulk":
+            send(data)
+            return
+
+        # send in chunks that fit in device line buffer
+        size = self._conf.write_chunk
+        for i in range(0, len(data), size):
+            if i > 0:
+                if mode == "echo":
+                    self._wait_for_echo(data[i - size : i])
+                else:
+                    time.sleep(self._conf.write_delay)
+
+            send(data[i : i + size])
+
+    def _boot_matchers(self) -> List[StreamMatcher]:
+        """Get matchers for prompt and optional boot banner."""
+        matchers = [StreamMatcher.from_pattern(re.escape(self._dev.prompt))]
+        if self._conf.boot_banner:
+            banner = self._conf.boot_banner.encode("utf-8")
+            matchers.append(StreamMatcher.from_pattern(banner))
+        return matchers
+
+    def _wait_for_boot(self, timeout: float = _BOOT_TIMEOUT) -> bool:
+        """Wait for device booted.
+
+        Boot is detected as soon as the prompt shows up in console output.
+        New line is sent at start and then with growing interval to get
+        the prompt printed again, or right away when boot banner is found.
+
+        :param timeout: maximum boot time in seconds
+
+        :return: True if device booted, False otherwise
+        """
+        start = time.time()
+        end_time = start + timeout
+        prompt, *banner = self._boot_matchers()
+        poke = self._BOOT_POKE_MIN
+        next_poke = start
+
+        while True:
+            time_now = time.time()
+            if time_now >= end_time:
+                return False
+
+            if not self._dev_is_health_priv():
+                logger.info("device died during boot")
+                return False
+
+            if time_now >= next_poke:
+                self._write(b"\n")
+                next_poke = time_now + poke
+                poke = min(2 * poke, self._BOOT_POKE_MAX)
+
+            chunk = self._read_all(
+                min(next_poke, end_time) - time_now, return_on_data=True
+            )
+            self._console_log_rx(chunk)
+
+            if prompt.feed(chunk):
+                logger.info(f"device booted in {time.time() - start:.2f}s")
                 return True
 
-            time.sleep(1)
+            if banner and not banner[0].match and banner[0].feed(chunk):
+                # shell starts right after banner, ask for prompt now
+                next_poke = time.time()
+                poke = self._BOOT_POKE_MIN
 
-        return False
+    def _wait_for_data(self, timeout: float) -> bool:
+        """Wait until device data is ready to read or timeout expires.
 
-    def _read_all(self, timeout: float = 1.0) -> bytes:
-        """Read data from the device."""
+        :param timeout: maximum wait time in seconds
+
+        :return: True if data is ready to read, False otherwise
+        """
+        if self._pending:
+            return True
+
+        if self.reader_running:
+            assert self._rx is not None
+            return self._rx.wait(self._rx_cursor, timeout)
+
+        return self._wait_for_device(timeout)
+
+    def _wait_for_device(self, timeout: float) -> bool:
+        """Wait until device descriptor is ready to read.
+
+        :param timeout: maximum wait time in seconds
+
+        :return: True if data is ready to read, False otherwise
+        """
+        fd = self._fileno()
+        if fd is None:
+            # no selectable descriptor, fall back to polling
+            time.sleep(min(timeout, self._read_all_sleep))
+            return False
+
+        try:
+            with selectors.DefaultSelector() as sel:
+                sel.register(fd, selectors.EVENT_READ)
+                return bool(sel.select(timeout))
+        except (OSError, ValueError):  # pragma: no cover
+            time.sleep(min(timeout, self._read_all_sleep))
+            return False
+
+    def _read_all(  # noqa: C901
+        self, timeout: float = 1.0, return_on_data: bool = False
+    ) -> bytes:
+        """Read data from the device.
+
+        :param timeout: read window in seconds
+        :param return_on_data: return as soon as any data was read instead
+         of waiting for the whole read window
+
+        :return: data read from device with ANSI escape sequences removed
+        """
         output = b""
         end_time = time.time() + timeout
+        crash_overlap = max((len(k) for k in self._dev.crash_keys), default=0)
+        crashed = self._crash.is_set()
+        ready = False
 
         while True:
-            chunk = self._read()
+            chunk = self._read_chunk()
             output += chunk
             time_now = time.time()
 
-            # check for any sign of system crash
-            if any(
-                key in output for key in self._dev.crash_keys
+            if self.reader_running:
+                # data already scanned by the reader thread
+                if not crashed and self._crash.is_set():  # pragma: no cover
+                    break
+
+            # check for any sign of system crash, only new data must be
+            # scanned so include overlap for keys split between chunks
+            elif chunk and any(
+                key in output[-(len(chunk) + crash_overlap) :]
+                for key in self._dev.crash_keys
             ):  # pragma: no cover
                 logger.info("Assertion detected! Set crash flag")
-                self._crash.set()
+                self._set_fault("crash")
                 break
 
             # check for busy loop
             # trigger an error if there was no data to read for a long time
             if not chunk:
-                if self._busy_loop_last and (
-                    time_now - self._busy_loop_last > self._BUSY_LOOP_TIMEOUT
-                ):  # pragma: no cover
-                    self._busy_loop_last = 0
-                    self._busy_loop.set()
+                if self._check_busy_loop(time_now):  # pragma: no cover
                     break
             else:
                 self._busy_loop_last = time_now
 
+            if chunk and return_on_data:
+                break
+
             # check for timeout
-            if time_now > end_time:
+            if time_now >= end_time:
                 break
 
-            # need to sleep for a while, otherwise host CPU load jumps to 100%
-            time.sleep(self._read_all_sleep)
+            # more data can be pending, read again without waiting
+            if chunk:
+                continue
+
+            if ready:
+                # woken up with nothing to read (i.e. EOF on closed
+                # descriptor), sleep for a while to avoid busy waiting
+                time.sleep(min(end_time - time_now, self._read_all_sleep))
+                ready = False
+                continue
+
+            # wait for data, wakes up as soon as the device sends anything
+            ready = self._wait_for_data(end_time - time_now)
 
-        # regex pattern to match ANSI escape sequences
-        ansi_escape = re.compile(rb"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
         # clean output from garbage
-        clean = ansi_escape.sub(b"", output)
+        clean = _ANSI_ESCAPE.sub(b"", output)
 
         return clean
 
@@ -185,13 +494,28 @@ class DeviceCommon(ABC):
 
     def send_command(self, cmd: bytes | str, timeout: int = 1) -> bytes:
         """Send command to the device and get the response."""
+        trace = metrics.trace(cmd, self._conf.name)
+        rsp = self._send_command(cmd, timeout, trace)
+        metrics.record(trace, CmdStatus.SUCCESS.name)
+        return rsp
+
+    def _send_command(
+        self, cmd: bytes | str, timeout: float, trace: CommandTrace
+    ) -> bytes:
+        """Send command to the device and get the response.
+
+        :param cmd: command to send
+        :param timeout: response read window in seconds
+        :param trace: command trace, updated when command is written and
+         response is read
+        """
         # convert string to bytes
         if not isinstance(cmd, bytes):
             cmd = cmd.encode("utf-8")
 
         # read any pending output and drop
         _ = self._read_all(timeout=0)
-        self._console_log(_)
+        self._console_log_rx(_)
 
         # log written command if echo is not supported by DTU
         if not self._has_echo:
@@ -199,25 +523,35 @@ class DeviceCommon(ABC):
 
         # write command and get response
         self._write(cmd)
-        rsp = self._read_all(timeout=timeout)
+        trace.written()
+
+        # the first data is read separately to know when it arrived
+        end_time = time.time() + timeout
+        rsp = self._read_all(timeout=timeout, return_on_data=True)
+        trace.data(len(rsp))
+        remaining = end_time - time.time()
+        if rsp and remaining > 0:
+            more = self._read_all(timeout=remaining)
+            trace.data(len(more))
+            rsp += more
 
         logger.info("Sent command: %s", cmd)
 
         # console log
-        self._console_log(rsp)
+        self._console_log_rx(rsp)
         return rsp
 
-    def send_cmd_read_until_pattern(  # noqa: C901
-        self, cmd: bytes, pattern: bytes, timeout: int
+    def send_cmd_read_until_pattern(
+        self,
+        cmd: bytes,
+        pattern: Union[bytes, StreamMatcher],
+        timeout: int,
     ) -> CmdReturn:
         """Send command to device and read until the specified pattern.
 
         :param cmd: (bytes) command to send to device
-        :param pattern: (bytes, or list of (bytes), optional)
-         String or regex pattern to look for. If a list,
-         patterns will be concatenated with '.*'.
-         The pattern will be converted to bytes for matching.
-         Default is None.
+        :param pattern: (bytes or StreamMatcher) regex pattern to look for
+         or matcher instance that tracks many expectations
         :param timeout: (int) timeout value in seconds
 
         :return: CmdReturn : command return data
@@ -225,32 +559,33 @@ class DeviceCommon(ABC):
         if not isinstance(cmd, bytes):
             raise TypeError("Command must by bytes")
 
-        if not isinstance(pattern, bytes):
+        if isinstance(pattern, bytes):
+            matcher = StreamMatcher.from_pattern(pattern)
+        elif isinstance(pattern, StreamMatcher):
+            matcher = pattern
+        else:
             raise TypeError("Pattern must by bytes")
 
         # clear buffer for any spurious data
         _ = self._read_all(timeout=0)
 
+        trace = metrics.trace(cmd, self._conf.name)
         end_time = time.time() + timeout
-        output = self.send_command(cmd, 0)
-        output_all = output
+        chunk = self._send_command(cmd, 0, trace)
         _match = None
         ret = CmdStatus.TIMEOUT
         while True:
-            chunk = self._read_all(0.1)
-            output += chunk
-            output_all += chunk
-            self._console_log(chunk)
-
-            # limit output data to process, otherwise re.search can stack
-            # REVISIT: its possible to miss some pattern in output
-            output_max = 10240
-            if len(output) > output_max:
-                output = output[-output_max:]
-
-            _match = re.search(pattern, output)
+            # only new data is scanned, output collected so far is not
+            # searched again
+            scan_start = time.perf_counter()
+            _match = matcher.feed(chunk)
+            trace.scanned(time.perf_counter() - scan_start)
             if _match:
-                logger.debug(f">>match: {output!r}, search: {pattern!r}<<")
+                trace.matched()
+                logger.debug(
+                    f">>match: {_match.group()!r}, "
+                    f"search: {matcher.patterns!r}<<"
+                )
                 ret = CmdStatus.SUCCESS
                 break
 
@@ -263,17 +598,22 @@ class DeviceCommon(ABC):
             if not self.dev_is_health():  # pragma: no cover
                 break
 
+            # wait for more data, returns as soon as anything arrives
+            chunk = self._read_all(self._read_all_sleep, return_on_data=True)
+            trace.data(len(chunk))
+            self._console_log_rx(chunk)
+
         # check for output flood condition.
         # If we still get some data from dev, its possible that we stuck
         # in some command
         if ret == CmdStatus.TIMEOUT:
             chunk = self._read_all(0.1)
             if len(chunk) > 0:
-                self._flood.set()
-            output_all += chunk
-            self._console_log(chunk)
+                self._set_fault("flood")
+            self._console_log_rx(chunk)
 
-        return CmdReturn(ret, _match, output.decode("utf-8"))
+        metrics.record(trace, ret.name)
+        return CmdReturn(ret, _match, matcher.output.decode("utf-8"))
 
     def send_ctrl_cmd(self, ctrl_char: str) -> CmdStatus:
         """Send control command to the device."""
@@ -283,17 +623,54 @@ class DeviceCommon(ABC):
 
     def start_log_collect(self, logs: dict[str, Any]) -> None:
         """Start device log collector."""
-        self._logs = logs
+        with self._logs_lock:
+            self._logs = logs
+            # write data collected by the reader while logs were closed
+            self._console_log_flush()
 
     def stop_log_collect(self) -> None:
         """Stop device log collector."""
-        self._logs = None
+        with self._logs_lock:
+            self._console_log_flush()
+            self._logs = None
 
     def clear_fault_flags(self) -> None:
         """Clear fault flags."""
         self._crash.clear()
         self._flood.clear()
         self._busy_loop.clear()
+        self._faults.clear()
+
+    def _set_fault(self, kind: str) -> None:
+        """Set fault flag and record when the fault was detected.
+
+        :param kind: fault name: crash, busyloop or flood
+        """
+        flag = {
+            "crash": self._crash,
+            "busyloop": self._busy_loop,
+            "flood": self._flood,
+        }[kind]
+
+        if not flag.is_set():
+            self._faults[kind] = Fault(time.time(), self.console_offset)
+        flag.set()
+
+    def faults(self) -> Dict[str, Fault]:
+        """Get faults detected on device.
+
+        :return: dictionary with fault name as key and fault record
+         as value
+        """
+        if self.notalive:
+            if "notalive" not in self._faults:
+                self._faults["notalive"] = Fault(
+                    time.time(), self.console_offset
+                )
+        else:
+            self._faults.pop("notalive", None)
+
+        return dict(self._faults)
 
     def _system_cmd(self, cmd: str) -> None:  # pragma: no cover
         logger.info(f"system command: {cmd}")
@@ -315,6 +692,16 @@ class DeviceCommon(ABC):
         """Return command not found string."""
         return self._dev.no_cmd
 
+    @property
+    def reader_running(self) -> bool:
+        """Check if the background console reader is running."""
+        return self._reader is not None and self._reader.running
+
+    @property
+    def console_offset(self) -> int:
+        """Get number of bytes read from device console so far."""
+        return self._rx_offset
+
     @property
     def busyloop(self) -> bool:
         """Check if the device is in busy loop."""
@@ -330,6 +717,22 @@ class DeviceCommon(ABC):
         """Check if the device is crashed."""
         return self._crash.is_set()
 
+    @property
+    def close_times(self) -> List[Dict[str, float]]:
+        """Get stage timings of device teardowns in seconds."""
+        return self._close_times
+
+    def stop(self) -> None:
+        """Stop device at the end of session."""
+
+    def _fileno(self) -> Optional[int]:
+        """Get file descriptor that signals pending device data.
+
+        Devices without selectable descriptor return None and the reader
+        falls back to periodic polling.
+        """
+        return None
+
     @abstractmethod
     def _read(self) -> bytes:
         """Read data from the device."""
@@ -0,0 +1,142 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Process checkpoint and restore with CRIU."""
+
+import os
+import shutil
+import signal
+import subprocess
+import tempfile
+from typing import List, Optional
+
+import psutil  # type: ignore
+
+from ntfc.logger import logger
+
+###############################################################################
+# Class: CriuCheckpoint
+###############################################################################
+
+
+class CriuCheckpoint:
+    """Checkpoint of a running process that can be restored many times.
+
+    The process is dumped with ``--shell-job``, so it is restored attached
+    to the terminal of ``criu restore`` and can be driven with pexpect like
+    the original one. Restored process gets the pid of the original, so
+    only one copy can run at a time.
+    """
+
+    CRIU = "criu"
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        """Initialize checkpoint.
+
+        :param directory: images directory, temporary if not set
+        """
+        self._dir = directory or tempfile.mkdtemp(prefix="ntfc-criu-")
+        self._pid: Optional[int] = None
+        self._exe: Optional[str] = None
+
+    @classmethod
+    def available(cls) -> bool:
+        """Check if CRIU is available."""
+        return shutil.which(cls.CRIU) is not None
+
+    @property
+    def pid(self) -> Optional[int]:
+        """Get pid of checkpointed process."""
+        return self._pid
+
+    @property
+    def directory(self) -> str:
+        """Get images directory."""
+        return self._dir
+
+    def dump(self, pid: int, timeout: float = 30) -> bool:
+        """Checkpoint process tree, the process is left running.
+
+        :param pid: pid of the root process
+        :param timeout: dump timeout in seconds
+
+        :return: True on success, False otherwise
+        """
+        cmd = [
+            self.CRIU,
+            "dump",
+            "-t",
+            str(pid),
+            "-D",
+            self._dir,
+            "--shell-job",
+            "--leave-running",
+            "--log-file",
+            "dump.log",
+        ]
+        try:
+            subprocess.run(
+                cmd,
+                check=True,
+                timeout=timeout,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(
+                f"criu dump failed: {e}, "
+                f"see {os.path.join(self._dir, 'dump.log')}"
+            )
+            self._pid = None
+            return False
+
+        self._pid = pid
+        self._exe = psutil.Process(pid).exe()
+        return True
+
+    def restore_cmd(self) -> List[str]:
+        """Get command that restores the checkpoint in foreground."""
+        return [
+            self.CRIU,
+            " restore -D ",
+            self._dir,
+            " --shell-job --log-file restore.log",
+        ]
+
+    def release(self) -> None:
+        """Kill restored process left running, so pid is free again."""
+        if self._pid is None:
+            return
+
+        try:
+            proc = psutil.Process(self._pid)
+            # pid may be reused by unrelated process
+            if proc.exe() != self._exe:
+                return
+            os.kill(self._pid, signal.SIGKILL)
+            proc.wait(timeout=5)
+        except (OSError, psutil.Error):
+            pass
+
+    def remove(self) -> None:
+        """Remove checkpoint images."""
+        shutil.rmtree(self._dir, ignore_errors=True)
+        self._pid = None
+        self._exe = None
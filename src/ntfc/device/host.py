@@ -21,16 +21,18 @@
 """Host-based emulated devices."""
 
 import os
+import select
 import signal
+import threading
 import time
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 import pexpect  # type: ignore
-import psutil  # type: ignore
 
 from ntfc.logger import logger
 
 from .common import DeviceCommon
+from .spares import SparePool
 
 if TYPE_CHECKING:
     from ntfc.coreconfig import CoreConfig
@@ -43,6 +45,10 @@ if TYPE_CHECKING:
 class DeviceHost(DeviceCommon):
     """This class implements common interface for host emulated devices."""
 
+    _POWEROFF_TIMEOUT = 1.0  # max wait for exit after poweroff command
+    _TERM_TIMEOUT = 5.0  # max wait for exit after SIGTERM
+    _KILL_TIMEOUT = 1.0  # max wait for exit after SIGKILL
+
     def __init__(self, conf: "CoreConfig"):
         """Initialize host based device.
 
@@ -50,8 +56,12 @@ class DeviceHost(DeviceCommon):
         """
         DeviceCommon.__init__(self, conf)
         self._child = None
-        self._cwd = None
+        self._cwd = conf.cwd
         self._cmd: Optional[List[str]] = None
+        self._uptime = 0
+
+        # optional pool of pre-booted instances
+        self._spares: Optional[SparePool] = None
 
     def _dev_is_health_priv(self) -> bool:
         """Check if the host device is OK."""
@@ -64,13 +74,17 @@ class DeviceHost(DeviceCommon):
         return True
 
     def _dev_reopen(self) -> pexpect.spawn:
-        """Reopen host device."""
+        """Reopen host device, use warm spare if available."""
         if not self._cmd:
             raise ValueError("Host open command is empty")
 
+        spare = self._spares.take() if self._spares else None
+        if spare is not None and self._host_swap(spare):
+            return self._child
+
         self.host_close()
 
-        return self.host_open(self._cmd)
+        return self.host_open(self._cmd, self._uptime)
 
     def _write(self, data: bytes) -> None:
         """Write to the host device."""
@@ -78,14 +92,7 @@ class DeviceHost(DeviceCommon):
             return
 
         assert self._child
-
-        # send char by char to avoid line length full
-        for c in data:
-            self._child.send(bytes([c]))
-
-        # add new line if missing
-        if data[-1] != ord("\n"):
-            self._child.send(b"\n")
+        self._write_data(self._child.send, data)
 
     def _write_ctrl(self, c: str) -> None:
         """Write a control character to the host device."""
@@ -95,6 +102,14 @@ class DeviceHost(DeviceCommon):
         assert self._child
         self._child.sendcontrol(c)
 
+    def _fileno(self) -> Optional[int]:
+        """Get host device console descriptor."""
+        if not self._dev_is_health_priv():
+            return None
+
+        assert self._child
+        return int(self._child.child_fd)
+
     def _read(self) -> bytes:  # pragma: no cover
         """Read data from the host device."""
         if not self.dev_is_health():
@@ -107,29 +122,74 @@ class DeviceHost(DeviceCommon):
         except (pexpect.TIMEOUT, pexpect.EOF):
             return b""
 
-    def _kill_process_group(self, process: pexpect.spawn) -> None:
-        """Kill process group."""
-        pid = process.pid
+    def _wait_exit(self, process: pexpect.spawn, timeout: float) -> bool:
+        """Wait until process exits.
+
+        Exit is signalled with pidfd if available, so teardown takes only
+        as long as the process needs to exit.
 
-        # terminate process gracefully
-        os.killpg(pid, signal.SIGTERM)
+        :param process: process to wait for
+        :param timeout: maximum wait time in seconds
+
+        :return: True if process exited, False otherwise
+        """
+        if not process.isalive():
+            return True
 
         try:
-            # wait for the process group to terminate
-            parent = psutil.Process(pid)
-            parent.wait(timeout=10)
-            logger.info(f"Process group {pid} terminated successfully.")
+            pidfd: Optional[int] = os.pidfd_open(process.pid)
+        except (AttributeError, OSError):  # pragma: no cover
+            pidfd = None
+
+        end_time = time.monotonic() + timeout
+        try:
+            while process.isalive():
+                time_left = end_time - time.monotonic()
+                if time_left <= 0:
+                    return False
+
+                if pidfd is not None:
+                    # pidfd is readable when process exits
+                    select.select([pidfd], [], [], time_left)
+                else:  # pragma: no cover
+                    time.sleep(min(time_left, 0.01))
+            return True
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+
+    def _kill_process_group(self, process: pexpect.spawn) -> Dict[str, float]:
+        """Kill process group, escalate to SIGKILL if it doesn't exit.
+
+        :param process: process group leader
+
+        :return: duration of every stage in seconds
+        """
+        pid = process.pid
+        times: Dict[str, float] = {}
+
+        for sig, timeout in (
+            (signal.SIGTERM, self._TERM_TIMEOUT),
+            (signal.SIGKILL, self._KILL_TIMEOUT),
+        ):
+            start = time.monotonic()
+            try:
+                os.killpg(pid, sig)
+            except ProcessLookupError:
+                break
+
+            exited = self._wait_exit(process, timeout)
+            times[sig.name.lower()] = round(time.monotonic() - start, 3)
+            if exited:
+                logger.info(f"Process group {pid} terminated with {sig.name}")
+                break
 
-        except psutil.TimeoutExpired:  # pragma: no cover
             logger.warning(
-                f"Timeout: Process group {pid}"
-                "did not terminate within 5 seconds."
+                f"Process group {pid} did not terminate with {sig.name} "
+                f"within {timeout}s"
             )
-            # force termination
-            os.killpg(pid, signal.SIGKILL)
-            logger.info(f"Sent SIGKILL to process group {pid}")
 
-        self._child = None
+        return times
 
     def host_open(self, cmd: List[str], uptime: int = 0) -> pexpect.spawn:
         """Open host-based target device."""
@@ -142,36 +202,125 @@ class DeviceHost(DeviceCommon):
         # we need command to reopen file in the case of crash
         self._cmd = cmd
 
-        logger.info(f"spawn cmd: {''.join(cmd)}")
-        self._child = pexpect.spawn(
-            "".join(cmd), timeout=10, maxread=20000, cwd=self._cwd
-        )
+        self._uptime = uptime
 
-        time.sleep(uptime)
+        self._child = self._spawn(cmd)
 
-        ret = self._wait_for_boot()
+        # start background console reader if enabled
+        self._reader_start()
+
+        # uptime is only the longest expected boot time, boot is detected
+        # from console output
+        ret = self._wait_for_boot(uptime + self._BOOT_TIMEOUT)
         if ret is False:  # pragma: no cover
             raise TimeoutError("device boot timeout")
 
+        # spares are started after the first boot, so it is not delayed
+        if self._spares is None and self._spares_count() > 0:
+            self._spares = SparePool(
+                self._spares_count(),
+                self._spare_boot,
+                self._kill_process_group,
+                self.name,
+            )
+            self._spares.start()
+
         return self._child
 
+    def _spawn(self, cmd: List[str]) -> pexpect.spawn:
+        """Spawn host device process."""
+        logger.info(f"spawn cmd: {''.join(cmd)}")
+        child = pexpect.spawn(
+            "".join(cmd), timeout=10, maxread=20000, cwd=self._cwd
+        )
+
+        if self._conf.write_mode != "char":
+            # writes are paced by the write strategy, not by pexpect
+            child.delaybeforesend = None
+
+        return child
+
+    def _spares_count(self) -> int:
+        """Get number of warm spares to keep."""
+        return self._conf.spares
+
+    def _spare_boot(self) -> Optional[pexpect.spawn]:
+        """Start spare instance and wait for prompt.
+
+        :return: booted instance or None if boot failed
+        """
+        assert self._cmd
+        child = self._spawn(self._cmd)
+        end_time = time.time() + self._uptime + self._BOOT_TIMEOUT
+        while time.time() < end_time and child.isalive():
+            child.send(b"\n")
+            try:
+                child.expect_exact(self._dev.prompt, timeout=0.5)
+                return child
+            except pexpect.TIMEOUT:
+                continue
+            except pexpect.EOF:
+                break
+
+        if child.isalive():
+            self._kill_process_group(child)
+        return None
+
+    def _host_swap(self, spare: pexpect.spawn) -> bool:
+        """Replace current instance with a warm spare.
+
+        The old instance is killed in background.
+
+        :param spare: booted spare instance
+
+        :return: True if spare is ready, False otherwise
+        """
+        self._reader_stop()
+        old, self._child = self._child, spare
+        if old is not None and old.isalive():
+            threading.Thread(
+                target=self._kill_process_group,
+                args=(old,),
+                name=f"ntfc-kill-{self.name}",
+                daemon=True,
+            ).start()
+
+        self.clear_fault_flags()
+        self._reader_start()
+
+        if not self._wait_for_boot(self._BOOT_TIMEOUT):
+            logger.warning("warm spare not responding, relaunch device")
+            return False
+
+        logger.info("device replaced with warm spare")
+        return True
+
     def host_close(self) -> None:
         """Close host-based target device."""
         if not self._child:
             raise IOError("Host device not ready")
 
+        start = time.monotonic()
+        times: Dict[str, float] = {}
+
+        self._reader_stop()
+
         if self._child.isalive():
-            # send power off
+            # send power off and wait for exit
             self.poweroff()
-            time.sleep(1)
+            self._wait_exit(self._child, self._POWEROFF_TIMEOUT)
+            times["poweroff"] = round(time.monotonic() - start, 3)
 
         if self._child.isalive():
             # kill process group
-            self._kill_process_group(self._child)
+            times.update(self._kill_process_group(self._child))
 
         self._child = None
 
-        logger.info("host device closed")
+        times["total"] = round(time.monotonic() - start, 3)
+        self._close_times.append(times)
+        stages = ", ".join(f"{k} {v:.2f}s" for k, v in times.items())
+        logger.info(f"host device closed ({stages})")
 
     @property
     def name(self) -> str:
@@ -186,8 +335,17 @@ class DeviceHost(DeviceCommon):
         return not self._child.isalive()
 
     def poweroff(self) -> None:
-        """Poweroff the device."""
-        self.send_command(self._dev.poweroff_cmd)
+        """Poweroff the device, don't wait for response."""
+        self.send_command(self._dev.poweroff_cmd, 0)
+
+    def stop(self) -> None:
+        """Stop spares and close device."""
+        if self._spares:
+            self._spares.stop()
+            self._spares = None
+
+        if self._child:
+            self.host_close()
 
     def reboot(self, timeout: int) -> bool:
         """Reboot the device."""
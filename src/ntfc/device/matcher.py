@@ -0,0 +1,260 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Incremental pattern matcher for device console stream."""
+
+import importlib
+import re
+from functools import lru_cache
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from ntfc.logger import logger
+
+try:
+    _sre_parse: Any = importlib.import_module("re._parser")
+except ImportError:  # pragma: no cover
+    _sre_parse = importlib.import_module("sre_parse")
+
+# default size of console output kept by matcher
+_MAX_OUTPUT = 1024 * 1024
+
+# rescan window for patterns that can't be matched incrementally
+_WINDOW = 10240
+
+###############################################################################
+# Function: _walk
+###############################################################################
+
+
+def _walk(sub: Any) -> Iterator[Tuple[Any, Any]]:
+    """Iterate over all opcodes in parsed pattern, including nested ones."""
+    for op, av in sub:
+        yield op, av
+        for arg in av if isinstance(av, (tuple, list)) else (av,):
+            nested = arg if isinstance(arg, (tuple, list)) else (arg,)
+            for item in nested:
+                if isinstance(item, _sre_parse.SubPattern):
+                    yield from _walk(item)
+
+
+###############################################################################
+# Function: pattern_overlap
+###############################################################################
+
+
+@lru_cache(maxsize=256)
+def pattern_overlap(pattern: bytes, flags: int = 0) -> Optional[int]:
+    """Get number of bytes that must be rescanned when new data arrives.
+
+    A pattern with bounded width that does not look behind or ahead and
+    has no negated characters can't match anything new far from the end
+    of the already scanned data, so only the last few bytes must be
+    searched again.
+
+    :param pattern: regex pattern
+    :param flags: regex flags
+
+    :return: overlap size or None if pattern must be rescanned in window
+    """
+    try:
+        parsed = _sre_parse.parse(pattern, flags)
+    except Exception:  # pragma: no cover
+        return None
+
+    # lookaround in any direction may depend on data outside of overlap and
+    # negative checks that pass on partial data may fail when more arrives,
+    # such patterns are always rescanned in window
+    unsafe = (_sre_parse.ASSERT, _sre_parse.ASSERT_NOT, _sre_parse.NOT_LITERAL)
+    for op, _ in _walk(parsed):
+        if op in unsafe:
+            return None
+
+    hi: int = parsed.getwidth()[1]
+    if hi >= _WINDOW:
+        return None
+
+    # one extra byte for assertions at the end of data (i.e. \b, $)
+    return hi + 1
+
+
+###############################################################################
+# Class: _Expression
+###############################################################################
+
+
+class _Expression:
+    """Single expression tracked in stream."""
+
+    def __init__(self, pattern: bytes, flags: int) -> None:
+        """Initialize expression."""
+        self.regex = re.compile(pattern, flags)
+        self.overlap = pattern_overlap(pattern, flags)
+        self.pos = 0
+        self.found: Optional[re.Match[bytes]] = None
+        self.end = 0
+
+
+###############################################################################
+# Class: StreamMatcher
+###############################################################################
+
+
+class StreamMatcher:
+    """Incremental regex matcher for device console stream.
+
+    The matcher is configured with a list of alternatives, where every
+    alternative is a list of expressions. Alternative is satisfied when all
+    its expressions were found in the stream (in any order), the matcher
+    is satisfied when any alternative is satisfied.
+
+    Every chunk fed to the matcher is scanned only once, plus a small
+    overlap sized to the pattern, so the cost per chunk depends on the
+    chunk size and not on the size of the output collected so far.
+    """
+
+    def __init__(
+        self,
+        alternatives: Sequence[Sequence[bytes]],
+        flags: int = 0,
+        max_output: int = _MAX_OUTPUT,
+        window: int = _WINDOW,
+    ) -> None:
+        """Initialize stream matcher.
+
+        :param alternatives: list of alternatives, each is a list of regex
+         patterns that must be all found
+        :param flags: regex flags used to compile patterns
+        :param max_output: maximum number of output bytes kept by matcher
+        :param window: rescan window for patterns that can't be matched
+         incrementally
+        """
+        if not alternatives or not all(alternatives):
+            raise ValueError("matcher requires non-empty alternatives")
+
+        self._alternatives: List[List[_Expression]] = [
+            [_Expression(pattern, flags) for pattern in alt]
+            for alt in alternatives
+        ]
+        self._max_output = max_output
+        self._window = window
+        self._buf = bytearray()
+        self._base = 0
+        self._match: Optional[re.Match[bytes]] = None
+        self._scanned = False
+
+        for alt in self._alternatives:
+            for expr in alt:
+                if expr.overlap is None:
+                    logger.debug(
+                        f"pattern {expr.regex.pattern!r} rescanned "
+                        f"in {window} bytes window"
+                    )
+
+    @classmethod
+    def from_pattern(cls, pattern: bytes, **kwargs: Any) -> "StreamMatcher":
+        """Create matcher for a single regex pattern.
+
+        :param pattern: regex pattern
+        :param kwargs: other matcher arguments
+
+        :return: StreamMatcher instance
+        """
+        return cls([[pattern]], **kwargs)
+
+    @property
+    def output(self) -> bytes:
+        """Get output collected by matcher."""
+        return bytes(self._buf)
+
+    @property
+    def match(self) -> Optional[re.Match[bytes]]:
+        """Get match that satisfied the matcher."""
+        return self._match
+
+    @property
+    def patterns(self) -> List[List[bytes]]:
+        """Get patterns tracked by matcher."""
+        return [
+            [expr.regex.pattern for expr in alt] for alt in self._alternatives
+        ]
+
+    def _trim(self) -> None:
+        """Drop the oldest output if buffer is full."""
+        # trim in batches, so the buffer is not moved on every chunk
+        if len(self._buf) <= 2 * self._max_output:
+            return
+
+        drop = len(self._buf) - self._max_output
+        del self._buf[:drop]
+        self._base += drop
+
+    def _search(self, expr: _Expression) -> bool:
+        """Search for expression in not yet scanned output."""
+        head = self._base + len(self._buf)
+        if expr.overlap is None:
+            start = max(expr.pos, head - self._window)
+        else:
+            start = expr.pos
+        start = max(start, self._base)
+
+        m = expr.regex.search(self._buf, start - self._base)
+        if not m:
+            if expr.overlap is not None:
+                expr.pos = max(expr.pos, head - expr.overlap)
+            return False
+
+        # match on immutable copy, the buffer is modified with new data
+        snapshot = bytes(self._buf)
+        expr.found = expr.regex.search(snapshot, m.start())
+        expr.end = self._base + m.end()
+        return True
+
+    def feed(self, data: bytes) -> Optional[re.Match[bytes]]:
+        """Feed new data to matcher.
+
+        :param data: new data from device
+
+        :return: match if matcher is satisfied, None otherwise
+        """
+        if self._match or (not data and self._scanned):
+            return self._match
+
+        self._buf += data
+        self._scanned = True
+
+        best: Optional[_Expression] = None
+        for alt in self._alternatives:
+            # search all expressions, so every byte is scanned only once
+            found = [bool(expr.found) or self._search(expr) for expr in alt]
+            if not all(found):
+                continue
+
+            # all expressions found, prefer alternative completed first
+            last = max(alt, key=lambda expr: expr.end)
+            if best is None or last.end < best.end:
+                best = last
+
+        if best:
+            self._match = best.found
+        else:
+            # all data is scanned now, drop what is not needed anymore
+            self._trim()
+
+        return self._match
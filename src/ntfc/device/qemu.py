@@ -20,9 +20,17 @@
 
 """Host-based QEMU implementation."""
 
-from typing import TYPE_CHECKING
+import os
+import tempfile
+import time
+from typing import TYPE_CHECKING, List, Optional
+
+import pexpect  # type: ignore
+
+from ntfc.logger import logger
 
 from .host import DeviceHost
+from .qmp import QmpClient, QmpError
 
 if TYPE_CHECKING:
     from ntfc.coreconfig import CoreConfig
@@ -33,11 +41,105 @@ if TYPE_CHECKING:
 
 
 class DeviceQemu(DeviceHost):
-    """This class implements host-based QEMU emulator."""
+    """This class implements host-based QEMU emulator.
+
+    With ``reset: snapshot`` core option, VM snapshot is saved right after
+    the first boot and reboot restores it over QMP instead of relaunching
+    QEMU. Snapshot needs a drive that supports snapshots (qcow2), without
+    it the VM is reset with ``system_reset``. If QMP fails, QEMU is
+    relaunched.
+    """
+
+    SNAPSHOT_NAME = "ntfc-boot"
 
     def __init__(self, conf: "CoreConfig"):
         """Initialize QEMU emulator device."""
         DeviceHost.__init__(self, conf)
+        self._qmp: Optional[QmpClient] = None
+        self._snapshot = False
+
+        # QMP socket path, unique for device instance
+        self._qmp_path = os.path.join(
+            tempfile.gettempdir(), f"ntfc-qmp-{os.getpid()}-{id(self)}.sock"
+        )
+
+    def _qmp_init(self) -> None:
+        """Connect to QMP and save boot snapshot."""
+        self._qmp = QmpClient(self._qmp_path)
+        try:
+            self._qmp.connect()
+        except (OSError, QmpError) as e:
+            logger.warning(f"QMP not available, relaunch on reset: {e}")
+            self._qmp = None
+            return
+
+        try:
+            self._qmp.human(f"savevm {self.SNAPSHOT_NAME}")
+            self._snapshot = True
+            logger.info("QEMU boot snapshot saved")
+        except (OSError, QmpError) as e:
+            logger.info(f"QEMU snapshot not available, use system reset: {e}")
+            self._snapshot = False
+
+    def _qmp_close(self) -> None:
+        """Close QMP connection."""
+        if self._qmp:
+            self._qmp.close()
+        self._qmp = None
+        self._snapshot = False
+
+    def _qmp_reset(self) -> bool:
+        """Reset VM over QMP.
+
+        :return: True if VM was reset and booted, False otherwise
+        """
+        if not self._qmp or not self._dev_is_health_priv():
+            return False
+
+        start = time.time()
+        try:
+            if self._snapshot:
+                self._qmp.human(f"loadvm {self.SNAPSHOT_NAME}")
+            else:
+                self._qmp.execute("system_reset")
+        except (OSError, QmpError) as e:
+            logger.warning(f"QMP reset failed: {e}")
+            return False
+
+        self.clear_fault_flags()
+        # drop output from before reset
+        _ = self._read_all(timeout=0)
+        self._console_log_rx(_)
+
+        if not self._wait_for_boot(self._conf.uptime + self._BOOT_TIMEOUT):
+            logger.warning("no prompt after QMP reset")
+            return False
+
+        logger.info(f"QEMU reset over QMP in {time.time() - start:.2f}s")
+        return True
+
+    def _spares_count(self) -> int:
+        """Get number of warm spares, not used with snapshot reset."""
+        if self._conf.reset == "snapshot":
+            # spares would share QMP socket, snapshot reset is faster
+            return 0
+        return self._conf.spares
+
+    def host_open(self, cmd: List[str], uptime: int = 0) -> pexpect.spawn:
+        """Open QEMU and prepare fast reset if enabled."""
+        child = DeviceHost.host_open(self, cmd, uptime)
+        if self._conf.reset == "snapshot":
+            self._qmp_init()
+        return child
+
+    def host_close(self) -> None:
+        """Close QEMU."""
+        self._qmp_close()
+        DeviceHost.host_close(self)
+
+        # socket is left behind if QEMU was killed
+        if os.path.exists(self._qmp_path):
+            os.unlink(self._qmp_path)
 
     def start(self) -> None:
         """Start QEMU emulator."""
@@ -60,9 +162,20 @@ class DeviceQemu(DeviceHost):
         cmd.append(" ")
         cmd.append(kernel_param)
 
+        if self._conf.reset == "snapshot":
+            # local monitor socket for fast reset
+            cmd.append(" ")
+            cmd.append(f"-qmp unix:{self._qmp_path},server=on,wait=off")
+
         # open host-based emulation
         self.host_open(cmd, uptime)
 
+    def reboot(self, timeout: int) -> bool:
+        """Reboot QEMU, over QMP if possible."""
+        if self._qmp_reset():
+            return True
+        return DeviceHost.reboot(self, timeout)
+
     @property
     def name(self) -> str:
         """Get device name."""
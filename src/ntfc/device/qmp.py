@@ -0,0 +1,161 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Minimal QEMU Machine Protocol (QMP) client."""
+
+import json
+import socket
+import time
+from typing import Any, Dict, Optional
+
+from ntfc.logger import logger
+
+###############################################################################
+# Class: QmpError
+###############################################################################
+
+
+class QmpError(Exception):
+    """QMP command failed."""
+
+
+###############################################################################
+# Class: QmpClient
+###############################################################################
+
+
+class QmpClient:
+    """QMP client connected to QEMU monitor over local socket.
+
+    QEMU must be started with ``-qmp unix:<path>,server=on,wait=off``.
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0) -> None:
+        """Initialize QMP client.
+
+        :param path: path to QMP unix socket
+        :param timeout: connect and command timeout in seconds
+        """
+        self._path = path
+        self._timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._buf = b""
+
+    @property
+    def connected(self) -> bool:
+        """Check if client is connected."""
+        return self._sock is not None
+
+    def _recv(self) -> Dict[str, Any]:
+        """Receive the next message, skip asynchronous events."""
+        assert self._sock
+        while True:
+            while b"\n" not in self._buf:
+                data = self._sock.recv(4096)
+                if not data:
+                    raise QmpError("QMP connection closed")
+                self._buf += data
+
+            line, self._buf = self._buf.split(b"\n", 1)
+            if not line.strip():
+                continue
+
+            msg: Dict[str, Any] = json.loads(line)
+            if "event" in msg:
+                logger.debug(f"QMP event: {msg['event']}")
+                continue
+            return msg
+
+    def connect(self) -> None:
+        """Connect to QEMU and negotiate capabilities.
+
+        Socket is created by QEMU on start, so connection is retried until
+        timeout expires.
+        """
+        end_time = time.time() + self._timeout
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self._timeout)
+            try:
+                sock.connect(self._path)
+                break
+            except OSError:
+                sock.close()
+                if time.time() >= end_time:
+                    raise
+                time.sleep(0.05)
+
+        self._sock = sock
+        self._buf = b""
+        try:
+            greeting = self._recv()
+            if "QMP" not in greeting:
+                raise QmpError(f"invalid QMP greeting: {greeting}")
+            self.execute("qmp_capabilities")
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Close connection."""
+        if self._sock:
+            self._sock.close()
+        self._sock = None
+
+    def execute(
+        self, cmd: str, arguments: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """Execute QMP command.
+
+        :param cmd: command name
+        :param arguments: command arguments
+
+        :return: command return value
+        """
+        if not self._sock:
+            raise QmpError("QMP not connected")
+
+        req: Dict[str, Any] = {"execute": cmd}
+        if arguments:
+            req["arguments"] = arguments
+        self._sock.sendall(json.dumps(req).encode() + b"\n")
+
+        rsp = self._recv()
+        if "error" in rsp:
+            raise QmpError(f"{cmd}: {rsp['error'].get('desc', rsp['error'])}")
+        return rsp.get("return")
+
+    def human(self, cmd: str) -> str:
+        """Execute human monitor command.
+
+        Commands like ``savevm`` and ``loadvm`` are available in all QEMU
+        versions only with human monitor.
+
+        :param cmd: monitor command line
+
+        :return: command output
+        """
+        out = str(
+            self.execute("human-monitor-command", {"command-line": cmd}) or ""
+        )
+        # human monitor reports errors only in output
+        if "error" in out.lower():
+            raise QmpError(f"{cmd}: {out.strip()}")
+        return out
@@ -0,0 +1,196 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Background device console reader."""
+
+import threading
+from typing import Callable, Optional, Tuple
+
+from ntfc.logger import logger
+
+###############################################################################
+# Class: RingBuffer
+###############################################################################
+
+
+class RingBuffer:
+    """Bounded byte buffer addressed with absolute stream offsets.
+
+    Consumers keep their own cursor (absolute offset in the stream) so many
+    readers can consume the same data without copying it around.
+    """
+
+    def __init__(self, size: int) -> None:
+        """Initialize ring buffer.
+
+        :param size: maximum number of bytes kept in buffer
+        """
+        if size <= 0:
+            raise ValueError("buffer size must be positive")
+
+        self._size = size
+        self._buf = bytearray()
+        self._tail = 0
+        self._cond = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        """Get buffer capacity."""
+        return self._size
+
+    @property
+    def head(self) -> int:
+        """Get stream offset just after the newest byte."""
+        with self._cond:
+            return self._tail + len(self._buf)
+
+    @property
+    def tail(self) -> int:
+        """Get stream offset of the oldest byte still in buffer."""
+        with self._cond:
+            return self._tail
+
+    def write(self, data: bytes) -> None:
+        """Append data to buffer and wake up waiting consumers."""
+        if not data:
+            return
+
+        with self._cond:
+            self._buf += data
+            drop = len(self._buf) - self._size
+            if drop > 0:
+                del self._buf[:drop]
+                self._tail += drop
+            self._cond.notify_all()
+
+    def read(self, cursor: int) -> Tuple[bytes, int]:
+        """Read all data available after cursor.
+
+        :param cursor: stream offset to read from
+
+        :return: tuple of (data, new cursor)
+        """
+        with self._cond:
+            if cursor < self._tail:
+                logger.warning(
+                    f"console buffer overrun, lost {self._tail - cursor} bytes"
+                )
+                cursor = self._tail
+
+            data = bytes(self._buf[cursor - self._tail :])
+            return data, cursor + len(data)
+
+    def wait(self, cursor: int, timeout: float) -> bool:
+        """Wait until there is data available after cursor.
+
+        :param cursor: stream offset to wait for
+        :param timeout: maximum wait time in seconds
+
+        :return: True if data is available, False otherwise
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._tail + len(self._buf) > cursor, timeout
+            )
+
+
+###############################################################################
+# Class: ConsoleReader
+###############################################################################
+
+
+class ConsoleReader:
+    """Thread that continuously moves device output into a ring buffer."""
+
+    _POLL_INTERVAL = 0.1
+
+    def __init__(
+        self,
+        read: Callable[[], bytes],
+        wait: Callable[[float], bool],
+        on_data: Callable[[bytes], None],
+        name: str = "console",
+        on_idle: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Initialize console reader.
+
+        :param read: non-blocking device read function
+        :param wait: wait for device data function
+        :param on_data: called from reader thread with every chunk read
+        :param name: reader thread name
+        :param on_idle: called from reader thread when no data arrived
+         within poll interval
+        """
+        self._read = read
+        self._wait = wait
+        self._on_data = on_data
+        self._on_idle = on_idle
+        self._name = name
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _loop(self) -> None:
+        """Reader thread loop."""
+        ready = False
+        while not self._stop.is_set():
+            try:
+                chunk = self._read()
+            except Exception as e:  # pragma: no cover
+                logger.error(f"console reader {self._name} failed: {e}")
+                chunk = b""
+
+            if chunk:
+                self._on_data(chunk)
+                ready = False
+                continue
+
+            if ready:
+                # woken up with nothing to read (i.e. EOF or device not
+                # healthy), sleep for a while to avoid busy waiting
+                self._stop.wait(self._POLL_INTERVAL)
+                ready = False
+                continue
+
+            ready = self._wait(self._POLL_INTERVAL)
+            if not ready and self._on_idle:
+                self._on_idle()
+
+    @property
+    def running(self) -> bool:
+        """Check if reader thread is running."""
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> None:
+        """Start reader thread."""
+        if self.running:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name=f"ntfc-reader-{self._name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop reader thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self._thread = None
@@ -20,7 +20,7 @@
 
 """Serial-based device implementation."""
 
-from typing import TYPE_CHECKING, Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 import serial  # type: ignore
 
@@ -100,18 +100,11 @@ class DeviceSerial(DeviceCommon):
             return
 
         assert self._ser
-
-        # send char by char to avoid line length full
-        for c in data:
-            self._ser.write(bytes([c]))
-
-        # add new line if missing
-        if data[-1] != ord("\n"):
-            self._ser.write(b"\n")  # pragma: no cover
+        self._write_data(self._ser.write, data)
 
         # read all garbage left by character echo
         _ = self._read_all(timeout=0)
-        self._console_log(_)
+        self._console_log_rx(_)
 
     def _write_ctrl(self, c: str) -> None:
         """Write a control character to the serial device."""
@@ -123,6 +116,17 @@ class DeviceSerial(DeviceCommon):
         code = ord(c.upper()) - 64
         self._ser.write(bytes([code]))
 
+    def _fileno(self) -> Optional[int]:
+        """Get serial port descriptor."""
+        if not self._ser:
+            return None
+
+        try:
+            return int(self._ser.fileno())
+        except Exception:  # pragma: no cover
+            # not supported by this port implementation
+            return None
+
     def _read(self) -> bytes:
         """Read data from the serial device."""
         if not self.dev_is_health():
@@ -147,6 +151,9 @@ class DeviceSerial(DeviceCommon):
         else:
             self._ser = serial.Serial(path, timeout=timeout)
 
+        # start background console reader if enabled
+        self._reader_start()
+
         # reboot device if possible
         self.reboot()
 
@@ -170,6 +177,13 @@ class DeviceSerial(DeviceCommon):
         """Poweroff the device."""
         print("TODO: poweroff")  # pragma: no cover
 
+    def stop(self) -> None:
+        """Close serial port."""
+        self._reader_stop()
+        if self._ser:
+            self._ser.close()
+        self._ser = None
+
     def reboot(self, timeout: int = 1) -> bool:
         """Reboot the device."""
         if self._conf.reboot:  # pragma: no cover
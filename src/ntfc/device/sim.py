@@ -20,8 +20,13 @@
 
 """Host-based simulator implementation."""
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
+import pexpect  # type: ignore
+
+from ntfc.logger import logger
+
+from .criu import CriuCheckpoint
 from .host import DeviceHost
 
 if TYPE_CHECKING:
@@ -33,11 +38,75 @@ if TYPE_CHECKING:
 
 
 class DeviceSim(DeviceHost):
-    """This class implements host-based sim emulator."""
+    """This class implements host-based sim emulator.
+
+    With ``launcher: criu`` core option, sim is checkpointed with CRIU at
+    the first prompt and reboot restores the checkpoint instead of
+    starting and booting a new sim.
+    """
 
     def __init__(self, conf: "CoreConfig"):
         """Initialize sim emulator device."""
         DeviceHost.__init__(self, conf)
+        self._criu: Optional[CriuCheckpoint] = None
+
+    def _criu_init(self) -> None:
+        """Checkpoint booted sim."""
+        if not CriuCheckpoint.available():
+            logger.warning("criu not found, sim is relaunched on reboot")
+            return
+
+        assert self._child
+        criu = CriuCheckpoint()
+        if criu.dump(self._child.pid):
+            logger.info(f"sim checkpoint stored in {criu.directory}")
+            self._criu = criu
+        else:
+            criu.remove()
+
+    def _criu_restore(self) -> bool:
+        """Replace sim with a fresh copy restored from checkpoint.
+
+        :return: True if sim was restored, False otherwise
+        """
+        assert self._criu
+        if self._child:
+            self.host_close()
+        # restored sim needs pid of checkpointed one
+        self._criu.release()
+
+        self._child = self._spawn(self._criu.restore_cmd())
+        self.clear_fault_flags()
+        self._reader_start()
+
+        if not self._wait_for_boot(self._conf.uptime + self._BOOT_TIMEOUT):
+            logger.warning("sim restore failed, relaunch sim")
+            self._criu.remove()
+            self._criu = None
+            return False
+
+        logger.info("sim restored from checkpoint")
+        return True
+
+    def _dev_reopen(self) -> pexpect.spawn:
+        """Reopen sim, restore checkpoint if available."""
+        if self._criu and self._criu_restore():
+            return self._child
+        return DeviceHost._dev_reopen(self)
+
+    def stop(self) -> None:
+        """Close sim and remove checkpoint."""
+        DeviceHost.stop(self)
+        if self._criu:
+            self._criu.release()
+            self._criu.remove()
+            self._criu = None
+
+    def _spares_count(self) -> int:
+        """Get number of warm spares, not used with CRIU launcher."""
+        if self._conf.launcher == "criu":
+            return 0
+        return self._conf.spares
 
     def start(self) -> None:
         """Start sim emulator."""
@@ -51,6 +120,9 @@ class DeviceSim(DeviceHost):
         # open host-based emulation
         self.host_open(cmd, uptime)
 
+        if self._conf.launcher == "criu":
+            self._criu_init()
+
     @property
     def name(self) -> str:
         """Get device name."""
@@ -0,0 +1,161 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Pool of pre-booted device instances."""
+
+import atexit
+import threading
+from typing import Any, Callable, List, Optional
+
+from ntfc.logger import logger
+
+###############################################################################
+# Class: SparePool
+###############################################################################
+
+
+class SparePool:
+    """Pool of pre-booted device instances ready to replace a crashed one.
+
+    Spares are booted one by one in a background thread, so the pool is
+    refilled while tests are running.
+    """
+
+    # consecutive boot failures that disable the pool
+    _MAX_FAILURES = 3
+
+    def __init__(
+        self,
+        size: int,
+        boot: Callable[[], Optional[Any]],
+        kill: Callable[[Any], Any],
+        name: str = "device",
+    ) -> None:
+        """Initialize spare pool.
+
+        :param size: number of spares kept ready
+        :param boot: start new instance and wait for boot, return None
+         on failure
+        :param kill: stop instance
+        :param name: name used in logs and thread name
+        """
+        if size <= 0:
+            raise ValueError("spare pool size must be positive")
+
+        self._size = size
+        self._boot = boot
+        self._kill = kill
+        self._name = name
+        self._ready: List[Any] = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> int:
+        """Get number of spares ready to use."""
+        with self._cond:
+            return len(self._ready)
+
+    @property
+    def running(self) -> bool:
+        """Check if pool is refilled in background."""
+        return bool(self._thread and self._thread.is_alive())
+
+    def _boot_one(self) -> Optional[Any]:
+        """Boot single spare."""
+        try:
+            return self._boot()
+        except Exception as e:
+            logger.warning(f"spare {self._name} boot failed: {e}")
+            return None
+
+    def _loop(self) -> None:
+        """Keep the pool full."""
+        failures = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stop.is_set()
+                    or len(self._ready) < self._size
+                )
+                if self._stop.is_set():
+                    return
+
+            spare = self._boot_one()
+            if spare is None:
+                failures += 1
+                if failures >= self._MAX_FAILURES:
+                    logger.warning(f"spares for {self._name} disabled")
+                    return
+                continue
+
+            failures = 0
+            with self._cond:
+                if not self._stop.is_set():
+                    self._ready.append(spare)
+                    logger.info(
+                        f"spare {self._name} ready "
+                        f"({len(self._ready)}/{self._size})"
+                    )
+                    continue
+
+            # pool stopped while booting
+            self._kill(spare)
+            return
+
+    def start(self) -> None:
+        """Start filling the pool in background."""
+        if self.running:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name=f"ntfc-spares-{self._name}", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def take(self) -> Optional[Any]:
+        """Take a ready spare, a new one is booted in background.
+
+        :return: booted instance or None if no spare is ready
+        """
+        with self._cond:
+            if not self._ready:
+                return None
+            spare = self._ready.pop(0)
+            self._cond.notify_all()
+            return spare
+
+    def stop(self) -> None:
+        """Stop filling the pool and kill all spares."""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join()
+        self._thread = None
+        atexit.unregister(self.stop)
+
+        with self._cond:
+            spares, self._ready = self._ready, []
+        for spare in spares:
+            self._kill(spare)
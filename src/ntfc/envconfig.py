@@ -22,6 +22,7 @@
 
 from typing import Any, Dict, List
 
+from ntfc.lib.kconfig.kconfig import KconfigValue
 from ntfc.productconfig import ProductConfig
 
 
@@ -81,7 +82,9 @@ class EnvConfig:
         return self._cfg_values
 
     # dep_config
-    def kv_check(self, cfg: str, product: int = 0, core: int = 0) -> bool:
+    def kv_check(
+        self, cfg: str, product: int = 0, core: int = 0
+    ) -> KconfigValue:
         """Check Kconfig option."""
         return self._products[product].kv_check(cfg, core)
 
@@ -0,0 +1,235 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Build fingerprints used to skip builds of unchanged images."""
+
+import json
+import os
+import subprocess
+from typing import Any, Dict, List, Optional
+
+from ntfc.cache import cache_key
+from ntfc.logger import logger
+
+# fingerprint file stored in build directory
+FINGERPRINT_FILE = "ntfc-build.json"
+
+###############################################################################
+# Function: _output
+###############################################################################
+
+
+def _output(cmd: List[str]) -> Optional[bytes]:
+    """Get command output or None if command failed."""
+    try:
+        return subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+###############################################################################
+# Function: git_state
+###############################################################################
+
+
+def git_state(path: str) -> Optional[str]:
+    """Get state of git repository.
+
+    State covers HEAD commit and modified and untracked files, files are
+    identified by size and modification time, so edits are detected
+    without reading file content.
+
+    :param path: path to git repository
+
+    :return: repository state or None if not a git repository
+    """
+    head = _output(["git", "-C", path, "rev-parse", "HEAD"])
+    # list every untracked file, not only its top directory
+    status = _output(
+        [
+            "git",
+            "-C",
+            path,
+            "status",
+            "--porcelain",
+            "-z",
+            "--no-renames",
+            "--untracked-files=all",
+        ]
+    )
+    if head is None or status is None:
+        return None
+
+    dirty = []
+    for entry in status.split(b"\0"):
+        if not entry:
+            continue
+        name = entry[3:].decode("utf-8", "replace")
+        try:
+            st = os.stat(os.path.join(path, name))
+            dirty.append([name, st.st_size, st.st_mtime_ns])
+        except OSError:
+            # deleted file
+            dirty.append([name, None, None])
+
+    return cache_key(head.decode().strip(), sorted(dirty))
+
+
+###############################################################################
+# Function: toolchain_version
+###############################################################################
+
+
+def toolchain_version(build_path: str) -> Optional[str]:
+    """Get version of C compiler configured in build directory.
+
+    :param build_path: path to CMake build directory
+
+    :return: compiler version or None if build is not configured
+    """
+    compiler = None
+    try:
+        with open(
+            os.path.join(build_path, "CMakeCache.txt"), encoding="utf-8"
+        ) as f:
+            for line in f:
+                if line.startswith("CMAKE_C_COMPILER:"):
+                    compiler = line.split("=", 1)[1].strip()
+                    break
+    except OSError:
+        return None
+
+    if not compiler:
+        return None
+
+    out = _output([compiler, "--version"])
+    if out is None:
+        return None
+    return out.decode("utf-8", "replace").split("\n")[0]
+
+
+###############################################################################
+# Function: defconfig_content
+###############################################################################
+
+
+def defconfig_content(nuttx_dir: str, defconfig: str) -> Optional[str]:
+    """Get defconfig file content.
+
+    :param nuttx_dir: path to NuttX repository
+    :param defconfig: defconfig path, absolute or relative to NuttX
+     repository, or directory with defconfig file
+
+    :return: defconfig content or None if file not found
+    """
+    path = os.path.join(nuttx_dir, defconfig)
+    if os.path.isdir(path):
+        path = os.path.join(path, "defconfig")
+
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+###############################################################################
+# Function: build_fingerprint
+###############################################################################
+
+
+def build_fingerprint(
+    cwd: str, build_path: str, defconfig: str, defines: Dict[str, str]
+) -> Dict[str, Optional[str]]:
+    """Get build fingerprint.
+
+    Fingerprint has two parts: ``configure`` covers defconfig content,
+    CMake defines and toolchain version, ``build`` covers configure part
+    and state of NuttX and apps repositories. Parts that can't be
+    determined are None, so build is never skipped for them.
+
+    :param cwd: directory with NuttX and apps repositories
+    :param build_path: path to build directory
+    :param defconfig: board defconfig
+    :param defines: defines passed to CMake
+
+    :return: dictionary with ``configure`` and ``build`` fingerprints
+    """
+    nuttx_dir = os.path.join(cwd, "nuttx")
+    parts: List[Any] = [
+        defconfig,
+        defconfig_content(nuttx_dir, defconfig),
+        sorted(defines.items()),
+        toolchain_version(build_path),
+    ]
+    configure = None if None in parts[1:] else cache_key(*parts)
+
+    sources = []
+    for repo in ("nuttx", "apps"):
+        path = os.path.join(cwd, repo)
+        if os.path.isdir(path):
+            sources.append(git_state(path))
+
+    if configure is None or not sources or None in sources:
+        return {"configure": configure, "build": None}
+
+    return {"configure": configure, "build": cache_key(configure, sources)}
+
+
+###############################################################################
+# Function: load_fingerprint
+###############################################################################
+
+
+def load_fingerprint(build_path: str) -> Dict[str, Any]:
+    """Load fingerprint of the last build.
+
+    :param build_path: path to build directory
+
+    :return: stored fingerprint, empty if not available
+    """
+    try:
+        with open(
+            os.path.join(build_path, FINGERPRINT_FILE), encoding="utf-8"
+        ) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+###############################################################################
+# Function: store_fingerprint
+###############################################################################
+
+
+def store_fingerprint(build_path: str, fingerprint: Dict[str, Any]) -> None:
+    """Store fingerprint of the last build.
+
+    :param build_path: path to build directory
+    :param fingerprint: fingerprint to store
+    """
+    path = os.path.join(build_path, FINGERPRINT_FILE)
+    try:
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(fingerprint, f)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logger.warning(f"failed to store build fingerprint {path}: {e}")
@@ -0,0 +1,143 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Device health snapshot."""
+
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+
+###############################################################################
+# Class: Fault
+###############################################################################
+
+
+@dataclass(frozen=True)
+class Fault:
+    """Fault detected on device."""
+
+    time: float
+    offset: int
+
+
+###############################################################################
+# Class: CoreHealth
+###############################################################################
+
+
+@dataclass(frozen=True)
+class CoreHealth:
+    """Health of a single product core.
+
+    Every fault field holds the time and console offset where the fault
+    was detected, or None if the fault was not detected.
+    """
+
+    name: str
+    console_offset: int = 0
+    crash: Optional[Fault] = None
+    busyloop: Optional[Fault] = None
+    flood: Optional[Fault] = None
+    notalive: Optional[Fault] = None
+    product: str = ""
+
+    @property
+    def ok(self) -> bool:
+        """Check if no fault was detected."""
+        return self.reason is None
+
+    @property
+    def reason(self) -> Optional[str]:
+        """Get the most important fault name."""
+        if self.crash:
+            return "crash"
+        if self.busyloop:
+            return "busy_loop"
+        if self.flood:
+            return "flood"
+        if self.notalive:
+            return "not_alive"
+        return None
+
+
+###############################################################################
+# Class: HealthSnapshot
+###############################################################################
+
+
+@dataclass(frozen=True)
+class HealthSnapshot:
+    """Health of many product cores taken at once."""
+
+    cores: Tuple[CoreHealth, ...] = ()
+
+    @classmethod
+    def merge(cls, *snapshots: "HealthSnapshot") -> "HealthSnapshot":
+        """Merge snapshots into one.
+
+        :param snapshots: snapshots to merge
+        """
+        return cls(tuple(core for s in snapshots for core in s.cores))
+
+    def for_product(self, product: str) -> "HealthSnapshot":
+        """Get copy of snapshot with product name assigned to all cores.
+
+        :param product: product name
+        """
+        return HealthSnapshot(
+            tuple(replace(core, product=product) for core in self.cores)
+        )
+
+    @property
+    def crash(self) -> bool:
+        """Check if any core crashed."""
+        return any(core.crash for core in self.cores)
+
+    @property
+    def busyloop(self) -> bool:
+        """Check if any core is in busy loop."""
+        return any(core.busyloop for core in self.cores)
+
+    @property
+    def flood(self) -> bool:
+        """Check if any core is in flood state."""
+        return any(core.flood for core in self.cores)
+
+    @property
+    def notalive(self) -> bool:
+        """Check if any core is dead."""
+        return any(core.notalive for core in self.cores)
+
+    @property
+    def ok(self) -> bool:
+        """Check if no fault was detected on any core."""
+        return all(core.ok for core in self.cores)
+
+    @property
+    def reason(self) -> Optional[str]:
+        """Get the most important fault name from all cores."""
+        for reason in ("crash", "busy_loop", "flood", "not_alive"):
+            if any(core.reason == reason for core in self.cores):
+                return reason
+        return None
+
+    @property
+    def faulty(self) -> Tuple[CoreHealth, ...]:
+        """Get cores with detected faults."""
+        return tuple(core for core in self.cores if not core.ok)
@@ -23,16 +23,46 @@
 Used during test collection phase without fixture dependencies
 """
 
+import base64
+import hashlib
 import logging
 import os
 import re
-import subprocess
-from typing import List, Pattern, Union
+import struct
+import sys
+import weakref
+from array import array
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Tuple, Union
+
+from elftools.elf.constants import SH_FLAGS
+from elftools.elf.elffile import ELFFile
+from elftools.elf.sections import NoteSection
+
+from ntfc.cache import cache_key, cache_load, cache_store
+
+# cache format version, change when cached data format changes
+_CACHE_VERSION = 2
+
+# ELF symbol constants
+_SHN_UNDEF = 0
+_SHN_ABS = 0xFFF1
+_SHN_COMMON = 0xFFF2
+_STB_GLOBAL = 1
+_STB_WEAK = 2
+_STB_GNU_UNIQUE = 10
+_STT_OBJECT = 1
+_STT_FUNC = 2
+_STT_SECTION = 3
+_STT_FILE = 4
+_STT_GNU_IFUNC = 10
 
 
 class Symbol:
     """ELF symbol representation."""
 
+    __slots__ = ("name", "address", "type")
+
     def __init__(self, name: str, address: str = "", symbol_type: str = ""):
         """Initialize ELF symbol representation."""
         self.name = name
@@ -40,16 +70,176 @@ class Symbol:
         self.type = symbol_type
 
 
+class SymbolTable:
+    """Columnar table of ELF symbols sorted by name.
+
+    Symbol names are stored in one bytes blob with offsets, addresses and
+    types in arrays, so a table with many symbols uses a few bytes per
+    symbol instead of a few Python objects per symbol. Symbol objects are
+    created on demand when table is accessed.
+    """
+
+    def __init__(
+        self,
+        names: bytes,
+        offsets: "array[int]",
+        addresses: "array[int]",
+        types: bytes,
+        width: int = 16,
+    ) -> None:
+        """Initialize symbol table.
+
+        :param names: sorted symbol names, each followed by new line
+        :param offsets: offsets of names in blob, plus the end of blob
+        :param addresses: symbol addresses
+        :param types: symbol types in the same form as nm tool
+        :param width: number of hex digits in formatted symbol address
+        """
+        if not len(offsets) - 1 == len(addresses) == len(types):
+            raise ValueError("symbol table columns don't match")
+
+        self._names = names
+        self._offsets = offsets
+        self._addresses = addresses
+        self._types = types
+        self._width = width
+
+    @classmethod
+    def from_symbols(
+        cls, symbols: List[Tuple[str, int, str]], width: int = 16
+    ) -> "SymbolTable":
+        """Create table from list of (name, address, type) tuples.
+
+        :param symbols: list of symbols
+        :param width: number of hex digits in formatted symbol address
+
+        :return: SymbolTable instance
+        """
+        encoded = sorted((n.encode() + b"\n", a, t) for n, a, t in symbols)
+        offsets = array("I", [0])
+        offsets.extend(accumulate(len(n) for n, _, _ in encoded))
+        return cls(
+            b"".join(n for n, _, _ in encoded),
+            offsets,
+            array("Q", (a for _, a, _ in encoded)),
+            "".join(t for _, _, t in encoded).encode(),
+            width,
+        )
+
+    @classmethod
+    def from_cache(cls, data: Dict[str, Any]) -> "SymbolTable":
+        """Create table from cached data."""
+        offsets = array("I")
+        offsets.frombytes(base64.b64decode(data["offsets"]))
+        addresses = array("Q")
+        addresses.frombytes(base64.b64decode(data["addresses"]))
+        return cls(
+            base64.b64decode(data["names"]),
+            offsets,
+            addresses,
+            data["types"].encode(),
+            data["width"],
+        )
+
+    def to_cache(self) -> Dict[str, Any]:
+        """Get table data for cache."""
+        return {
+            "names": base64.b64encode(self._names).decode(),
+            "offsets": base64.b64encode(self._offsets.tobytes()).decode(),
+            "addresses": base64.b64encode(self._addresses.tobytes()).decode(),
+            "types": self._types.decode(),
+            "width": self._width,
+        }
+
+    def __len__(self) -> int:
+        """Get number of symbols."""
+        return len(self._addresses)
+
+    def __getitem__(self, index: int) -> Symbol:
+        """Get symbol view."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("symbol index out of range")
+
+        return Symbol(
+            self.name(index),
+            f"{self._addresses[index]:0{self._width}x}",
+            chr(self._types[index]),
+        )
+
+    def __iter__(self) -> Iterator[Symbol]:
+        """Iterate over symbols."""
+        return (self[i] for i in range(len(self)))
+
+    def _name(self, index: int) -> bytes:
+        """Get encoded symbol name."""
+        return self._names[self._offsets[index] : self._offsets[index + 1] - 1]
+
+    def name(self, index: int) -> str:
+        """Get symbol name.
+
+        :param index: symbol index
+        """
+        return self._name(index).decode()
+
+    def names(self) -> Iterator[str]:
+        """Iterate over symbol names."""
+        return (self.name(i) for i in range(len(self)))
+
+    def lower_bound(self, prefix: str) -> int:
+        """Get index of the first symbol not lower than prefix.
+
+        :param prefix: symbol name or prefix
+        """
+        key = prefix.encode()
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, name: str) -> int:
+        """Get index of symbol with given name.
+
+        :param name: symbol name
+
+        :return: symbol index or -1 if not found
+        """
+        i = self.lower_bound(name)
+        if i < len(self) and self._name(i) == name.encode():
+            return i
+        return -1
+
+
 class ElfParser:
-    """ELF file parser for extracting symbols."""
+    """ELF file parser for extracting symbols.
+
+    Symbols are read from ELF symbol table on first use and stored in
+    on-disk cache, so the next sessions don't parse the same ELF file again.
+    Parsers for the same ELF file share one symbol table.
+    """
+
+    # symbol tables in use, shared between parsers
+    _tables: "weakref.WeakValueDictionary[str, SymbolTable]" = (
+        weakref.WeakValueDictionary()
+    )
+
+    def __init__(self, elf_path: str, use_cache: bool = True):
+        """Initialize ELF file parser.
 
-    def __init__(self, elf_path: str):
-        """Initialize ELF file parser."""
+        :param elf_path: path to ELF file
+        :param use_cache: use on-disk symbols cache if set to True
+        """
         if not os.path.exists(elf_path) or not self._is_elf_file(elf_path):
             raise AttributeError("can't load ELF file")
 
         self.elf_path = elf_path
-        self._symbols: List[Symbol] = []
+        self._use_cache = use_cache
+        self._table: Optional[SymbolTable] = None
 
     def _is_elf_file(self, path: str) -> bool:
         """Check if this is ELF file."""
@@ -61,69 +251,277 @@ class ElfParser:
             return False
 
     @property
-    def symbols(self) -> List[Symbol]:
-        """Get all symbols from ELF file."""
-        if not self._symbols:
-            self._symbols = self._extract_symbols()
-        return self._symbols
-
-    def _extract_symbols(self) -> List[Symbol]:
-        """Extract symbols using nm command."""
+    def symbols(self) -> SymbolTable:
+        """Get all symbols from ELF file sorted by name."""
+        return self._load()
+
+    def _load(self) -> SymbolTable:
+        """Load symbols from cache or ELF file."""
+        if self._table is not None:
+            return self._table
+
+        key = self._cache_key()
+        table = self._tables.get(key) if key else None
+        if table is None:
+            data = cache_load("elf", key) if key and self._use_cache else None
+            if data is not None:
+                table = SymbolTable.from_cache(data)
+            else:
+                table = SymbolTable.from_symbols(*self._extract_symbols())
+                if key and self._use_cache:
+                    cache_store("elf", key, table.to_cache())
+            if key:
+                self._tables[key] = table
+
+        self._table = table
+        return table
+
+    def _build_id(self, elf: ELFFile) -> Optional[str]:
+        """Get GNU build ID."""
+        for section in elf.iter_sections():
+            if not isinstance(section, NoteSection):
+                continue
+            for note in section.iter_notes():
+                if note["n_type"] == "NT_GNU_BUILD_ID":
+                    return str(note["n_desc"])
+        return None
+
+    def fingerprint(self) -> Optional[str]:
+        """Get ELF file fingerprint.
+
+        Fingerprint is based on file path, size, modification time and
+        build ID, so it changes when ELF file is rebuilt.
+
+        :return: fingerprint or None if file can't be read
+        """
         try:
-            result = subprocess.run(
-                ["nm", "--defined-only", self.elf_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True,
-            )
+            path = os.path.abspath(self.elf_path)
+            st = os.stat(path)
+            with open(path, "rb") as f:
+                build_id = self._build_id(ELFFile(f))
+        except Exception as e:  # pragma: no cover
+            logging.debug(f"no fingerprint for {self.elf_path}: {e}")
+            return None
 
-            symbols = []
-            for line in result.stdout.splitlines():
-                line = line.strip()
-                if not line:
-                    continue  # pragma: no cover
-
-                parts = line.split()
-                if len(parts) >= 3:
-                    address, symbol_type, name = parts[0], parts[1], parts[2]
-                    symbols.append(Symbol(name, address, symbol_type))
-                elif len(parts) >= 2:  # pragma: no cover
-                    symbol_type, name = parts[0], parts[1]
-                    symbols.append(Symbol(name, symbol_type=symbol_type))
-                elif len(parts) == 1:  # pragma: no cover
-                    name = parts[0]
-                    symbols.append(Symbol(name))
-
-            return symbols
-
-        except subprocess.CalledProcessError as e:  # pragma: no cover
-            logging.error(
-                f"Failed to extract symbols from {self.elf_path}: {e}"
-            )
-            return []
+        return cache_key(path, st.st_size, st.st_mtime_ns, build_id)
+
+    def _cache_key(self) -> Optional[str]:
+        """Get symbols cache key for ELF file."""
+        fingerprint = self.fingerprint()
+        if fingerprint is None:  # pragma: no cover
+            return None
+        return cache_key(_CACHE_VERSION, sys.byteorder, fingerprint)
+
+    def _section_letters(self, elf: ELFFile) -> List[str]:
+        """Get nm symbol type letter for symbols in each section."""
+        letters = []
+        for section in elf.iter_sections():
+            flags = section["sh_flags"]
+            if flags & SH_FLAGS.SHF_EXECINSTR:
+                letters.append("t")
+            elif not flags & SH_FLAGS.SHF_ALLOC:
+                letters.append("n")
+            elif section["sh_type"] == "SHT_NOBITS":
+                letters.append("b")
+            elif flags & SH_FLAGS.SHF_WRITE:
+                letters.append("d")
+            else:
+                letters.append("r")
+        return letters
+
+    def _symbol_type(self, letters: List[str], info: int, shndx: int) -> str:
+        """Get symbol type in the same form as nm tool."""
+        bind = info >> 4
+        stype = info & 0xF
+
+        if shndx == _SHN_ABS:
+            letter = "a"
+        elif shndx == _SHN_COMMON:
+            letter = "c"
+        elif stype == _STT_GNU_IFUNC:
+            letter = "i"
+        elif shndx < len(letters):
+            letter = letters[shndx]
+        else:  # pragma: no cover
+            letter = "?"
+
+        if bind == _STB_WEAK:
+            return "V" if stype == _STT_OBJECT else "W"
+        if bind == _STB_GNU_UNIQUE:  # pragma: no cover
+            return "u"
+        if bind == _STB_GLOBAL:
+            return letter.upper()
+        return letter
+
+    def _symtab(self, elf: ELFFile) -> Optional[Tuple[Any, bytes]]:
+        """Get symbol table section and its string table."""
+        symtab = elf.get_section_by_name(".symtab") or elf.get_section_by_name(
+            ".dynsym"
+        )
+        if symtab is None:  # pragma: no cover
+            logging.error(f"no symbol table in {self.elf_path}")
+            return None
+        return symtab, elf.get_section(symtab["sh_link"]).data()
+
+    def _symbol_entries(
+        self, elf: ELFFile, data: bytes
+    ) -> Iterator[Tuple[int, int, int, int, int]]:
+        """Decode raw symbol table entries.
+
+        :return: iterator over (name offset, value, size, info, shndx)
+        """
+        # decode symbols directly, parsing every symbol with pyelftools
+        # is an order of magnitude slower
+        if elf.elfclass == 64:
+            fmt, order = "IBBHQQ", (0, 4, 5, 1, 3)
+        else:
+            fmt, order = "IIIBBH", (0, 1, 2, 3, 5)
+        entry = struct.Struct(("<" if elf.little_endian else ">") + fmt)
+
+        for fields in entry.iter_unpack(
+            data[: len(data) // entry.size * entry.size]
+        ):
+            name_off, value, size, info, shndx = (fields[i] for i in order)
+            # nm doesn't show debugging symbols by default
+            if (
+                not name_off
+                or shndx == _SHN_UNDEF
+                or info & 0xF in (_STT_SECTION, _STT_FILE)
+            ):
+                continue
+            yield name_off, value, size, info, shndx
+
+    def _extract_symbols(self) -> Tuple[List[Tuple[str, int, str]], int]:
+        """Extract defined symbols from ELF symbol table."""
+        try:
+            with open(self.elf_path, "rb") as f:
+                elf = ELFFile(f)
+                symtab = self._symtab(elf)
+                if symtab is None:  # pragma: no cover
+                    return [], 16
+
+                letters = self._section_letters(elf)
+                strtab = symtab[1]
+                data = symtab[0].data()
+                width = elf.elfclass // 4
+
+                symbols = []
+                for name_off, value, _, info, shndx in self._symbol_entries(
+                    elf, data
+                ):
+                    name = strtab[name_off : strtab.index(b"\0", name_off)]
+                    symbols.append(
+                        (
+                            name.decode("utf-8", "replace"),
+                            value,
+                            self._symbol_type(letters, info, shndx),
+                        )
+                    )
+
+            return symbols, width
 
         except Exception as e:  # pragma: no cover
             logging.error(f"Unexpected error parsing ELF symbols: {e}")
-            return []
+            return [], 16
+
+    def _extract_digests(self) -> Dict[str, str]:
+        """Extract digests of function and object symbols."""
+        digests: Dict[str, List[str]] = {}
+        with open(self.elf_path, "rb") as f:
+            elf = ELFFile(f)
+            symtab = self._symtab(elf)
+            if symtab is None:  # pragma: no cover
+                return {}
+
+            strtab = symtab[1]
+            sections: Dict[int, Tuple[int, bytes]] = {}
+            for name_off, value, size, info, shndx in self._symbol_entries(
+                elf, symtab[0].data()
+            ):
+                if info & 0xF not in (_STT_OBJECT, _STT_FUNC):
+                    continue
+                if shndx >= elf.num_sections():
+                    # absolute and common symbols have no content
+                    content = b""
+                else:
+                    if shndx not in sections:
+                        section = elf.get_section(shndx)
+                        sections[shndx] = (
+                            section["sh_addr"],
+                            (
+                                b""
+                                if section["sh_type"] == "SHT_NOBITS"
+                                else section.data()
+                            ),
+                        )
+                    addr, data = sections[shndx]
+                    content = data[value - addr : value - addr + size]
+
+                digest = hashlib.sha1(size.to_bytes(8, "little"))
+                digest.update(content)
+                name = strtab[name_off : strtab.index(b"\0", name_off)]
+                digests.setdefault(name.decode("utf-8", "replace"), []).append(
+                    digest.hexdigest()[:16]
+                )
+
+        # symbols with the same name (i.e. static functions) share digest
+        return {
+            name: (
+                values[0]
+                if len(values) == 1
+                else hashlib.sha1(
+                    "".join(sorted(values)).encode()
+                ).hexdigest()[:16]
+            )
+            for name, values in digests.items()
+        }
+
+    def symbol_digests(self) -> Dict[str, str]:
+        """Get digests of function and object symbols.
+
+        Digest covers symbol size and content, so it changes when symbol
+        code or initialized data changes.
+
+        :return: dictionary of symbol name -> digest
+        """
+        key = self._cache_key() if self._use_cache else None
+        data = cache_load("elfdigest", key) if key else None
+        if data is not None:
+            return dict(data)
+
+        try:
+            digests = self._extract_digests()
+        except Exception as e:  # pragma: no cover
+            logging.error(f"Unexpected error reading ELF symbols: {e}")
+            return {}
+
+        if key:
+            cache_store("elfdigest", key, digests)
+        return digests
 
     def get_symbols_by_pattern(
         self, prefix: str = "", suffix: str = ""
     ) -> List[Symbol]:
         """Filter symbols by prefix and suffix."""
-        return [
-            s
-            for s in self.symbols
-            if s.name.startswith(prefix) and s.name.endswith(suffix)
-        ]
+        table = self._load()
+
+        # symbols are sorted by name, so matching prefix is a single range
+        ret = []
+        for i in range(table.lower_bound(prefix), len(table)):
+            name = table.name(i)
+            if not name.startswith(prefix):
+                break
+            if name.endswith(suffix):
+                ret.append(table[i])
+        return ret
 
     def has_symbol(self, symbol_name: Union[str, Pattern[str]]) -> bool:
         """Check if symbol exists."""
+        table = self._load()
+
         if isinstance(symbol_name, str):
-            return any(symbol.name == symbol_name for symbol in self.symbols)
+            return table.find(symbol_name) >= 0
 
         if isinstance(symbol_name, re.Pattern):
-            return any(
-                symbol_name.search(symbol.name) for symbol in self.symbols
-            )
+            return any(symbol_name.search(name) for name in table.names())
         raise ValueError("symbol_name must be either str or re.Pattern")
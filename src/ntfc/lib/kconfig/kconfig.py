@@ -0,0 +1,208 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""NuttX Kconfig .config file loader."""
+
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Iterator, Mapping, Optional, Tuple, Union
+
+
+class KconfigHex(int):
+    """Kconfig hex value, behaves as int but keeps hex representation."""
+
+    def __repr__(self) -> str:
+        """Get hex representation."""
+        return hex(self)
+
+    __str__ = __repr__
+
+
+# option value types: bool, int, hex and string
+KconfigValue = Union[bool, int, str]
+
+_NOT_SET = re.compile(r"^# (CONFIG_\w+) is not set$")
+_INT = re.compile(r"^-?\d+$")
+_HEX = re.compile(r"^0[xX][0-9a-fA-F]+$")
+
+
+def parse_value(raw: str) -> KconfigValue:
+    """Parse option value from .config file.
+
+    :param raw: value as stored in .config file
+
+    :return: typed value
+    """
+    if raw == "y":
+        return True
+    if raw == "n":
+        return False
+    if len(raw) >= 2 and raw[0] == '"' and raw[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", raw[1:-1])
+    if _INT.match(raw):
+        return int(raw)
+    if _HEX.match(raw):
+        return KconfigHex(int(raw, 16))
+    return raw
+
+
+@dataclass(frozen=True)
+class KconfigDiff:
+    """Difference between two Kconfig configurations."""
+
+    # options only in the new configuration
+    added: Mapping[str, KconfigValue] = field(default_factory=dict)
+    # options only in the old configuration
+    removed: Mapping[str, KconfigValue] = field(default_factory=dict)
+    # options with different values as (old, new)
+    changed: Mapping[str, Tuple[KconfigValue, KconfigValue]] = field(
+        default_factory=dict
+    )
+
+    def __bool__(self) -> bool:
+        """Check if configurations differ."""
+        return bool(self.added or self.removed or self.changed)
+
+    @property
+    def options(self) -> Tuple[str, ...]:
+        """Get names of all options that differ."""
+        return tuple(sorted({*self.added, *self.removed, *self.changed}))
+
+
+class Kconfig(Mapping[str, KconfigValue]):
+    """Read-only NuttX Kconfig configuration.
+
+    Options disabled with ``# CONFIG_X is not set`` have False value,
+    so they can be distinguished from options that are not defined.
+    """
+
+    # loaded files: path -> ((mtime, size), Kconfig)
+    _cache: Dict[str, Tuple[Tuple[int, int], "Kconfig"]] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(
+        self,
+        values: Optional[Mapping[str, KconfigValue]] = None,
+        path: Optional[str] = None,
+    ) -> None:
+        """Initialize Kconfig configuration.
+
+        :param values: option values
+        :param path: path to file from which configuration was loaded
+        """
+        self._values = MappingProxyType(dict(values or {}))
+        self._path = path
+
+    @classmethod
+    def parse(cls, text: str, path: Optional[str] = None) -> "Kconfig":
+        """Parse .config file content.
+
+        :param text: .config file content
+        :param path: path to file from which configuration was loaded
+
+        :return: Kconfig instance
+        """
+        values: Dict[str, KconfigValue] = {}
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+
+            if line[0] == "#":
+                m = _NOT_SET.match(line)
+                if m:
+                    values[m.group(1)] = False
+                continue
+
+            name, sep, raw = line.partition("=")
+            if sep:
+                values[name.strip()] = parse_value(raw.strip())
+
+        return cls(values, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Kconfig":
+        """Load .config file.
+
+        Files are parsed once and shared until modified.
+
+        :param path: path to .config file
+
+        :return: Kconfig instance
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        with cls._cache_lock:
+            cached = cls._cache.get(path)
+            if cached and cached[0] == stamp:
+                return cached[1]
+
+        with open(path, "r", encoding="utf-8") as f:
+            kconfig = cls.parse(f.read(), path)
+
+        with cls._cache_lock:
+            cls._cache[path] = (stamp, kconfig)
+
+        return kconfig
+
+    @property
+    def path(self) -> Optional[str]:
+        """Get path to file from which configuration was loaded."""
+        return self._path
+
+    def __getitem__(self, name: str) -> KconfigValue:
+        """Get option value."""
+        return self._values[name]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over option names."""
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        """Get number of options."""
+        return len(self._values)
+
+    def enabled(self, name: str) -> bool:
+        """Check if option is defined and not disabled.
+
+        :param name: option name
+        """
+        return self._values.get(name, False) is not False
+
+    def diff(self, other: Mapping[str, KconfigValue]) -> KconfigDiff:
+        """Get difference from this configuration to other configuration.
+
+        :param other: new configuration
+
+        :return: KconfigDiff instance
+        """
+        added = {k: v for k, v in other.items() if k not in self._values}
+        removed = {k: v for k, v in self._values.items() if k not in other}
+        changed = {
+            k: (v, other[k])
+            for k, v in self._values.items()
+            if k in other and other[k] != v
+        }
+        return KconfigDiff(added, removed, changed)
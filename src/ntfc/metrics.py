@@ -0,0 +1,301 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Command latency and throughput metrics."""
+
+import heapq
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+###############################################################################
+# Class: Histogram
+###############################################################################
+
+
+class Histogram:
+    """Histogram with power of two buckets.
+
+    Bucket ``k`` counts values in ``(2**(k-1), 2**k]``, so the histogram
+    has fixed relative resolution and constant cost per value.
+    """
+
+    __slots__ = ("count", "total", "min", "max", "_buckets")
+
+    def __init__(self) -> None:
+        """Initialize empty histogram."""
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._buckets: Dict[int, int] = {}
+
+    @staticmethod
+    def _bucket(value: float) -> int:
+        """Get bucket index for value."""
+        if value <= 0:
+            return -64
+        return math.ceil(math.log2(value))
+
+    def add(self, value: float) -> None:
+        """Add value to histogram."""
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        idx = self._bucket(value)
+        self._buckets[idx] = self._buckets.get(idx, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        """Get approximate percentile, upper bound of its bucket.
+
+        :param q: percentile in range 0-100
+        """
+        if not self.count:
+            return 0.0
+
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for idx in sorted(self._buckets):
+            seen += self._buckets[idx]
+            if seen >= rank:
+                return min(2.0**idx, self.max)
+        return self.max  # pragma: no cover
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get histogram as dictionary."""
+        if not self.count:
+            return {"count": 0}
+
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "min": round(self.min, 6),
+            "max": round(self.max, 6),
+            "mean": round(self.total / self.count, 6),
+            "p50": round(self.percentile(50), 6),
+            "p95": round(self.percentile(95), 6),
+            "buckets": {
+                f"<={2.0**idx:g}": n
+                for idx, n in sorted(self._buckets.items())
+            },
+        }
+
+
+###############################################################################
+# Class: CommandTrace
+###############################################################################
+
+
+@dataclass
+class CommandTrace:
+    """Timings of a single command, in seconds since command start."""
+
+    command: str
+    core: str
+    start: float = field(default_factory=time.perf_counter)
+    write: Optional[float] = None
+    first_byte: Optional[float] = None
+    match: Optional[float] = None
+    total: Optional[float] = None
+    scan: float = 0.0
+    nbytes: int = 0
+
+    def written(self) -> None:
+        """Mark command written to device."""
+        self.write = time.perf_counter() - self.start
+
+    def data(self, size: int) -> None:
+        """Account data read from device."""
+        if size and self.first_byte is None:
+            self.first_byte = time.perf_counter() - self.start
+        self.nbytes += size
+
+    def scanned(self, duration: float) -> None:
+        """Account time spent on pattern matching."""
+        self.scan += duration
+
+    def matched(self) -> None:
+        """Mark expected pattern found."""
+        self.match = time.perf_counter() - self.start
+
+    def finish(self) -> None:
+        """Mark command finished."""
+        self.total = time.perf_counter() - self.start
+
+
+###############################################################################
+# Class: CommandMetrics
+###############################################################################
+
+
+class CommandMetrics:
+    """Command metrics aggregated per command name, core and test.
+
+    Times are stored in milliseconds, data size in bytes.
+    """
+
+    FILE_NAME = "commands.json"
+    TIMES = ("total", "write", "first_byte", "match", "scan")
+
+    def __init__(self, slowest: int = 20) -> None:
+        """Initialize metrics.
+
+        :param slowest: number of the slowest commands kept
+        """
+        self._lock = threading.Lock()
+        self._slowest_max = slowest
+        self.test = ""
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop all collected metrics."""
+        with self._lock:
+            self._stats: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+            # min-heap of (total, sequence, sample)
+            self._slowest: List[Tuple[float, int, Dict[str, Any]]] = []
+            self._seq = 0
+
+    @staticmethod
+    def command_name(cmd: Union[str, bytes]) -> str:
+        """Get command name used to group metrics."""
+        if isinstance(cmd, bytes):
+            cmd = cmd.decode("utf-8", errors="replace")
+        parts = cmd.split()
+        return parts[0] if parts else ""
+
+    def trace(self, cmd: Union[str, bytes], core: str) -> CommandTrace:
+        """Start tracing command.
+
+        :param cmd: command line
+        :param core: core name
+        """
+        return CommandTrace(self.command_name(cmd), str(core))
+
+    def record(self, trace: CommandTrace, status: str) -> None:
+        """Record finished command.
+
+        :param trace: command trace
+        :param status: command status
+        """
+        if trace.total is None:
+            trace.finish()
+
+        sample: Dict[str, Any] = {
+            "command": trace.command,
+            "core": trace.core,
+            "test": self.test,
+            "status": status,
+            "bytes": trace.nbytes,
+        }
+        for name in self.TIMES:
+            value = getattr(trace, name)
+            if value is not None:
+                sample[name] = round(value * 1000, 3)
+
+        key = (trace.command, trace.core, self.test)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = {"status": {}, "bytes": Histogram()}
+                stats.update({name: Histogram() for name in self.TIMES})
+                self._stats[key] = stats
+
+            stats["status"][status] = stats["status"].get(status, 0) + 1
+            stats["bytes"].add(trace.nbytes)
+            for name in self.TIMES:
+                if name in sample:
+                    stats[name].add(sample[name])
+
+            self._seq += 1
+            item = (sample["total"], self._seq, sample)
+            if len(self._slowest) < self._slowest_max:
+                heapq.heappush(self._slowest, item)
+            elif item > self._slowest[0]:
+                heapq.heapreplace(self._slowest, item)
+
+    def slowest(self) -> List[Dict[str, Any]]:
+        """Get the slowest commands, the slowest first."""
+        with self._lock:
+            items = sorted(self._slowest, reverse=True)
+        return [sample for _, _, sample in items]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get metrics as dictionary."""
+        with self._lock:
+            stats = sorted(self._stats.items())
+
+        commands = []
+        for (command, core, test), values in stats:
+            entry: Dict[str, Any] = {
+                "command": command,
+                "core": core,
+                "test": test,
+                "status": dict(values["status"]),
+            }
+            for name in self.TIMES + ("bytes",):
+                entry[name] = values[name].to_dict()
+            commands.append(entry)
+
+        return {
+            "units": {"time": "ms", "bytes": "bytes"},
+            "commands": commands,
+            "slowest": self.slowest(),
+        }
+
+    def save(self, path: str) -> None:
+        """Store metrics in JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def summary(self, count: int = 10) -> List[str]:
+        """Get table with the slowest commands.
+
+        :param count: number of commands in table
+
+        :return: table lines
+        """
+        slowest = self.slowest()[:count]
+        if not slowest:
+            return []
+
+        def ms(sample: Dict[str, Any], name: str) -> str:
+            value = sample.get(name)
+            return "-" if value is None else f"{value:.1f}"
+
+        lines = [
+            f"{'total ms':>10} {'1st byte':>10} {'match':>10} {'scan':>8} "
+            f"{'bytes':>8}  {'status':<8} {'core':<12} command / test"
+        ]
+        for s in slowest:
+            lines.append(
+                f"{ms(s, 'total'):>10} {ms(s, 'first_byte'):>10} "
+                f"{ms(s, 'match'):>10} {ms(s, 'scan'):>8} {s['bytes']:>8}  "
+                f"{s['status']:<8} {s['core']:<12} {s['command']} "
+                f"{s['test']}"
+            )
+        return lines
+
+
+# metrics collected in this process
+metrics = CommandMetrics()
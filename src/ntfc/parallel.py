@@ -20,13 +20,93 @@
 
 """Parallel execution utilities for handlers."""
 
+import os
+import threading
 from concurrent.futures import ThreadPoolExecutor
-from typing import Any, List, TypeVar
+from functools import partial
+from typing import Any, Callable, List, Optional, TypeVar
 
 from ntfc.logger import logger
 
 T = TypeVar("T")
 
+# worker pool shared by all parallel calls in session
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def init_executor(workers: int) -> None:
+    """Create worker pool shared by all parallel calls.
+
+    The pool lives until shutdown_executor() is called, so the threads
+    are not created and destroyed on every parallel call.
+
+    :param workers: number of worker threads
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="ntfc-worker"
+        )
+
+
+def shutdown_executor() -> None:
+    """Shutdown worker pool shared by all parallel calls."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+        _executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get shared worker pool, create default one if not initialized."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=os.cpu_count() or 4,
+                thread_name_prefix="ntfc-worker",
+            )
+        return _executor
+
+
+def run_calls(calls: List[Callable[[], T]]) -> List[T]:
+    """Run callables in parallel using the shared worker pool.
+
+    The first callable is executed in the calling thread. While waiting for
+    results, calls not yet picked up by workers are executed in the calling
+    thread too, so nested parallel calls can't exhaust the pool.
+
+    :param calls: list of callables with no arguments
+    :return: List of results in original order
+    """
+    if len(calls) <= 1:
+        return [call() for call in calls]
+
+    executor = _get_executor()
+    futures = [executor.submit(call) for call in calls[1:]]
+
+    results = [calls[0]()]
+    for call, future in zip(calls[1:], futures):
+        if future.cancel():
+            results.append(call())
+        else:
+            results.append(future.result())
+
+    return results
+
+
+def _is_property(item: Any, attr_name: str) -> bool:
+    """Check if attribute is a property or plain attribute."""
+    attr = getattr(type(item), attr_name, None)
+    return attr is None or not callable(attr)
+
 
 def run_parallel(
     items: List[T],
@@ -37,6 +117,8 @@ def run_parallel(
     """Run a method/property on all items in parallel.
 
     Supports both methods (with args) and properties (no args).
+    Properties and plain attributes are read in the calling thread,
+    only method calls are executed in parallel.
 
     :param items: List of objects to execute on
     :param attr_name: Name of method or property to call
@@ -45,37 +127,29 @@ def run_parallel(
     :return: List of results in original order
     """
 
-    def worker(index_item: tuple[int, T]) -> tuple[int, Any]:
-        """Call method/property on item and return indexed result.
+    def worker(item: T) -> Any:
+        """Call method/property on item and return result.
 
-        :param index_item: Tuple of (index, item)
-        :return: Tuple of (index, result) for ordering preservation
+        :param item: object to execute on
+        :return: result or None on exception
         """
-        index, item = index_item
         try:
             attr = getattr(item, attr_name)
             # Handle both properties and methods
             if callable(attr):
-                result = attr(*args, **kwargs)
-            else:
-                result = attr
-            return (index, result)
+                return attr(*args, **kwargs)
+            return attr
         except Exception as e:  # pragma: no cover
             logger.error(
                 f"Exception in parallel call to {attr_name} "
                 f"for item {item}: {e}"
             )
-            return (index, None)
+            return None
 
-    # Execute all workers in parallel
-    with ThreadPoolExecutor(max_workers=len(items)) as executor:
-        indexed_items = list(enumerate(items))
-        futures = [executor.submit(worker, item) for item in indexed_items]
+    if not items:
+        return []
 
-        # Collect results in original order
-        results: List[Any] = [None] * len(items)
-        for future in futures:
-            index, result = future.result()
-            results[index] = result
+    if _is_property(items[0], attr_name):
+        return [worker(item) for item in items]
 
-    return results
+    return run_calls([partial(worker, item) for item in items])
@@ -0,0 +1,354 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Pipelined build, flash and test of products."""
+
+import copy
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Set
+
+import yaml  # type: ignore
+
+from ntfc.builder import NuttXBuilder
+from ntfc.logger import logger
+
+# core options handled by pipeline, not passed to test session
+_BUILD_OPTIONS = ("defconfig", "flash", "reboot")
+
+###############################################################################
+# Function: merge_junit
+###############################################################################
+
+
+def merge_junit(reports: Dict[str, str], path: str) -> None:
+    """Merge JUnit XML reports into one report.
+
+    Test suites are renamed after the product they come from.
+
+    :param reports: product name -> JUnit XML report path
+    :param path: path to merged report
+    """
+    root = ET.Element("testsuites")
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    duration = 0.0
+
+    for name, report in reports.items():
+        try:
+            tree = ET.parse(report)
+        except (OSError, ET.ParseError) as e:
+            logger.warning(f"skip JUnit report {report}: {e}")
+            continue
+
+        top = tree.getroot()
+        suites = [top] if top.tag == "testsuite" else top.iter("testsuite")
+        for suite in suites:
+            suite.set("name", name)
+            for key in totals:
+                totals[key] += int(suite.get(key, 0))
+            duration += float(suite.get("time", 0))
+            root.append(suite)
+
+    for key, value in totals.items():
+        root.set(key, str(value))
+    root.set("time", f"{duration:.3f}")
+
+    ET.ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
+
+
+###############################################################################
+# Class: ProductPipeline
+###############################################################################
+
+
+class ProductPipeline:
+    """Run build, flash and test for every product on its own.
+
+    Every product goes through its stages independently, so one product
+    is tested while others are still built or flashed. The global build
+    job budget is split between products. Tests of each product run in
+    a separate NTFC session (pytest can't run many sessions in one
+    process), with results in ``<resdir>/<product>``.
+    """
+
+    STATS_FILE = "pipeline.json"
+    REPORT_FILE = "report.xml"
+    LOG_FILE = "pipeline.log"
+
+    # time to wait for test session to exit after terminate
+    _TERM_TIMEOUT = 5.0
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        resdir: str,
+        rebuild: bool = False,
+        flash: bool = False,
+    ) -> None:
+        """Initialize pipeline.
+
+        :param config: YAML configuration
+        :param resdir: results directory
+        :param rebuild: rebuild images if build inputs changed
+        :param flash: flash images after build
+        """
+        if not isinstance(config, dict):
+            raise TypeError("invalid config file type")
+
+        self._cfg_values = config
+        self._resdir = resdir
+        self._rebuild = rebuild
+        self._flash = flash
+
+        # product -> stage timings and result
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        # product -> JUnit report of test session
+        self._reports: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        # running builds and test sessions, stopped on interrupt
+        self._builders: Set[NuttXBuilder] = set()
+        self._procs: Set["subprocess.Popen[bytes]"] = set()
+        self._stopping = threading.Event()
+
+    @property
+    def products(self) -> List[str]:
+        """Get products handled by pipeline."""
+        return [key for key in self._cfg_values if "product" in key]
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get stage timings and result for every product."""
+        return self._stats
+
+    def _product_config(self, product: str, jobs: int) -> Dict[str, Any]:
+        """Get configuration with a single product."""
+        conf = {
+            key: copy.deepcopy(value)
+            for key, value in self._cfg_values.items()
+            if "product" not in key or key == product
+        }
+        conf.setdefault("config", {})["build_jobs"] = jobs
+        return conf
+
+    def _test_config(self, conf: Dict[str, Any]) -> Dict[str, Any]:
+        """Get configuration for test session, with images already built."""
+        conf = copy.deepcopy(conf)
+        for key in conf:
+            if "product" in key:
+                for core in conf[key]["cores"].values():
+                    for option in _BUILD_OPTIONS:
+                        core.pop(option, None)
+        return conf
+
+    def _record(self, product: str, stage: str, start: float) -> None:
+        """Record stage duration."""
+        duration = time.monotonic() - start
+        with self._lock:
+            self._stats[product][stage] = round(duration, 3)
+        logger.info(f"pipeline {product}: {stage} done in {duration:.1f}s")
+
+    def _run_tests(self, cmd: List[str], log: str) -> int:
+        """Run test session for product.
+
+        :param cmd: command to run
+        :param log: path to log file for session output
+
+        :return: session exit code
+        """
+        with open(log, "wb") as f:
+            with self._lock:
+                if self._stopping.is_set():
+                    return 1
+                proc = subprocess.Popen(
+                    cmd, stdout=f, stderr=subprocess.STDOUT
+                )
+                self._procs.add(proc)
+
+            try:
+                return proc.wait()
+            finally:
+                with self._lock:
+                    self._procs.discard(proc)
+
+    def _stop(self) -> None:
+        """Stop running builds and test sessions."""
+        with self._lock:
+            self._stopping.set()
+            builders = list(self._builders)
+            procs = list(self._procs)
+
+        for builder in builders:
+            builder.cancel()
+
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            try:
+                proc.wait(timeout=self._TERM_TIMEOUT)
+            except subprocess.TimeoutExpired:  # pragma: no cover
+                proc.kill()
+                proc.wait()
+
+    def _product(
+        self, product: str, jobs: int, main_args: List[str], args: List[str]
+    ) -> int:
+        """Run all stages for single product."""
+        with self._lock:
+            self._stats[product] = {}
+
+        conf = self._product_config(product, jobs)
+
+        builder = NuttXBuilder(conf, self._rebuild)
+        if builder.need_build():
+            with self._lock:
+                if self._stopping.is_set():
+                    raise RuntimeError("pipeline stopped")
+                self._builders.add(builder)
+
+            try:
+                start = time.monotonic()
+                builder.build_all()
+                self._record(product, "build", start)
+
+                if self._flash:
+                    start = time.monotonic()
+                    builder.flash_all()
+                    self._record(product, "flash", start)
+            finally:
+                with self._lock:
+                    self._builders.discard(builder)
+
+            conf = builder.new_conf()
+
+        resdir = os.path.join(self._resdir, product)
+        os.makedirs(resdir, exist_ok=True)
+
+        confpath = os.path.join(resdir, "config.yaml")
+        with open(confpath, "w", encoding="utf-8") as f:
+            yaml.safe_dump(self._test_config(conf), f)
+
+        cmd = [sys.executable, "-m", "ntfc"] + main_args
+        cmd += ["test", f"--confpath={confpath}", f"--resdir={resdir}"]
+        # session writes its report to known path, stale report is removed
+        report = os.path.join(resdir, self.REPORT_FILE)
+        if os.path.exists(report):
+            os.remove(report)
+        cmd += [f"--xmlpath={report}"] + args
+
+        # boot is done by test session
+        start = time.monotonic()
+        ret = self._run_tests(cmd, os.path.join(resdir, self.LOG_FILE))
+        self._record(product, "test", start)
+
+        if os.path.isfile(report):
+            with self._lock:
+                self._reports[product] = report
+
+        if ret != 0:
+            logger.error(
+                f"pipeline {product}: tests failed, see "
+                f"{os.path.join(resdir, self.LOG_FILE)}"
+            )
+        return ret
+
+    def _product_job(
+        self, product: str, jobs: int, main_args: List[str], args: List[str]
+    ) -> int:
+        """Run product stages, failure doesn't stop other products."""
+        try:
+            ret = self._product(product, jobs, main_args, args)
+        except Exception as e:
+            logger.error(f"pipeline {product} failed: {e}")
+            ret = 1
+
+        with self._lock:
+            self._stats[product]["result"] = ret
+        return ret
+
+    def run(
+        self, args: List[str], main_args: Optional[List[str]] = None
+    ) -> int:
+        """Run pipeline for all products.
+
+        :param args: ``test`` command options passed to test sessions
+        :param main_args: global NTFC options passed to test sessions
+
+        :return: 0 if all products passed, 1 otherwise
+        """
+        products = self.products
+        if not products:
+            raise ValueError("no products in configuration")
+
+        jobs = self._cfg_values.get("config", {}).get("build_jobs")
+        budget = max(1, int(jobs or os.cpu_count() or 1))
+        share = max(1, budget // len(products))
+
+        start = time.monotonic()
+        os.makedirs(self._resdir, exist_ok=True)
+
+        executor = ThreadPoolExecutor(
+            max_workers=len(products), thread_name_prefix="ntfc-pipeline"
+        )
+        try:
+            futures = {
+                product: executor.submit(
+                    self._product_job,
+                    product,
+                    share,
+                    main_args or [],
+                    args,
+                )
+                for product in products
+            }
+            # wait in this thread, so interrupt stops all products
+            wait(futures.values())
+        except BaseException:
+            logger.warning("pipeline interrupted, stop all products")
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._stop()
+            raise
+
+        executor.shutdown()
+        results = {name: f.result() for name, f in futures.items()}
+
+        logger.info(
+            f"pipeline for {len(products)} products done in "
+            f"{time.monotonic() - start:.1f}s"
+        )
+
+        if self._reports:
+            reports = {
+                p: self._reports[p] for p in products if p in self._reports
+            }
+            merge_junit(reports, os.path.join(self._resdir, self.REPORT_FILE))
+
+        with open(
+            os.path.join(self._resdir, self.STATS_FILE), "w", encoding="utf-8"
+        ) as f:
+            json.dump(self._stats, f, indent=2)
+
+        return 0 if all(ret == 0 for ret in results.values()) else 1
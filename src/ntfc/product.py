@@ -35,6 +35,7 @@ from ntfc.productconfig import ProductConfig
 if TYPE_CHECKING:
     from ntfc.core import ProductCore
     from ntfc.device.common import CmdReturn, CmdStatus
+    from ntfc.health import HealthSnapshot
 
 
 ###############################################################################
@@ -69,6 +70,15 @@ class Product:
         """Start for all cores."""
         self._cores.start()
 
+    def stop(self) -> None:
+        """Stop all cores."""
+        self._cores.stop()
+
+    @property
+    def close_times(self) -> Dict[str, List[Dict[str, float]]]:
+        """Get stage timings of device teardowns for all cores."""
+        return self._cores.close_times
+
     @property
     def cores(self) -> List[str]:
         """List of cores."""
@@ -143,6 +153,10 @@ class Product:
         """Call for all cores."""
         return self._cores.notalive
 
+    def health(self) -> "HealthSnapshot":
+        """Get health snapshot for all cores."""
+        return self._cores.health().for_product(self._name)
+
     @property
     def cur_core(self) -> Optional[str]:
         """Call for all cores."""
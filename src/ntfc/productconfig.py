@@ -23,6 +23,7 @@
 from typing import Any, Dict
 
 from ntfc.coreconfig import CoreConfig
+from ntfc.lib.kconfig.kconfig import KconfigValue
 from ntfc.logger import logger
 
 
@@ -61,7 +62,7 @@ class ProductConfig:
             logger.error("no product name in configuration file!")
             return "unknown_name"
 
-    def kv_check(self, cfg: str, core: int = 0) -> bool:
+    def kv_check(self, cfg: str, core: int = 0) -> KconfigValue:
         """Check Kconfig option."""
         if len(self._cores) <= core:
             raise AttributeError(f"no data for core {core}")
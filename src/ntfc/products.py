@@ -20,9 +20,10 @@
 
 """Products handler class implementation."""
 
-from typing import TYPE_CHECKING, List, Optional, Union, cast
+from typing import TYPE_CHECKING, List, Optional, Set, Tuple, Union, cast
 
 from ntfc.device.common import CmdReturn, CmdStatus
+from ntfc.health import HealthSnapshot
 from ntfc.logger import logger
 from ntfc.parallel import run_parallel
 
@@ -44,6 +45,8 @@ class ProductsHandler:
     def __init__(self, products: List["Product"]):
         """Initialize all products handler."""
         self._products = products
+        # (product, core, reason) faulty in the last health snapshot
+        self._faulty: Set[Tuple[str, str, Optional[str]]] = set()
 
     def sendCommand(  # noqa: N802
         self,
@@ -148,6 +151,18 @@ class ProductsHandler:
                 return True
         return False
 
+    def health(self) -> HealthSnapshot:
+        """Get health snapshot for all products."""
+        snapshot = HealthSnapshot.merge(
+            *(product.health() for product in self._products)
+        )
+        # health is checked in every test phase, log only new faults
+        faulty = {(c.product, c.name, c.reason) for c in snapshot.faulty}
+        for product, name, reason in sorted(faulty - self._faulty, key=str):
+            logger.info(f"{reason} for {product} {name}")
+        self._faulty = faulty
+        return snapshot
+
     def reboot(self) -> bool:
         """Run reboot for all products in parallel."""
         results = run_parallel(self._products, "reboot")
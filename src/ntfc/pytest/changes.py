@@ -0,0 +1,368 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Build changes tracking and change-based test selection."""
+
+import hashlib
+import json
+import os
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+
+import pytest
+
+from ntfc.coreconfig import CoreConfig
+from ntfc.lib.kconfig.kconfig import Kconfig
+from ntfc.logger import logger
+from ntfc.pytest.history import ResultPlugin
+
+if TYPE_CHECKING:
+    from ntfc.envconfig import EnvConfig
+
+# snapshot file format version
+_VERSION = 1
+
+###############################################################################
+# Function: file_digest
+###############################################################################
+
+
+def file_digest(path: str) -> Optional[str]:
+    """Get digest of file content.
+
+    :param path: path to file
+
+    :return: file digest or None if file can't be read
+    """
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+###############################################################################
+# Class: BuildSnapshot
+###############################################################################
+
+
+class BuildSnapshot:
+    """Build configuration, symbols and test results from one run.
+
+    Snapshot is stored as JSON file in the run results directory.
+    Every core is described by its Kconfig options and digests of ELF
+    symbols, tests are identified by pytest node ID.
+    """
+
+    FILE_NAME = "build.json"
+
+    def __init__(
+        self,
+        cores: List[Dict[str, Any]],
+        tests: Optional[Dict[str, str]] = None,
+        files: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Initialize build snapshot.
+
+        :param cores: Kconfig options and symbol digests for each core
+        :param tests: test outcomes
+        :param files: test file digests
+        """
+        self._cores = cores
+        self._tests = tests or {}
+        self._files = files or {}
+
+    @classmethod
+    def from_config(cls, config: "EnvConfig") -> "BuildSnapshot":
+        """Create snapshot of the current build.
+
+        Symbol digests are cached by ELF fingerprint, so the symbol table
+        is hashed only once for every built image.
+
+        :param config: configuration instance
+
+        :return: BuildSnapshot instance
+        """
+        cores = []
+        for prod in config.product:
+            for i in range(prod.cores_num):
+                core = prod.cfg_core(i)
+                elf = core.elf
+                cores.append(
+                    {
+                        "kconfig": dict(core.kconfig),
+                        "symbols": elf.symbol_digests() if elf else {},
+                    }
+                )
+        return cls(cores)
+
+    @classmethod
+    def find(cls, path: str) -> Optional[str]:
+        """Find snapshot file.
+
+        :param path: run results directory or results directory with
+         many runs, then the latest run with snapshot is used
+
+        :return: path to snapshot file or None if not found
+        """
+        snapshot = os.path.join(path, cls.FILE_NAME)
+        if os.path.isfile(snapshot):
+            return snapshot
+
+        if not os.path.isdir(path):
+            return None
+
+        # run directories are named with timestamp
+        for run in sorted(os.listdir(path), reverse=True):
+            snapshot = os.path.join(path, run, cls.FILE_NAME)
+            if os.path.isfile(snapshot):
+                return snapshot
+        return None
+
+    @classmethod
+    def load(cls, path: str) -> "BuildSnapshot":
+        """Load snapshot from results directory.
+
+        :param path: run results directory or results directory
+
+        :return: BuildSnapshot instance
+        """
+        snapshot = cls.find(path)
+        if snapshot is None:
+            raise ValueError(f"no build snapshot in {path}")
+
+        with open(snapshot, encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("version") != _VERSION:
+            raise ValueError(
+                f"unsupported build snapshot version {data.get('version')}"
+            )
+
+        return cls(data["cores"], data["tests"], data["files"])
+
+    def save(self, path: str) -> None:
+        """Save snapshot in results directory.
+
+        :param path: run results directory
+        """
+        data = {
+            "version": _VERSION,
+            "cores": self._cores,
+            "tests": self._tests,
+            "files": self._files,
+        }
+        os.makedirs(path, exist_ok=True)
+        tmp = os.path.join(path, self.FILE_NAME + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, sort_keys=True)
+        os.replace(tmp, os.path.join(path, self.FILE_NAME))
+
+    @property
+    def cores(self) -> List[Dict[str, Any]]:
+        """Get Kconfig options and symbol digests for each core."""
+        return self._cores
+
+    @property
+    def tests(self) -> Dict[str, str]:
+        """Get test outcomes."""
+        return self._tests
+
+    @property
+    def files(self) -> Dict[str, str]:
+        """Get test file digests."""
+        return self._files
+
+    def record(
+        self, nodeid: str, outcome: str, digest: Optional[str] = None
+    ) -> None:
+        """Record test outcome.
+
+        :param nodeid: test node ID
+        :param outcome: test outcome (passed, failed or skipped)
+        :param digest: test file digest
+        """
+        # test failed in any loop is failed
+        if self._tests.get(nodeid) != "failed":
+            self._tests[nodeid] = outcome
+
+        if digest:
+            self._files[nodeid.split("::")[0]] = digest
+
+
+###############################################################################
+# Class: ChangeSet
+###############################################################################
+
+
+class ChangeSet:
+    """Changes between previous and current build.
+
+    Test is unchanged when it passed in the previous run, its file didn't
+    change and none of its ``cmd_check`` symbols and ``dep_config``
+    options changed in any core. Tests without such requirements depend
+    on unknown parts of the image, so they are never considered unchanged.
+    """
+
+    def __init__(
+        self, previous: BuildSnapshot, current: BuildSnapshot
+    ) -> None:
+        """Initialize change set.
+
+        :param previous: snapshot from the previous run
+        :param current: snapshot of the current build
+        """
+        self._previous = previous
+        self._comparable = len(previous.cores) == len(current.cores)
+        self._options: Set[str] = set()
+        self._symbols: Set[str] = set()
+        self._symbols_known = True
+        self._unchanged: Dict[str, str] = {}
+        self._digests: Dict[str, Optional[str]] = {}
+
+        for old, new in zip(previous.cores, current.cores):
+            diff = Kconfig(old["kconfig"]).diff(new["kconfig"])
+            self._options.update(diff.options)
+
+            old_sym, new_sym = old["symbols"], new["symbols"]
+            if old_sym is None or new_sym is None:
+                # digests missing in snapshot, every symbol may have changed
+                self._symbols_known = False
+                continue
+            self._symbols.update(
+                name
+                for name in old_sym.keys() | new_sym.keys()
+                if old_sym.get(name) != new_sym.get(name)
+            )
+
+        logger.info(
+            f"changed since previous run: {len(self._options)} options, "
+            f"{len(self._symbols)} symbols"
+        )
+
+    @property
+    def options(self) -> Set[str]:
+        """Get changed Kconfig options."""
+        return self._options
+
+    @property
+    def symbols(self) -> Set[str]:
+        """Get changed ELF symbols."""
+        return self._symbols
+
+    @property
+    def unchanged_tests(self) -> Dict[str, str]:
+        """Get tests found unchanged with their file digests."""
+        return self._unchanged
+
+    def digest(self, path: str) -> Optional[str]:
+        """Get test file digest.
+
+        :param path: path to test file
+        """
+        if path not in self._digests:
+            self._digests[path] = file_digest(path)
+        return self._digests[path]
+
+    def _symbol_changed(self, cmd: Any) -> bool:
+        """Check if symbol required by command changed."""
+        if not self._symbols_known:
+            return True
+        if isinstance(cmd, str):
+            return CoreConfig.cmd_symbol(cmd) in self._symbols
+        if isinstance(cmd, re.Pattern):
+            return any(cmd.search(name) for name in self._symbols)
+        return True
+
+    def unchanged(
+        self, item: pytest.Item, cmd: List[Any], dep: List[Any]
+    ) -> bool:
+        """Check if test result from the previous run is still valid.
+
+        :param item: Pytest test item object
+        :param cmd: test cmd_check requirements
+        :param dep: test dep_config requirements
+
+        :return: True if test doesn't have to run again
+        """
+        if not self._comparable or not (cmd or dep):
+            return False
+
+        if self._previous.tests.get(item.nodeid) != "passed":
+            return False
+
+        path = item.nodeid.split("::")[0]
+        digest = self.digest(str(item.path))
+        if digest is None or self._previous.files.get(path) != digest:
+            return False
+
+        if any(d in self._options for d in dep):
+            return False
+
+        if any(self._symbol_changed(c) for c in cmd):
+            return False
+
+        self._unchanged[item.nodeid] = digest
+        return True
+
+
+###############################################################################
+# Class: ChangesPlugin
+###############################################################################
+
+
+class ChangesPlugin(ResultPlugin):
+    """Pytest plugin that stores build snapshot with test results."""
+
+    def __init__(
+        self, snapshot: BuildSnapshot, changes: Optional[ChangeSet] = None
+    ) -> None:
+        """Initialize changes plugin.
+
+        :param snapshot: snapshot of the current build
+        :param changes: changes since the previous run
+        """
+        super().__init__()
+        self._snapshot = snapshot
+        self._changes = changes
+        self._rootdir = ""
+
+    def pytest_sessionstart(self, session: pytest.Session) -> None:
+        """Get pytest root directory."""
+        self._rootdir = str(session.config.rootpath)
+
+    def _record(self, nodeid: str, outcome: str, duration: float) -> None:
+        """Record test result with digest of its test file."""
+        path = os.path.join(self._rootdir, nodeid.split("::")[0])
+        self._snapshot.record(nodeid, outcome, file_digest(path))
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        """Save snapshot in run results directory."""
+        self._finish_all()
+
+        # results of not executed tests are still valid
+        if self._changes:
+            for nodeid, digest in self._changes.unchanged_tests.items():
+                self._snapshot.record(nodeid, "passed", digest)
+
+        try:
+            self._snapshot.save(pytest.result_dir)
+        except OSError as e:  # pragma: no cover
+            logger.warning(f"failed to save build snapshot: {e}")
@@ -0,0 +1,275 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Persistent cache for collected tests."""
+
+import fnmatch
+import hashlib
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from ntfc.cache import cache_key, cache_load, cache_store
+from ntfc.logger import logger
+from ntfc.pytest.collecteditem import CollectedItem
+
+# cache format version, change when cached data format changes
+_VERSION = 1
+
+# pytest default test file patterns
+_TEST_FILES = ("test_*.py", "*_test.py")
+
+###############################################################################
+# Class: CachedItem
+###############################################################################
+
+
+class CachedItem:
+    """Skipped test item restored from cache.
+
+    Provides the same attributes as pytest item that are used to report
+    skipped tests.
+    """
+
+    def __init__(self, nodeid: str, location: Tuple[Any, ...]) -> None:
+        """Initialize cached item."""
+        self.nodeid = nodeid
+        self.location = location
+
+
+###############################################################################
+# Class: CollectCache
+###############################################################################
+
+
+class CollectCache:
+    """Collection results cached for each test file.
+
+    Cache entry for a test file is valid when the file content didn't
+    change and the collection environment (configuration, ELF files, test
+    module configuration and all non-test Python files in test tree)
+    is the same as when the file was collected.
+    """
+
+    def __init__(self, testpath: str, env: Any) -> None:
+        """Initialize collection cache.
+
+        :param testpath: path to test directory or file
+        :param env: JSON serializable data that affects collection result
+        """
+        self._testpath = os.path.abspath(testpath)
+        if os.path.isdir(self._testpath):
+            self._root = self._testpath
+        else:
+            self._root = os.path.dirname(self._testpath)
+
+        self._key = cache_key(_VERSION, self._testpath)
+        self._tests: Dict[str, str] = {}
+        support: Dict[str, str] = {}
+        self._scan(support)
+        self._env = cache_key(env, support)
+
+        self._rootdir: Optional[str] = None
+        self._order: List[str] = []
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    @staticmethod
+    def _hash(path: str) -> str:
+        """Get file content hash."""
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    def _scan(self, support: Dict[str, str]) -> None:
+        """Get hashes of test files and other files in test tree."""
+        if not os.path.isdir(self._testpath):
+            paths = [self._testpath]
+        else:
+            paths = []
+            for dirpath, dirnames, filenames in os.walk(self._testpath):
+                # skip hidden directories and python cache
+                dirnames[:] = [
+                    d
+                    for d in dirnames
+                    if not d.startswith(".") and d != "__pycache__"
+                ]
+                for name in filenames:
+                    if name.endswith(".py") or name.endswith(".yaml"):
+                        paths.append(os.path.join(dirpath, name))
+
+        for path in paths:
+            rel = os.path.relpath(path, self._root)
+            name = os.path.basename(path)
+            try:
+                digest = self._hash(path)
+            except OSError:  # pragma: no cover
+                continue
+
+            if any(fnmatch.fnmatch(name, p) for p in _TEST_FILES):
+                self._tests[rel] = digest
+            else:
+                # helpers and conftest.py may affect all tests
+                support[rel] = digest
+
+    def _load(self) -> None:
+        """Load valid cache entries."""
+        data = cache_load("collect", self._key)
+        if not data or data.get("env") != self._env:
+            return
+
+        self._rootdir = data["rootdir"]
+        self._order = data["order"]
+        self._entries = {
+            rel: entry
+            for rel, entry in data["files"].items()
+            if self._tests.get(rel) == entry["hash"]
+        }
+
+    @property
+    def rootdir(self) -> Optional[str]:
+        """Get pytest root directory used when tests were cached."""
+        return self._rootdir
+
+    @property
+    def cached(self) -> List[str]:
+        """Get absolute paths of test files with valid cache entries."""
+        return [os.path.join(self._root, rel) for rel in sorted(self._entries)]
+
+    @property
+    def stale(self) -> List[str]:
+        """Get absolute paths of test files that must be collected."""
+        return [
+            os.path.join(self._root, rel)
+            for rel in sorted(self._tests)
+            if rel not in self._entries
+        ]
+
+    @property
+    def complete(self) -> bool:
+        """Check if all test files have valid cache entries."""
+        return bool(self._entries) and not self.stale
+
+    def _rel(self, path: str) -> str:
+        """Get path relative to test root."""
+        return os.path.relpath(os.path.abspath(path), self._root)
+
+    def update(
+        self,
+        rootdir: str,
+        items: List[CollectedItem],
+        skipped: List[Tuple[Any, str]],
+        allitems: List[CollectedItem],
+        files: Optional[List[str]] = None,
+    ) -> None:
+        """Update cache with collection results.
+
+        :param rootdir: pytest root directory
+        :param items: filtered items
+        :param skipped: skipped items with skip reason
+        :param allitems: all collected items
+        :param files: collected test files, all test files if None
+        """
+        if self._rootdir != rootdir:
+            # node IDs depend on root directory
+            self._entries = {}
+            self._order = []
+        self._rootdir = rootdir
+
+        if files is None:
+            collected = set(self._tests)
+        else:
+            collected = {self._rel(f) for f in files}
+
+        entries: Dict[str, Dict[str, Any]] = {
+            rel: {
+                "hash": self._tests[rel],
+                "all": [],
+                "items": [],
+                "skipped": [],
+            }
+            for rel in collected
+            if rel in self._tests
+        }
+        for ci in allitems:
+            entry = entries.get(self._rel(ci.path))
+            if entry is not None:
+                entry["all"].append(ci.to_dict())
+        for ci in items:
+            entry = entries.get(self._rel(ci.path))
+            if entry is not None:
+                entry["items"].append(ci.nodeid)
+        self._update_skipped(entries, skipped)
+        self._entries.update(entries)
+
+        if files is None:
+            self._order = [ci.nodeid for ci in items]
+
+    def _update_skipped(
+        self,
+        entries: Dict[str, Dict[str, Any]],
+        skipped: List[Tuple[Any, str]],
+    ) -> None:
+        """Add skipped items to cache entries."""
+        for item, reason in skipped:
+            entry = entries.get(self._rel(str(item.path)))
+            if entry is not None:
+                location = list(item.location)
+                entry["skipped"].append([item.nodeid, location, reason])
+
+    def save(self) -> None:
+        """Store cache."""
+        data = {
+            "env": self._env,
+            "rootdir": self._rootdir,
+            "order": self._order,
+            "files": self._entries,
+        }
+        cache_store("collect", self._key, data)
+
+    def collected(
+        self,
+    ) -> Tuple[
+        List[CollectedItem], List[Tuple[Any, str]], List[CollectedItem]
+    ]:
+        """Get collection results from cache.
+
+        :return: tuple of (filtered items, skipped items, all items)
+        """
+        allitems: List[CollectedItem] = []
+        skipped: List[Tuple[Any, str]] = []
+        byid: Dict[str, CollectedItem] = {}
+        items: List[CollectedItem] = []
+
+        # pytest collects directory entries sorted by name
+        for rel in sorted(self._entries, key=lambda r: r.split(os.sep)):
+            entry = self._entries[rel]
+            tmp = [CollectedItem.from_dict(d) for d in entry["all"]]
+            allitems.extend(tmp)
+            byid.update((ci.nodeid, ci) for ci in tmp)
+            items.extend(byid[nodeid] for nodeid in entry["items"])
+            for nodeid, location, reason in entry["skipped"]:
+                skipped.append((CachedItem(nodeid, tuple(location)), reason))
+
+        # restore order from the last full collection if nothing changed
+        rank = {nodeid: i for i, nodeid in enumerate(self._order)}
+        if all(ci.nodeid in rank for ci in items):
+            items.sort(key=lambda ci: rank[ci.nodeid])
+
+        logger.info(f"collection restored from cache ({len(allitems)} items)")
+        return items, skipped, allitems
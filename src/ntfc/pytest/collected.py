@@ -20,7 +20,7 @@
 
 """NTFC  plugin for pytest."""
 
-from typing import TYPE_CHECKING, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 if TYPE_CHECKING:
     import pytest
@@ -40,11 +40,13 @@ class Collected:
         items: List["CollectedItem"],
         skipped: List[Tuple["pytest.Item", str]],
         allitems: List["CollectedItem"],
+        stats: Optional[Dict[str, Tuple[int, int]]] = None,
     ):
         """Initialize test collected data."""
         self._items = items
         self._skipped = skipped
         self._allitems = allitems
+        self._stats = stats or {}
         self._modules = self._get_modules()
 
     def _get_modules(self) -> List[str]:
@@ -69,6 +71,11 @@ class Collected:
         """Get skipped items."""
         return self._skipped
 
+    @property
+    def stats(self) -> Dict[str, Tuple[int, int]]:
+        """Get test filter cache statistics as (hits, lookups)."""
+        return self._stats
+
     @property
     def modules(self) -> List[str]:
         """Get collected modules."""
@@ -20,6 +20,8 @@
 
 """Collected test item."""
 
+from typing import Any, Dict
+
 ###############################################################################
 # Class: CollectedItem
 ###############################################################################
@@ -46,6 +48,8 @@ class CollectedItem:
         self._path = path
         self._line = line
         self._nodeid = nodeid
+        self._modname = modname
+        self._root = root
 
         tmp = "_".join(part.capitalize() for part in root.split("/")[:-1])
         if tmp and tmp[0] != "_":
@@ -53,6 +57,24 @@ class CollectedItem:
 
         self._module2 = modname + tmp
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CollectedItem":
+        """Create collected item from dictionary."""
+        return cls(**data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get collected item as JSON serializable dictionary."""
+        return {
+            "directory": self._directory,
+            "module": self._module,
+            "name": self._name,
+            "path": self._path,
+            "line": self._line,
+            "nodeid": self._nodeid,
+            "modname": self._modname,
+            "root": self._root,
+        }
+
     def __str__(self) -> str:
         """Get collected item string representation."""
         _str = "CollectedItem: " + self.name
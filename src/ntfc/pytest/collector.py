@@ -21,11 +21,13 @@
 """NTFC collector plugin for pytest."""
 
 import os
-from typing import TYPE_CHECKING, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 import pytest
 
+from ntfc.pytest.changes import ChangeSet
 from ntfc.pytest.collecteditem import CollectedItem
+from ntfc.pytest.history import TestHistory, order_items, session_order_key
 from ntfc.testfilter import FilterTest
 
 if TYPE_CHECKING:
@@ -39,16 +41,36 @@ if TYPE_CHECKING:
 class CollectorPlugin:
     """Custom Pytest collector plugin."""
 
-    def __init__(self, config: "EnvConfig", collectonly: bool = True) -> None:
-        """Initialize custom pytest collector plugin."""
+    def __init__(
+        self,
+        config: "EnvConfig",
+        collectonly: bool = True,
+        order: str = "collect",
+        history: Optional[TestHistory] = None,
+        changes: Optional[ChangeSet] = None,
+    ) -> None:
+        """Initialize custom pytest collector plugin.
+
+        :param config: configuration instance
+        :param collectonly: don't run tests if set to True
+        :param order: test order policy
+        :param history: test history used to order tests
+        :param changes: build changes since the previous run, tests
+         not affected by changes are deselected
+        """
         self._config = config
         self._filter = FilterTest(config)
+        self._order = order
+        self._history = history
+        self._changes = changes
 
         self._all_items: List[CollectedItem] = []
         self._filtered_items: List[CollectedItem] = []
+        self._deselected_items: List[CollectedItem] = []
         self._collectonly = collectonly
 
         self._skipped_items: List[Tuple[pytest.Item, str]] = []
+        self._rootdir = ""
 
     def _collected_item(self, item: pytest.Item) -> CollectedItem:
         """Create collected item."""
@@ -77,11 +99,21 @@ class CollectorPlugin:
         """Get skipped items."""
         return self._skipped_items
 
+    @property
+    def filter_stats(self) -> Dict[str, Tuple[int, int]]:
+        """Get test filter cache statistics."""
+        return self._filter.stats
+
     @property
     def filtered(self) -> List[CollectedItem]:
         """Get filtered items."""
         return self._filtered_items
 
+    @property
+    def deselected(self) -> List[CollectedItem]:
+        """Get items deselected because they are not affected by changes."""
+        return self._deselected_items
+
     @property
     def allitems(self) -> List[CollectedItem]:
         """Get all items before filtration."""
@@ -117,8 +149,34 @@ class CollectorPlugin:
 
         return True
 
+    @property
+    def rootdir(self) -> str:
+        """Get pytest root directory."""
+        return self._rootdir
+
     def pytest_collection_finish(self, session: pytest.Session) -> None:
         """Pytest collection finish callback."""
+        self._rootdir = str(session.config.rootpath)
+
+    def _deselect_unchanged(
+        self, config: pytest.Config, items: List[pytest.Item]
+    ) -> List[pytest.Item]:
+        """Deselect tests not affected by changes since the previous run."""
+        assert self._changes
+        selected = []
+        deselected = []
+        for item in items:
+            cmd, dep, _ = self._filter.extract_test_requirements(item)
+            if self._changes.unchanged(item, cmd, dep):
+                deselected.append(item)
+            else:
+                selected.append(item)
+
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            self._deselected_items = [item._collected for item in deselected]
+
+        return selected
 
     def pytest_collection_modifyitems(
         self,
@@ -135,7 +193,7 @@ class CollectorPlugin:
         module = pytest.cfgtest.get("module", {})
         include_module = module.get("include_module", [])
         exclude_module = module.get("exclude_module", [])
-        # order_module = module.get("order", [])
+        order_module = session_order_key(module.get("order", []))
 
         for item in items:
 
@@ -172,7 +230,13 @@ class CollectorPlugin:
             self._filtered_items.append(ci)
             tmp.append(item)
 
-        # TODO: force modules order
+        # force modules order and apply order policy
+        tmp = order_items(tmp, self._order, self._history, order_module)
+        self._filtered_items = [item._collected for item in tmp]
+
+        # don't run again tests not affected by build changes
+        if self._changes:
+            tmp = self._deselect_unchanged(config, tmp)
 
         # overwrite items
         items[:] = tmp
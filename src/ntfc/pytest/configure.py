@@ -46,6 +46,17 @@ class PytestConfigPlugin:
         """
         self._config = config
         self._verbose = verbose
+        self._log_file = "pytest.debug.log"
+
+    @property
+    def log_file(self) -> str:
+        """Get pytest debug log path."""
+        return self._log_file
+
+    @log_file.setter
+    def log_file(self, path: str) -> None:
+        """Set pytest debug log path."""
+        self._log_file = path
 
     def _device_reboot(self) -> None:
         """Reboot the device if crashed."""
@@ -71,7 +82,7 @@ class PytestConfigPlugin:
         else:
             config.option.log_cli_level = "ERROR"
 
-        config.option.log_file = "pytest.debug.log"
+        config.option.log_file = self._log_file
         config.option.log_file_level = "DEBUG"
         config.option.log_file_date_format = "%Y-%m-%d %H:%M:%S"
 
@@ -107,21 +118,19 @@ class PytestConfigPlugin:
         flood_flag = False
         debug_time = 0
 
+        # one snapshot per phase, so all decisions use the same state
+        health = pytest.product.health()
+
         logger.debug(
             f"pytest_runtest_makereport: {report.outcome}"
-            f" loop {pytest.product.busyloop}  "
-            f" crash {pytest.product.crash}"
-            f" flood {pytest.product.flood}"
-            f" notalive {pytest.product.notalive}"
+            f" loop {health.busyloop}  "
+            f" crash {health.crash}"
+            f" flood {health.flood}"
+            f" notalive {health.notalive}"
         )
 
         # Check for crashes in any phase
-        if (
-            pytest.product.busyloop
-            or pytest.product.flood
-            or pytest.product.crash
-            or pytest.product.notalive
-        ):
+        if not health.ok:
             if call.when in ("setup", "call") or (  # pragma: no cover
                 call.when == "teardown"
                 and not hasattr(item, "_setup_call_failed")
@@ -131,26 +140,14 @@ class PytestConfigPlugin:
                 # Mark the report as failed due to crash
                 report.outcome = "failed"
 
-                if pytest.product.crash:
-                    reason = "crash"
-                    report.longrepr = (
-                        f'"Device crashed" detected, during: {call.when}'
-                    )
-                elif pytest.product.busyloop:
-                    reason = "busy_loop"
-                    report.longrepr = (
-                        f'"Device busy_loop" detected, during: {call.when}'
-                    )
-                elif pytest.product.flood:
-                    reason = "flood"
-                    report.longrepr = (
-                        f'"Device flood" detected, during: {call.when}'
-                    )
-                else:
-                    reason = "not_alive"
-                    report.longrepr = (
-                        f'"Device not alive" detected, during: {call.when}'
-                    )
+                reason = health.reason or reason
+                detected = {
+                    "crash": "Device crashed",
+                    "busy_loop": "Device busy_loop",
+                    "flood": "Device flood",
+                    "not_alive": "Device not alive",
+                }[reason]
+                report.longrepr = f'"{detected}" detected, during: {call.when}'
 
                 # For setup phase, we need to prevent the test from running
                 if call.when in ("setup", "call"):
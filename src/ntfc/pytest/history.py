@@ -0,0 +1,322 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Test history store and history-aware test ordering."""
+
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, TypeVar
+
+import pytest
+
+from ntfc.logger import logger
+
+# supported test order policies
+ORDER_POLICIES = ("collect", "longest", "failed")
+
+# number of durations kept for each test
+_DURATIONS_KEPT = 5
+
+# history file format version
+_VERSION = 1
+
+_T = TypeVar("_T")
+
+###############################################################################
+# Class: TestHistory
+###############################################################################
+
+
+class TestHistory:
+    """Durations and outcomes of tests from previous runs.
+
+    History is stored as JSON file, tests are identified by pytest node ID.
+    """
+
+    __test__ = False
+
+    FILE_NAME = "history.json"
+
+    def __init__(self, path: str) -> None:
+        """Initialize test history.
+
+        :param path: path to history file
+        """
+        self._path = path
+        self._runs = 0
+        self._tests: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    @property
+    def path(self) -> str:
+        """Get path to history file."""
+        return self._path
+
+    @property
+    def runs(self) -> int:
+        """Get number of recorded runs."""
+        return self._runs
+
+    def load(self) -> None:
+        """Load history from file."""
+        if not os.path.exists(self._path):
+            return
+
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"ignore broken test history {self._path}: {e}")
+            return
+
+        if data.get("version") != _VERSION:
+            logger.warning(
+                f"ignore test history version {data.get('version')}"
+            )
+            return
+
+        self._runs = data.get("runs", 0)
+        self._tests = data.get("tests", {})
+
+    def save(self) -> None:
+        """Save history to file."""
+        data = {"version": _VERSION, "runs": self._runs, "tests": self._tests}
+
+        os.makedirs(
+            os.path.dirname(os.path.abspath(self._path)), exist_ok=True
+        )
+        # write to temporary file first, so history is never left broken
+        tmp = self._path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp, self._path)
+
+    def new_run(self) -> None:
+        """Start recording a new run."""
+        self._runs += 1
+
+    def record(self, nodeid: str, outcome: str, duration: float) -> None:
+        """Record test result.
+
+        :param nodeid: test node ID
+        :param outcome: test outcome (passed, failed or skipped)
+        :param duration: test duration in seconds
+        """
+        test = self._tests.setdefault(nodeid, {"durations": []})
+        test["outcome"] = outcome
+        test["time"] = time.time()
+
+        if outcome == "failed":
+            test["failed_run"] = self._runs
+
+        # skipped tests don't say anything about test duration
+        if outcome != "skipped":
+            durations = test["durations"]
+            durations.append(round(duration, 3))
+            del durations[:-_DURATIONS_KEPT]
+
+    def duration(self, nodeid: str) -> Optional[float]:
+        """Get expected test duration.
+
+        :param nodeid: test node ID
+
+        :return: average of recent durations or None if not known
+        """
+        durations = self._tests.get(nodeid, {}).get("durations")
+        if not durations:
+            return None
+        return float(sum(durations) / len(durations))
+
+    def failed_run(self, nodeid: str) -> Optional[int]:
+        """Get the last run in which test failed.
+
+        :param nodeid: test node ID
+
+        :return: run number or None if test never failed
+        """
+        return self._tests.get(nodeid, {}).get("failed_run")
+
+
+###############################################################################
+# Function: session_order_key
+###############################################################################
+
+
+def session_order_key(order: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Get module order from session configuration.
+
+    :param order: list of {"module": name, "value": order} entries
+
+    :return: dictionary with module order values
+    """
+    ret = {}
+    for entry in order:
+        try:
+            ret[entry["module"]] = int(entry["value"])
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"invalid module order entry {entry}")
+    return ret
+
+
+###############################################################################
+# Function: order_items
+###############################################################################
+
+
+def order_items(
+    items: List[_T],
+    policy: str = "collect",
+    history: Optional[TestHistory] = None,
+    modules: Optional[Dict[str, int]] = None,
+) -> List[_T]:
+    """Order test items.
+
+    Modules order from session configuration is always forced, with
+    the same semantics as pytest-ordering: modules with non-negative values
+    run first in ascending order, then modules without order, then modules
+    with negative values (-1 is the last one). Tests with the same module
+    order are sorted according to the policy:
+
+      - collect - collection order
+      - longest - the longest tests first, tests without history first
+      - failed - tests that failed recently first
+
+    :param items: pytest items or collected items
+    :param policy: order policy
+    :param history: test history
+    :param modules: module order values
+
+    :return: ordered list of items
+    """
+    if policy not in ORDER_POLICIES:
+        raise ValueError(f"unsupported test order {policy}")
+
+    modules = modules or {}
+
+    def module_key(item: Any) -> Any:
+        # pytest items have collected data attached
+        collected = getattr(item, "_collected", item)
+        name = getattr(collected, "module2", None)
+        value = modules.get(name) if name else None
+        if value is None:
+            return (1, 0)
+        if value >= 0:
+            return (0, value)
+        return (2, value)
+
+    def policy_key(item: Any) -> Any:
+        if policy == "longest" and history:
+            duration = history.duration(item.nodeid)
+            return -float("inf") if duration is None else -duration
+        if policy == "failed" and history:
+            run = history.failed_run(item.nodeid)
+            return 1 if run is None else -run
+        return 0
+
+    # sort is stable, so collection order is kept for equal keys
+    return sorted(items, key=lambda i: (module_key(i), policy_key(i)))
+
+
+###############################################################################
+# Class: ResultPlugin
+###############################################################################
+
+
+class ResultPlugin:
+    """Base for pytest plugins that record results of finished tests.
+
+    Results of all test phases are accumulated and recorded once, when
+    the test teardown is reported.
+    """
+
+    def __init__(self) -> None:
+        """Initialize result plugin."""
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        """Accumulate test phases results."""
+        test = self._pending.setdefault(
+            report.nodeid, {"outcome": "passed", "duration": 0.0}
+        )
+        test["duration"] += getattr(report, "duration", 0.0)
+
+        if report.failed:
+            test["outcome"] = "failed"
+        elif report.skipped and test["outcome"] == "passed":
+            test["outcome"] = "skipped"
+
+        # teardown report is generated even if setup failed
+        if report.when == "teardown":
+            self._finish(report.nodeid)
+
+    def _finish(self, nodeid: str) -> None:
+        """Record finished test."""
+        test = self._pending.pop(nodeid, None)
+        if test:
+            self._record(nodeid, test["outcome"], test["duration"])
+
+    def _finish_all(self) -> None:
+        """Record tests without teardown report."""
+        for nodeid in list(self._pending):
+            self._finish(nodeid)
+
+    def _record(self, nodeid: str, outcome: str, duration: float) -> None:
+        """Record test result.
+
+        :param nodeid: test node ID
+        :param outcome: test outcome (passed, failed or skipped)
+        :param duration: test duration in seconds
+        """
+        raise NotImplementedError  # pragma: no cover
+
+
+###############################################################################
+# Class: HistoryPlugin
+###############################################################################
+
+
+class HistoryPlugin(ResultPlugin):
+    """Pytest plugin that records test results in history."""
+
+    def __init__(self, history: TestHistory) -> None:
+        """Initialize history plugin.
+
+        :param history: test history
+        """
+        super().__init__()
+        self._history = history
+
+    def pytest_sessionstart(self, session: pytest.Session) -> None:
+        """Start a new run in history."""
+        self._history.new_run()
+
+    def _record(self, nodeid: str, outcome: str, duration: float) -> None:
+        """Record test result in history."""
+        self._history.record(nodeid, outcome, duration)
+
+    def pytest_sessionfinish(self, session: pytest.Session) -> None:
+        """Save history."""
+        self._finish_all()
+
+        try:
+            self._history.save()
+        except OSError as e:  # pragma: no cover
+            logger.warning(f"failed to save test history: {e}")
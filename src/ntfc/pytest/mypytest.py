@@ -20,25 +20,43 @@
 
 """NTFC plugin for pytest."""
 
+import hashlib
 import importlib.util
+import json
 import os
+import shutil
 import sys
+import tempfile
+import time
 from datetime import datetime
+from multiprocessing.connection import Connection
 from typing import Any, Dict, List, Optional, Tuple
 
 import pytest
 import yaml  # type: ignore
 from pluggy import HookimplMarker
 
+from ntfc import __version__
 from ntfc.envconfig import EnvConfig
 from ntfc.logger import logger
+from ntfc.metrics import metrics
+from ntfc.parallel import init_executor, run_calls, shutdown_executor
 from ntfc.product import Product
 from ntfc.products import ProductsHandler
 
+from .changes import BuildSnapshot, ChangeSet, ChangesPlugin
+from .collectcache import CollectCache
 from .collected import Collected
 from .collector import CollectorPlugin
 from .configure import PytestConfigPlugin
+from .history import (
+    HistoryPlugin,
+    TestHistory,
+    order_items,
+    session_order_key,
+)
 from .runner import RunnerPlugin
+from .workers import WORKER_DEVICES, SchedulerPlugin, WorkerPlugin
 
 # required for plugin
 hookimpl = HookimplMarker("pytest")
@@ -53,6 +71,8 @@ class MyPytest:
     """Custom wrapper for pytest."""
 
     NTFC_YAML_FILE = "ntfc.yaml"
+    TEARDOWN_FILE = "teardown.json"
+    BUILD_STATS_FILE = "build-stats.json"
 
     def __init__(
         self,
@@ -60,18 +80,23 @@ class MyPytest:
         exit_on_fail: bool = False,
         verbose: bool = False,
         confjson: Optional[Dict[str, Any]] = None,
+        build_stats: Optional[Dict[str, Any]] = None,
     ) -> None:
         """Initialize pytest wrapper.
 
         :param config: configuration instance
         :param exit_on_fail: exit on first test fail if set to True
         :param verbose: verbose output if set to True
+        :param build_stats: statistics of builds done before tests
         """
         self._config = EnvConfig(config)
+        self._config_raw = config
+        self._verbose = verbose
         self._opt: List[str] = []
         self._plugins: List[Any] = []
         self._cfg_module: Dict[str, Any] = {}
         self._cfg_test: Dict[str, Any] = {}
+        self._build_stats = build_stats or {}
 
         if exit_on_fail:
             self._opt.append("-x")
@@ -223,71 +248,401 @@ class MyPytest:
             # finish product initialization
             product.init()
 
+    def _device_stop(self, nologs: bool) -> None:
+        """Stop devices of all products in parallel.
+
+        :param nologs: don't store teardown timings if set to True
+        """
+        products: List[Product] = pytest.products
+        start = time.monotonic()
+        run_calls([product.stop for product in products])
+        logger.info(f"devices stopped in {time.monotonic() - start:.2f}s")
+
+        result_dir = getattr(pytest, "result_dir", None)
+        if nologs or not result_dir:
+            return
+
+        times = {product.name: product.close_times for product in products}
+        path = os.path.join(result_dir, self.TEARDOWN_FILE)
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(times, f, indent=2)
+        except OSError as e:  # pragma: no cover
+            logger.warning(f"can't store teardown timings: {e}")
+
+    def _metrics_save(self, nologs: bool) -> None:
+        """Store device command metrics.
+
+        :param nologs: don't store metrics if set to True
+        """
+        result_dir = getattr(pytest, "result_dir", None)
+        if nologs or not result_dir:
+            return
+
+        path = os.path.join(result_dir, metrics.FILE_NAME)
+        try:
+            metrics.save(path)
+        except OSError as e:  # pragma: no cover
+            logger.warning(f"can't store command metrics: {e}")
+
+    def _build_stats_save(self) -> None:
+        """Store statistics of builds done before tests."""
+        if not self._build_stats:
+            return
+
+        path = os.path.join(pytest.result_dir, self.BUILD_STATS_FILE)
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self._build_stats, f, indent=1, sort_keys=True)
+        except OSError as e:  # pragma: no cover
+            logger.warning(f"can't store build statistics: {e}")
+
+    def _timeout_opts(self) -> List[str]:
+        """Get pytest options for timeouts."""
+        timeout = self._config.common.get("timeout", 800)
+        timeout_session = self._config.common.get("timeout_session", 3600)
+        return [
+            "--timeout=" + str(timeout),
+            "--session-timeout=" + str(timeout_session),
+        ]
+
+    def _result_opts(self, result: Dict[str, Any]) -> List[str]:
+        """Create result directory and get pytest options for reports."""
+        opt = []
+
+        # create result directory
+        result_dir = result.get("resdir", "./result")
+        time_now = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        pytest.result_dir = os.path.join(result_dir, time_now)
+        os.makedirs(pytest.result_dir, exist_ok=True)
+        self._build_stats_save()
+
+        # additional reports
+        if result.get("html"):
+            path = os.path.join(pytest.result_dir, "report.html")
+            opt.append(f"--html={path}")
+        xmlpath = result.get("xmlpath")
+        if result.get("xml") or xmlpath:
+            path = xmlpath or os.path.join(pytest.result_dir, "report.xml")
+            opt.append(f"--junitxml={path}")
+        if result.get("json"):
+            path = os.path.join(pytest.result_dir, "report.json")
+            opt.append(f"--json={path}")
+
+        return opt
+
+    def _history(self, result: Dict[str, Any]) -> TestHistory:
+        """Get test history stored in results directory."""
+        result_dir = result.get("resdir", "./result")
+        return TestHistory(os.path.join(result_dir, TestHistory.FILE_NAME))
+
+    def _build_changes(
+        self, changed_since: Optional[str], nologs: bool
+    ) -> Tuple[Optional[ChangeSet], List[Any]]:
+        """Get build changes since the previous run.
+
+        :param changed_since: results directory of the previous run
+        :param nologs: don't store build snapshot if set to True
+
+        :return: tuple of (build changes, plugins to run)
+        """
+        if nologs and not changed_since:
+            return None, []
+
+        snapshot = BuildSnapshot.from_config(self._config)
+
+        changes = None
+        if changed_since:
+            try:
+                previous = BuildSnapshot.load(changed_since)
+                changes = ChangeSet(previous, snapshot)
+            except (OSError, ValueError) as e:
+                logger.warning(f"run all tests: {e}")
+
+        plugins = [] if nologs else [ChangesPlugin(snapshot, changes)]
+        return changes, plugins
+
+    def _executor_init(self) -> None:
+        """Initialize worker pool for parallel calls to all cores."""
+        products: List[Product] = pytest.products
+        init_executor(len(products) + sum(p.conf.cores_num for p in products))
+
     def runner(
-        self, testpath: str, result: Dict[str, Any], nologs: bool = False
+        self,
+        testpath: str,
+        result: Dict[str, Any],
+        nologs: bool = False,
+        workers: int = 1,
+        order: str = "collect",
+        changed_since: Optional[str] = None,
     ) -> Any:
         """Run tests.
 
         :param testpath: path to test directory
         :param result: result output configuration
+        :param nologs: don't store test results if set to True
+        :param workers: number of device instances that run tests
+         in parallel
+        :param order: test order policy
+        :param changed_since: results directory of the previous run, tests
+         that passed and are not affected by build changes are deselected
         """
+        history = self._history(result)
+        plugins: List[Any] = [] if nologs else [HistoryPlugin(history)]
+
+        changes, changes_plugins = self._build_changes(changed_since, nologs)
+        plugins.extend(changes_plugins)
+
+        if workers > 1:
+            return self._runner_workers(
+                testpath,
+                result,
+                nologs,
+                workers,
+                order,
+                history,
+                plugins,
+                changes,
+            )
+
         # initialzie pytest env
         self._init_pytest(testpath)
 
         opt = [testpath]
 
         # configure timeouts
-        timeout = self._config.common.get("timeout", 800)
-        timeout_session = self._config.common.get("timeout_session", 3600)
-        opt.append("--timeout=" + str(timeout))
-        opt.append("--session-timeout=" + str(timeout_session))
+        opt.extend(self._timeout_opts())
 
         if not nologs:  # pragma: no cover
-            # create result directory
-            result_dir = result.get("resdir", "./result")
-            time_now = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            pytest.result_dir = os.path.join(result_dir, time_now)
-            os.makedirs(pytest.result_dir, exist_ok=True)
-
-            # additional reports
-            if result.get("html"):
-                path = os.path.join(pytest.result_dir, "report.html")
-                opt.append(f"--html={path}")
-            if result.get("xml"):
-                path = os.path.join(pytest.result_dir, "report.xml")
-                opt.append(f"--junitxml={path}")
-            if result.get("json"):
-                path = os.path.join(pytest.result_dir, "report.json")
-                opt.append(f"--json={path}")
+            opt.extend(self._result_opts(result))
 
         # collector plugin
-        collector = CollectorPlugin(self._config, False)
+        collector = CollectorPlugin(
+            self._config, False, order, history, changes
+        )
 
         # run pytest with our custom test plugin
         runner = RunnerPlugin(nologs)
 
-        # start device before test start
-        self._device_start()
+        # worker pool for parallel calls to all products and their cores
+        self._executor_init()
+        metrics.reset()
 
-        return self._run(opt, [runner, collector])
+        try:
+            # start device before test start
+            self._device_start()
 
-    def collect(self, testpath: str) -> "Collected":
-        """Collect tests.
+            return self._run(opt, [runner, collector] + plugins)
+        finally:
+            self._device_stop(nologs)
+            self._metrics_save(nologs)
+            shutdown_executor()
 
-        :param testpath:
+    def _runner_workers(
+        self,
+        testpath: str,
+        result: Dict[str, Any],
+        nologs: bool,
+        workers: int,
+        order: str,
+        history: TestHistory,
+        plugins: List[Any],
+        changes: Optional[ChangeSet] = None,
+    ) -> Any:
+        """Run tests on many device instances.
+
+        Devices are started by worker processes, this session only
+        dispatches tests and collects results.
         """
+        for prod in self._config.product:
+            for core in range(prod.cores_num):
+                device = prod.cfg_core(core).device
+                if device not in WORKER_DEVICES:
+                    raise ValueError(
+                        f"device {device} can't be used with many workers"
+                    )
+
+        testpath = os.path.abspath(testpath)
+
         # initialzie pytest env
         self._init_pytest(testpath)
 
+        opt = [testpath]
+
+        opt.extend(self._timeout_opts())
+
+        if not nologs:
+            opt.extend(self._result_opts(result))
+            workers_dir = pytest.result_dir
+        else:
+            workers_dir = tempfile.mkdtemp(prefix="ntfc-workers-")
+
+        init = {
+            "config": self._config_raw,
+            "confjson": self._cfg_test,
+            "verbose": self._verbose,
+            "testpath": testpath,
+            "nologs": nologs,
+        }
+        scheduler = SchedulerPlugin(
+            workers,
+            init,
+            workers_dir,
+            self._config.common.get("loops", 1),
+        )
+
+        # collector plugin, tests are dispatched in collection order
+        collector = CollectorPlugin(
+            self._config, False, order, history, changes
+        )
+
+        # fixtures must be available for collection
+        runner = RunnerPlugin(True)
+
+        try:
+            return self._run(opt, [scheduler, runner, collector] + plugins)
+        finally:
+            if nologs:
+                shutil.rmtree(workers_dir, ignore_errors=True)
+
+    def worker(self, init: Dict[str, Any], conn: Connection) -> Any:
+        """Run tests dispatched by scheduler.
+
+        :param init: worker session configuration
+        :param conn: connection to scheduler
+        """
+        # initialzie pytest env
+        self._init_pytest(init["testpath"])
+        pytest.result_dir = init["result_dir"]
+        self._ptconfig.log_file = os.path.join(
+            init["result_dir"], "pytest.debug.log"
+        )
+
+        opt = [init["testpath"], f"--rootdir={init['rootdir']}"]
+        opt.extend(["-p", "no:cacheprovider"])
+        opt.extend(self._timeout_opts())
+
+        # collector plugin used only to filter tests
+        collector = CollectorPlugin(self._config, True)
+
+        # run pytest with our custom test plugin
+        runner = RunnerPlugin(init["nologs"])
+
+        self._executor_init()
+        metrics.reset()
+
+        try:
+            # start device before test start
+            self._device_start()
+
+            return self._run(opt, [WorkerPlugin(conn), runner, collector])
+        finally:
+            self._device_stop(init["nologs"])
+            self._metrics_save(init["nologs"])
+            shutdown_executor()
+
+    def _collect_env(self) -> Dict[str, Any]:
+        """Get data that affects collection result."""
+        cores = []
+        for prod in self._config.product:
+            for i in range(prod.cores_num):
+                core = prod.cfg_core(i)
+                conf_path = prod.core(i).get("conf_path")
+                conf = None
+                if conf_path and os.path.exists(conf_path):
+                    with open(conf_path, "rb") as f:
+                        conf = hashlib.sha1(f.read()).hexdigest()
+                elf = core.elf.fingerprint() if core.elf else None
+                cores.append({"conf": conf, "elf": elf})
+
+        return {
+            "version": __version__,
+            "config": self._config.config,
+            "ntfcyaml": self._cfg_module,
+            "session": self._cfg_test,
+            "cores": cores,
+        }
+
+    def _collect_cache(self, testpath: str) -> CollectCache:
+        """Get collection cache for test path."""
+        return CollectCache(testpath, self._collect_env())
+
+    def _collect_files(
+        self,
+        testpath: str,
+        files: Optional[List[str]],
+        rootdir: Optional[str],
+    ) -> Tuple[CollectorPlugin, bool]:
+        """Run pytest collection.
+
+        :param testpath: path to test directory
+        :param files: collect only these files if not None
+        :param rootdir: pytest root directory for files collection
+
+        :return: tuple of (collector plugin, collection succeeded)
+        """
+        opt = [testpath]
+        if files:
+            opt = files + [f"--rootdir={rootdir}"]
+
         # collector plugin
         collector = CollectorPlugin(self._config, True)
 
         # run pytest with our custom collector plugin
-        self._run([testpath], [collector])
+        ret = self._run(opt, [collector])
+        ok = ret in (pytest.ExitCode.OK, pytest.ExitCode.NO_TESTS_COLLECTED)
+        return collector, ok
 
-        collected = Collected(
-            collector.filtered, collector.skipped_items, collector.allitems
-        )
+    def collect(self, testpath: str) -> "Collected":
+        """Collect tests.
+
+        Test files that didn't change since the last collection are not
+        collected again, results are restored from collection cache.
+
+        :param testpath:
+        """
+        # initialzie pytest env
+        self._init_pytest(testpath)
+
+        cache = self._collect_cache(testpath)
+        stats: Dict[str, Tuple[int, int]] = {}
+
+        if not cache.complete:
+            # collect only changed files if possible
+            files = cache.stale if cache.cached and cache.rootdir else None
+            collector, ok = self._collect_files(testpath, files, cache.rootdir)
+            if files and not ok:
+                # report collection errors for the whole tree
+                files = None
+                collector, ok = self._collect_files(testpath, None, None)
+
+            if ok:
+                cache.update(
+                    collector.rootdir,
+                    collector.filtered,
+                    collector.skipped_items,
+                    collector.allitems,
+                    files,
+                )
+                cache.save()
+
+            if not files:
+                # full collection, return result as it is
+                return Collected(
+                    collector.filtered,
+                    collector.skipped_items,
+                    collector.allitems,
+                    collector.filter_stats,
+                )
+
+            stats = collector.filter_stats
+
+        items, skipped, allitems = cache.collected()
+
+        # force modules order for items restored from cache
+        module = self._cfg_test.get("module", {})
+        modules = session_order_key(module.get("order", []))
+        items = order_items(items, modules=modules)
 
         # return result
-        return collected
+        return Collected(items, skipped, allitems, stats)
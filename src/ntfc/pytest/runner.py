@@ -25,6 +25,8 @@ from typing import Any, Dict
 
 import pytest
 
+from ntfc.metrics import metrics
+
 ###############################################################################
 # Class: RunnerPlugin
 ###############################################################################
@@ -51,6 +53,10 @@ class RunnerPlugin:
                 # close files
                 self._logs[product.name][core]["console"].close()
 
+    def _metrics_teardown(self) -> None:
+        """Stop attributing command metrics to test."""
+        metrics.test = ""
+
     def _collect_device_logs(self, request: Any) -> None:
         """Initiate device log writing into a new test file."""
         if self._nologs:
@@ -92,6 +98,24 @@ class RunnerPlugin:
         self._collect_device_logs(request)
         # register log collector teardown
         request.addfinalizer(self._collect_device_logs_teardown)
+        # attribute device command metrics to this test
+        metrics.test = request.node.nodeid
+        request.addfinalizer(self._metrics_teardown)
+
+    def pytest_terminal_summary(self, terminalreporter: Any) -> None:
+        """Show the slowest device commands."""
+        lines = metrics.summary()
+        if not lines:
+            return
+
+        terminalreporter.write_sep("=", "slowest device commands")
+        for line in lines:
+            terminalreporter.write_line(line)
+
+    @pytest.fixture  # type: ignore
+    def product(self) -> Any:
+        """Get products under test bound to this session."""
+        return pytest.product
 
     @pytest.fixture  # type: ignore
     def switch_to_core(self) -> None:
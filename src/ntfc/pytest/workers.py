@@ -0,0 +1,376 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+"""Parallel test execution on many device instances."""
+
+import copy
+import os
+import socket
+import subprocess
+import sys
+from collections import deque
+from multiprocessing.connection import Connection, wait
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import pytest
+
+from ntfc.logger import logger
+
+# devices that can be started many times on the same host
+WORKER_DEVICES = ("sim", "qemu")
+
+###############################################################################
+# Class: _Worker
+###############################################################################
+
+
+class _Worker:
+    """Worker process handle."""
+
+    def __init__(
+        self, index: int, proc: "subprocess.Popen[bytes]", conn: Connection
+    ) -> None:
+        """Initialize worker handle."""
+        self.index = index
+        self.proc = proc
+        self.conn = conn
+        # tests sent to worker and not finished yet
+        self.assigned: List[str] = []
+        # test being executed now
+        self.running: Optional[Tuple[str, Any]] = None
+
+
+###############################################################################
+# Class: SchedulerPlugin
+###############################################################################
+
+
+class SchedulerPlugin:
+    """Pytest plugin that dispatches tests to worker processes.
+
+    Every worker runs its own pytest session with its own products started,
+    test reports are sent back and replayed in this session, so terminal
+    output and JUnit/HTML reports are generated as for a single session.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        init: Dict[str, Any],
+        result_dir: str,
+        loops: int = 1,
+    ) -> None:
+        """Initialize scheduler plugin.
+
+        :param workers: number of worker processes
+        :param init: worker session configuration
+        :param result_dir: directory where worker directories are created
+        :param loops: how many times all tests are run
+        """
+        self._workers_num = workers
+        self._init = init
+        self._result_dir = result_dir
+        self._loops = loops
+        self._queue: Deque[str] = deque()
+        self._items: Dict[str, pytest.Item] = {}
+        self._workers: List[_Worker] = []
+
+    @staticmethod
+    def _resolve_paths(core: Dict[str, Any]) -> None:
+        """Make device image and executable paths absolute.
+
+        :param core: core configuration
+        """
+        elf_path = core.get("elf_path")
+        if elf_path:
+            core["elf_path"] = os.path.abspath(elf_path)
+
+        # executable without directory is looked up in PATH
+        exec_path = core.get("exec_path")
+        if exec_path and os.sep in exec_path:
+            core["exec_path"] = os.path.abspath(exec_path)
+
+    def _spawn(self, index: int, rootdir: str) -> _Worker:
+        """Start worker process."""
+        workdir = os.path.join(self._result_dir, f"worker{index}")
+        os.makedirs(workdir, exist_ok=True)
+
+        parent, child = socket.socketpair()
+        with open(os.path.join(workdir, "worker.log"), "wb") as log:
+            proc = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "ntfc.pytest.workers",
+                    str(child.fileno()),
+                ],
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                pass_fds=(child.fileno(),),
+            )
+        child.close()
+
+        # host devices are started in worker directory, so paths relative
+        # to the scheduler working directory must be resolved first
+        init = copy.deepcopy(self._init)
+        for key, product in init["config"].items():
+            if "product" in key:
+                for core in product.get("cores", {}).values():
+                    self._resolve_paths(core)
+                    core["cwd"] = workdir
+
+        init["index"] = index
+        init["rootdir"] = rootdir
+        init["result_dir"] = workdir
+
+        conn = Connection(parent.detach())
+        conn.send(init)
+
+        logger.info(f"worker {index} started, pid {proc.pid}")
+        return _Worker(index, proc, conn)
+
+    def _fail(
+        self, session: pytest.Session, nodeid: str, location: Any, msg: str
+    ) -> None:
+        """Report test failure that happened outside of worker session."""
+        hook = session.config.hook
+        if location is None:
+            item = self._items.get(nodeid)
+            location = item.location if item else (nodeid, None, nodeid)
+            hook.pytest_runtest_logstart(nodeid=nodeid, location=location)
+
+        report = pytest.TestReport(nodeid, location, {}, "failed", msg, "call")
+        hook.pytest_runtest_logreport(report=report)
+        hook.pytest_runtest_logfinish(nodeid=nodeid, location=location)
+
+    def _dispatch(self, session: pytest.Session, worker: _Worker) -> None:
+        """Send next test to worker or stop it if nothing left."""
+        if self._queue and not (session.shouldfail or session.shouldstop):
+            nodeid = self._queue.popleft()
+            worker.assigned.append(nodeid)
+            worker.conn.send(nodeid)
+        else:
+            worker.conn.send(None)
+
+    def _handle(  # noqa: C901
+        self, session: pytest.Session, worker: _Worker, msg: Tuple[Any, ...]
+    ) -> None:
+        """Handle message from worker."""
+        hook = session.config.hook
+        kind = msg[0]
+
+        if kind == "ready":
+            self._dispatch(session, worker)
+
+        elif kind == "logstart":
+            _, nodeid, location = msg
+            worker.running = (nodeid, location)
+            hook.pytest_runtest_logstart(nodeid=nodeid, location=location)
+
+        elif kind == "report":
+            report = hook.pytest_report_from_serializable(
+                config=session.config, data=msg[1]
+            )
+            hook.pytest_runtest_logreport(report=report)
+
+        elif kind == "logfinish":
+            _, nodeid, location = msg
+            worker.running = None
+            if nodeid in worker.assigned:
+                worker.assigned.remove(nodeid)
+            hook.pytest_runtest_logfinish(nodeid=nodeid, location=location)
+
+        elif kind == "missing":  # pragma: no cover
+            nodeid = msg[1]
+            worker.assigned.remove(nodeid)
+            self._fail(
+                session,
+                nodeid,
+                None,
+                f"test not collected by worker {worker.index}",
+            )
+
+    def _worker_lost(self, session: pytest.Session, worker: _Worker) -> None:
+        """Handle worker that exited."""
+        ret = worker.proc.wait()
+        if worker.assigned:
+            logger.error(f"worker {worker.index} exited with code {ret}")
+        else:
+            logger.info(f"worker {worker.index} exited with code {ret}")
+
+        if worker.running:
+            nodeid, location = worker.running
+            worker.assigned.remove(nodeid)
+            self._fail(
+                session,
+                nodeid,
+                location,
+                f"worker {worker.index} exited with code {ret}",
+            )
+
+        # tests not started yet are run by other workers
+        self._queue.extendleft(reversed(worker.assigned))
+        worker.assigned.clear()
+
+    def _serve(self, session: pytest.Session) -> None:
+        """Handle messages from workers until all of them exit."""
+        alive: Dict[Any, _Worker] = {w.conn: w for w in self._workers}
+        while alive:
+            for conn in wait(list(alive.keys())):
+                worker = alive[conn]
+                try:
+                    msg = worker.conn.recv()
+                except (EOFError, OSError):
+                    del alive[conn]
+                    worker.conn.close()
+                    self._worker_lost(session, worker)
+                    continue
+
+                self._handle(session, worker, msg)
+
+    @pytest.hookimpl(tryfirst=True)  # type: ignore
+    def pytest_runtestloop(self, session: pytest.Session) -> bool:
+        """Run tests on worker processes."""
+        if session.testsfailed:  # pragma: no cover
+            raise session.Interrupted("error during collection")
+
+        if session.config.option.collectonly:  # pragma: no cover
+            return True
+
+        self._items = {item.nodeid: item for item in session.items}
+        for _ in range(self._loops):
+            self._queue.extend(item.nodeid for item in session.items)
+
+        workers = min(self._workers_num, len(self._queue))
+        rootdir = str(session.config.rootpath)
+        self._workers = [self._spawn(i, rootdir) for i in range(workers)]
+
+        self._serve(session)
+
+        # no workers left to run these tests
+        while self._queue:  # pragma: no cover
+            nodeid = self._queue.popleft()
+            self._fail(session, nodeid, None, "no worker available")
+
+        if session.shouldfail:  # pragma: no cover
+            raise session.Failed(session.shouldfail)
+        if session.shouldstop:  # pragma: no cover
+            raise session.Interrupted(session.shouldstop)
+
+        return True
+
+
+###############################################################################
+# Class: WorkerPlugin
+###############################################################################
+
+
+class WorkerPlugin:
+    """Pytest plugin that runs tests received from scheduler."""
+
+    def __init__(self, conn: Connection) -> None:
+        """Initialize worker plugin.
+
+        :param conn: connection to scheduler
+        """
+        self._conn = conn
+        self._config: Optional[pytest.Config] = None
+
+    def _next(self, items: Dict[str, pytest.Item]) -> Optional[pytest.Item]:
+        """Get next test to run from scheduler."""
+        while True:
+            self._conn.send(("ready",))
+            nodeid = self._conn.recv()
+            if nodeid is None:
+                return None
+
+            item = items.get(nodeid)
+            if item is not None:
+                return item
+
+            self._conn.send(("missing", nodeid))  # pragma: no cover
+
+    def pytest_configure(self, config: pytest.Config) -> None:
+        """Store pytest config."""
+        self._config = config
+
+    @pytest.hookimpl(tryfirst=True)  # type: ignore
+    def pytest_runtestloop(self, session: pytest.Session) -> bool:
+        """Run tests received from scheduler."""
+        if session.testsfailed:  # pragma: no cover
+            raise session.Interrupted("error during collection")
+
+        items = {item.nodeid: item for item in session.items}
+
+        # get the next test in advance, so fixtures shared with the next
+        # test are not torn down
+        item = self._next(items)
+        while item is not None:
+            nextitem = self._next(items)
+            item.config.hook.pytest_runtest_protocol(
+                item=item, nextitem=nextitem
+            )
+            item = nextitem
+
+        return True
+
+    def pytest_runtest_logstart(self, nodeid: str, location: Any) -> None:
+        """Send test start to scheduler."""
+        self._conn.send(("logstart", nodeid, location))
+
+    def pytest_runtest_logreport(self, report: pytest.TestReport) -> None:
+        """Send test report to scheduler."""
+        assert self._config is not None
+        data = self._config.hook.pytest_report_to_serializable(
+            config=self._config, report=report
+        )
+        self._conn.send(("report", data))
+
+    def pytest_runtest_logfinish(self, nodeid: str, location: Any) -> None:
+        """Send test finish to scheduler."""
+        self._conn.send(("logfinish", nodeid, location))
+
+
+###############################################################################
+# Function: worker_main
+###############################################################################
+
+
+def worker_main(fd: int) -> int:
+    """Run worker session.
+
+    :param fd: descriptor of connection to scheduler
+
+    :return: pytest exit code
+    """
+    # import here to avoid circular import
+    from ntfc.pytest.mypytest import MyPytest
+
+    conn = Connection(fd)
+    init = conn.recv()
+
+    pt = MyPytest(
+        init["config"], verbose=init["verbose"], confjson=init["confjson"]
+    )
+    return int(pt.worker(init, conn))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(worker_main(int(sys.argv[1])))
@@ -20,13 +20,15 @@
 
 """Test cases filter."""
 
-from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, TypeVar
 
 from ntfc.logger import logger
 
 if TYPE_CHECKING:
     import pytest
 
+# cached value type
+_V = TypeVar("_V")
 
 ###############################################################################
 # Class: FilterTest
@@ -34,11 +36,75 @@ if TYPE_CHECKING:
 
 
 class FilterTest:
-    """This class implements test filtration depending on the configuration."""
+    """This class implements test filtration depending on the configuration.
+
+    Requirement checks are memoized, so the same Kconfig option or ELF
+    symbol is checked only once per session. Items with the same set of
+    requirements (i.e. parametrized tests) share one support decision.
+    Requirements are always checked for the first product and core, so
+    the caches are global and keyed by requirement only.
+    """
 
     def __init__(self, config: Any) -> None:
         """Initialize test filter."""
         self._config = config
+        self._requirements: Dict[Tuple[Any, ...], bool] = {}
+        self._groups: Dict[Tuple[Any, ...], Tuple[bool, Optional[str]]] = {}
+        # cache name -> [hits, lookups]
+        self._stats: Dict[str, List[int]] = {
+            "requirements": [0, 0],
+            "groups": [0, 0],
+        }
+
+    @property
+    def stats(self) -> Dict[str, Tuple[int, int]]:
+        """Get cache statistics as (hits, lookups) for each cache."""
+        return {k: (v[0], v[1]) for k, v in self._stats.items()}
+
+    def clear_cache(self) -> None:
+        """Clear requirements cache, i.e. when configuration changed."""
+        self._requirements.clear()
+        self._groups.clear()
+
+    def _lookup(
+        self, cache: Dict[Tuple[Any, ...], _V], name: str, key: Tuple[Any, ...]
+    ) -> Optional[_V]:
+        """Get cached value or None if not found."""
+        stats = self._stats[name]
+        stats[1] += 1
+        try:
+            ret = cache.get(key)
+        except TypeError:  # pragma: no cover
+            # unhashable marker argument, can't be cached
+            return None
+        if ret is not None:
+            stats[0] += 1
+        return ret
+
+    def _store(
+        self, cache: Dict[Tuple[Any, ...], _V], key: Tuple[Any, ...], value: _V
+    ) -> None:
+        """Store value in cache."""
+        try:
+            cache[key] = value
+        except TypeError:  # pragma: no cover
+            pass
+
+    def _check(self, kind: str, requirement: Any) -> bool:
+        """Check a single requirement with cache.
+
+        :param kind: requirement kind (kv, cmd or extra)
+        :param requirement: requirement value from marker
+
+        :return: True if requirement is met
+        """
+        key = (kind, requirement)
+        ret = self._lookup(self._requirements, "requirements", key)
+        if ret is None:
+            check = getattr(self._config, f"{kind}_check")
+            ret = check(requirement) is not False
+            self._store(self._requirements, key, ret)
+        return ret
 
     def extract_test_requirements(
         self, item: "pytest.Item"
@@ -75,12 +141,24 @@ class FilterTest:
         """
         cmd, dep, extra = self.extract_test_requirements(item)
 
+        group = (tuple(cmd), tuple(dep), tuple(extra))
+        ret = self._lookup(self._groups, "groups", group)
+        if ret is None:
+            ret = self._check_requirements(cmd, dep, extra)
+            self._store(self._groups, group, ret)
+
+        return ret
+
+    def _check_requirements(
+        self, cmd: List[Any], dep: List[Any], extra: List[Any]
+    ) -> Tuple[bool, Optional[str]]:
+        """Check if test requirements are met."""
         skip = False
         reason: Optional[str] = None
 
         # check Kconfig value
         for d in dep:
-            if self._config.kv_check(d) is False:
+            if self._check("kv", d) is False:
                 skip = True
                 reason = f"Required config '{d}' not enabled"
                 break
@@ -88,7 +166,7 @@ class FilterTest:
         # command available in ELF
         if skip is False:
             for c in cmd:
-                if self._config.cmd_check(c) is False:
+                if self._check("cmd", c) is False:
                     skip = True
                     reason = f"Required symbol '{c}' not found in ELF"
                     break
@@ -96,7 +174,7 @@ class FilterTest:
         # check extra parameters
         if skip is False:
             for e in extra:
-                if self._config.extra_check(e) is False:  # pragma: no cover
+                if self._check("extra", e) is False:  # pragma: no cover
                     skip = True
                     reason = f"Extra parameter '{e}' not found"
                     break
@@ -118,7 +118,15 @@ def test_main_build(runner, monkeypatch):
     def fake_run_command(cmd, check, env):
         return
 
+    class FakePopen:
+        def __init__(self, cmd, env, stdout, stderr):
+            pass
+
+        def wait(self, timeout=None):
+            return 0
+
     monkeypatch.setattr("subprocess.run", fake_run_command)
+    monkeypatch.setattr("subprocess.Popen", FakePopen)
 
     args = [
         "build",
@@ -209,3 +217,39 @@ def test_main_build_test(runner, monkeypatch):
     ]
     result = runner.invoke(main, args)
     assert result.exit_code == 1
+
+
+def test_main_pipeline(runner, monkeypatch, tmp_path):
+    calls = []
+
+    def fake_pipeline_run(self, args, main_args):
+        calls.append((args, main_args))
+        return len(calls) - 1
+
+    monkeypatch.setattr("ntfc.pipeline.ProductPipeline.run", fake_pipeline_run)
+
+    args = [
+        "--debug",
+        "--verbose",
+        "test",
+        "--pipeline",
+        "--nologs",
+        "--exitonfail",
+        "--workers=2",
+        f"--resdir={tmp_path}",
+        "--confpath=./tests/resources/nuttx/sim/config_build.yaml",
+        "--testpath=./tests/resources/tests_collect",
+    ]
+    result = runner.invoke(main, args)
+    assert result.exit_code == 0
+
+    args_, main_args = calls[0]
+    assert main_args == ["--debug", "--verbose"]
+    assert "--workers=2" in args_
+    assert "--nologs" in args_
+    assert "--exitonfail" in args_
+    assert args_[0].endswith("tests/resources/tests_collect")
+
+    # failed product
+    result = runner.invoke(main, args)
+    assert result.exit_code == 1
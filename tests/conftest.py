@@ -24,6 +24,13 @@ from dummydev import DeviceDummy
 from ntfc.envconfig import EnvConfig
 
 
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / "cache"
+    monkeypatch.setenv("NTFC_CACHE_DIR", str(path))
+    return path
+
+
 @pytest.fixture
 def config_dummy():
     conf_dir = {
@@ -18,9 +18,14 @@
 #
 ############################################################################
 
+import io
+import os
+import time
 from unittest.mock import patch
 
+from ntfc.coreconfig import CoreConfig
 from ntfc.device.common import CmdReturn, CmdStatus, DeviceCommon
+from ntfc.metrics import metrics
 
 g_mock_read = b""
 
@@ -70,11 +75,11 @@ def test_device_common_data():
     assert str(a) == "SUCCESS"
 
     b = CmdReturn(0)
-    (c1, c2, c3) = b
+    c1, c2, c3 = b
     assert (c1, c2, c3) == (0, None, "")
 
     b = CmdReturn(-1, None, "test")
-    (c1, c2, c3) = b
+    c1, c2, c3 = b
     assert (c1, c2, c3) == (-1, None, "test")
 
 
@@ -115,4 +120,274 @@ def test_device_common_send_cmd_pattern():
         assert dev.flood is True
 
 
+class DevicePipeMock(DeviceMock):
+
+    def __init__(self, _, fd):
+        """Mock."""
+
+        DeviceMock.__init__(self, _)
+        self._fd = fd
+
+    def _fileno(self):
+        """Mock."""
+        return self._fd
+
+    def _read(self, _=0):
+        """Mock."""
+        try:
+            return os.read(self._fd, 1024)
+        except BlockingIOError:
+            return b""
+
+
+def test_device_common_read_all():
+
+    with patch("ntfc.envconfig.EnvConfig") as mockdevice:
+        config = mockdevice.return_value
+
+        # no descriptor - fallback to polling
+        dev = DeviceMock(config)
+        assert dev._fileno() is None
+        assert dev._wait_for_data(0.01) is False
+
+        r, w = os.pipe()
+        os.set_blocking(r, False)
+        dev = DevicePipeMock(config, r)
+
+        # nothing to read
+        assert dev._wait_for_data(0.01) is False
+        assert dev._read_all(0.1) == b""
+
+        # return as soon as data is available, ANSI sequences removed
+        os.write(w, b"\x1b[Kabc")
+        start = time.time()
+        assert dev._read_all(5, return_on_data=True) == b"abc"
+        assert time.time() - start < 1
+
+        # read the whole window
+        os.write(w, b"def")
+        assert dev._read_all(0.1) == b"def"
+
+        # EOF is reported as ready but with no data
+        os.close(w)
+        start = time.time()
+        assert dev._read_all(0.3) == b""
+        assert time.time() - start >= 0.3
+
+        os.close(r)
+
+
+def test_device_common_reader_thread():
+
+    conf = CoreConfig({"name": "main", "reader_thread": True})
+
+    r, w = os.pipe()
+    os.set_blocking(r, False)
+    dev = DevicePipeMock(conf, r)
+    dev._dev_is_health_priv = lambda: True
+    dev.name = "pipe"
+
+    # data written before logs are available goes to the first log
+    log = io.StringIO()
+    dev._reader_start()
+    assert dev.reader_running is True
+    dev._reader_start()
+
+    os.write(w, b"boot\n")
+    assert dev._read_all(5, return_on_data=True) == b"boot\n"
+
+    dev.start_log_collect({"console": log})
+    assert log.getvalue() == "boot\n"
+
+    # command output is logged only once by the reader thread
+    metrics.reset()
+    dev._write = lambda _: os.write(w, b"\x1b[Khello")
+    ret = dev.send_cmd_read_until_pattern(b"cmd arg", b"hello", 5)
+    assert ret.status == CmdStatus.SUCCESS
+
+    # command timings are recorded
+    sample = metrics.slowest()[0]
+    assert sample["command"] == "cmd"
+    assert sample["core"] == "main"
+    assert sample["status"] == "SUCCESS"
+    assert sample["bytes"] == len(b"hello")
+    assert sample["write"] <= sample["first_byte"] <= sample["match"]
+    assert sample["match"] <= sample["total"]
+    dev.stop_log_collect()
+    assert log.getvalue() == "boot\nhello"
+
+    # plain command is recorded too
+    metrics.reset()
+    dev._write = lambda _: os.write(w, b"world")
+    assert dev.send_command(b"echo world", 1) == b"world"
+    sample = metrics.slowest()[0]
+    assert sample["command"] == "echo"
+    assert sample["status"] == "SUCCESS"
+    assert sample["bytes"] == len(b"world")
+    assert sample["write"] <= sample["first_byte"] <= sample["total"]
+    assert "match" not in sample
+
+    dev._reader_stop()
+    assert dev.reader_running is False
+    dev._reader_stop()
+
+    os.close(w)
+    os.close(r)
+
+
+def test_device_common_reader_busyloop():
+
+    conf = CoreConfig({"name": "main", "reader_thread": True})
+
+    r, w = os.pipe()
+    os.set_blocking(r, False)
+    dev = DevicePipeMock(conf, r)
+    dev._dev_is_health_priv = lambda: True
+    dev.name = "pipe"
+    dev._BUSY_LOOP_TIMEOUT = 0.2
+
+    # busy loop detected by the reader thread without foreground reads
+    dev._reader_start()
+    os.write(w, b"boot\n")
+    end = time.time() + 5
+    while not dev.busyloop and time.time() < end:
+        time.sleep(0.05)
+    assert dev.busyloop is True
+    assert "busyloop" in dev.faults()
+
+    dev._reader_stop()
+    os.close(w)
+    os.close(r)
+
+
+def test_device_common_write_modes():
+
+    sent = []
+
+    dev = DeviceMock(CoreConfig({"name": "main"}))
+    dev._write_data(sent.append, b"abc")
+    assert sent == [b"a", b"b", b"c", b"\n"]
+
+    sent.clear()
+    dev = DeviceMock(CoreConfig({"name": "main", "write_mode": "bulk"}))
+    dev._write_data(sent.append, b"abc\n")
+    assert sent == [b"abc\n"]
+
+    sent.clear()
+    conf = CoreConfig(
+        {"name": "main", "write_mode": "chunk", "write_chunk": 2}
+    )
+    dev = DeviceMock(conf)
+    dev._write_data(sent.append, b"abcd")
+    assert sent == [b"ab", b"cd", b"\n"]
+
+    # echo paced writes, echo is kept for the command output
+    r, w = os.pipe()
+    os.set_blocking(r, False)
+    conf = CoreConfig({"name": "main", "write_mode": "echo", "write_chunk": 3})
+    dev = DevicePipeMock(conf, r)
+
+    def send(data):
+        sent.append(data)
+        os.write(w, data.replace(b"\n", b"\r\n"))
+
+    sent.clear()
+    dev._write_data(send, b"abcdefg")
+    assert sent == [b"abc", b"def", b"g\n"]
+    assert dev._read_all(0.1) == b"abcdefg\r\n"
+
+    # no echo - wait is limited
+    dev._ECHO_TIMEOUT = 0.1
+    sent.clear()
+    start = time.time()
+    dev._write_data(sent.append, b"abcd\n")
+    assert sent == [b"abc", b"d\n"]
+    assert time.time() - start < 1
+
+    os.close(w)
+    os.close(r)
+
+
+def test_device_common_faults():
+
+    r, w = os.pipe()
+    os.set_blocking(r, False)
+    dev = DevicePipeMock(CoreConfig({"name": "main"}), r)
+    dev.notalive = False
+
+    assert dev.faults() == {}
+    assert dev.console_offset == 0
+
+    os.write(w, b"abcd")
+    assert dev._read_all(0.1) == b"abcd"
+    assert dev.console_offset == 4
+
+    dev._set_fault("flood")
+    dev._set_fault("flood")
+    faults = dev.faults()
+    assert list(faults.keys()) == ["flood"]
+    assert faults["flood"].offset == 4
+    assert dev.flood is True
+
+    dev.notalive = True
+    assert "notalive" in dev.faults()
+    dev.notalive = False
+    assert "notalive" not in dev.faults()
+
+    dev.clear_fault_flags()
+    assert dev.faults() == {}
+    assert dev.flood is False
+
+    os.close(w)
+    os.close(r)
+
+
+def test_device_common_wait_for_boot():
+
+    r, w = os.pipe()
+    os.set_blocking(r, False)
+    conf = CoreConfig({"name": "main", "boot_banner": "NuttShell"})
+    dev = DevicePipeMock(conf, r)
+    dev._dev_is_health_priv = lambda: True
+    sent = []
+    dev._write = sent.append
+
+    # prompt printed by device is detected without any sleep
+    os.write(w, b"boot log\n\x1b[Knsh> ")
+    start = time.time()
+    assert dev._wait_for_boot(5) is True
+    assert time.time() - start < 0.5
+    assert sent == [b"\n"]
+
+    # prompt printed again after new line, banner speeds up next new line
+    def poke(data):
+        sent.append(data)
+        if len(sent) == 2:
+            os.write(w, b"NuttShell (NSH)\n")
+        elif len(sent) == 3:
+            os.write(w, b"nsh> ")
+
+    sent.clear()
+    dev._write = poke
+    start = time.time()
+    assert dev._wait_for_boot(5) is True
+    assert time.time() - start < 0.5
+    assert len(sent) == 3
+
+    # no prompt
+    sent.clear()
+    dev._write = sent.append
+    start = time.time()
+    assert dev._wait_for_boot(0.5) is False
+    assert time.time() - start >= 0.5
+    assert 2 < len(sent) < 5
+
+    # device died
+    dev._dev_is_health_priv = lambda: False
+    assert dev._wait_for_boot(5) is False
+
+    os.close(w)
+    os.close(r)
+
+
 # TODO: missing tests
@@ -0,0 +1,155 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import os
+import stat
+import sys
+
+import pytest
+
+from ntfc.coreconfig import CoreConfig
+from ntfc.device.criu import CriuCheckpoint
+from ntfc.device.sim import DeviceSim
+
+FAKE_CRIU = """#!{python}
+import os
+import sys
+
+if sys.argv[1] == "dump":
+    sys.exit(int(os.environ.get("FAKE_CRIU_DUMP", "0")))
+
+# restore runs the restored sim in foreground
+if sys.argv[1] == "restore" and os.path.exists(sys.argv[3] + "/fail"):
+    sys.exit(1)
+sys.stdout.write("nsh> ")
+sys.stdout.flush()
+for line in sys.stdin:
+    if line.strip() == "poweroff":
+        break
+    sys.stdout.write("nsh> ")
+    sys.stdout.flush()
+"""
+
+
+@pytest.fixture
+def fake_criu(tmp_path, monkeypatch):
+    path = tmp_path / "criu"
+    path.write_text(FAKE_CRIU.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(CriuCheckpoint, "CRIU", str(path))
+    return path
+
+
+def sim_open(monkeypatch):
+    conf = CoreConfig(
+        {
+            "name": "main",
+            "device": "sim",
+            "launcher": "criu",
+            "spares": 1,
+            "uptime": 3,
+        }
+    )
+    sim = DeviceSim(conf)
+    assert sim._spares_count() == 0
+
+    # fake criu is also the sim
+    sim.host_open([CriuCheckpoint.CRIU, " run"])
+    return sim
+
+
+def test_criu_checkpoint(fake_criu, monkeypatch, tmp_path):
+    assert CriuCheckpoint.available() is True
+
+    criu = CriuCheckpoint(str(tmp_path / "images"))
+    assert criu.directory == str(tmp_path / "images")
+    assert criu.pid is None
+    criu.release()
+
+    assert criu.dump(os.getpid()) is True
+    assert criu.pid == os.getpid()
+    cmd = "".join(criu.restore_cmd())
+    assert cmd.startswith(f"{fake_criu} restore -D {criu.directory}")
+
+    # pid used by other executable is not killed
+    criu._exe = "/dummy"
+    criu.release()
+
+    monkeypatch.setenv("FAKE_CRIU_DUMP", "1")
+    assert criu.dump(os.getpid()) is False
+    assert criu.pid is None
+
+    criu.remove()
+    monkeypatch.setattr(CriuCheckpoint, "CRIU", "ntfc-no-criu")
+    assert CriuCheckpoint.available() is False
+
+
+def test_device_sim_criu(fake_criu, monkeypatch):
+    sim = sim_open(monkeypatch)
+    sim._criu_init()
+    assert sim._criu is not None
+    pid = sim._criu.pid
+    directory = sim._criu.directory
+
+    # reboot restores checkpoint, restored sim gets the same boot time as
+    # launched one
+    timeouts = []
+    wait_for_boot = sim._wait_for_boot
+
+    def wait(timeout):
+        timeouts.append(timeout)
+        return wait_for_boot(timeout)
+
+    sim._wait_for_boot = wait
+    old = sim._child
+    child = sim._dev_reopen()
+    assert timeouts == [3 + sim._BOOT_TIMEOUT]
+    assert child is not old
+    assert sim._criu.pid == pid
+    assert sim._dev_is_health_priv() is True
+
+    # restore failed, sim relaunched and checkpoint removed
+    open(os.path.join(directory, "fail"), "w").close()
+    sim._cmd = [str(fake_criu), " run"]
+    sim._dev_reopen()
+    assert sim._criu is None
+    assert not os.path.exists(directory)
+    assert sim._dev_is_health_priv() is True
+
+    sim.host_close()
+
+
+def test_device_sim_criu_fallback(fake_criu, monkeypatch):
+    sim = sim_open(monkeypatch)
+
+    # dump failed
+    monkeypatch.setenv("FAKE_CRIU_DUMP", "1")
+    sim._criu_init()
+    assert sim._criu is None
+
+    # no criu
+    monkeypatch.setattr(CriuCheckpoint, "CRIU", "ntfc-no-criu")
+    sim._criu_init()
+    assert sim._criu is None
+
+    sim.host_close()
+
+    with pytest.raises(ValueError):
+        _ = CoreConfig({"name": "main", "launcher": "dummy"}).launcher
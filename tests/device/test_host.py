@@ -18,11 +18,30 @@
 #
 ############################################################################
 
+import sys
+import time
+
 import pytest
 from pexpect.exceptions import ExceptionPexpect
 
+from ntfc.coreconfig import CoreConfig
 from ntfc.device.host import DeviceHost
 
+# fake device that exits on poweroff, optionally ignores SIGTERM
+FAKE_DEVICE = """
+import signal
+import sys
+if len(sys.argv) > 1:
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+sys.stdout.write("nsh> ")
+sys.stdout.flush()
+for line in sys.stdin:
+    if line.strip() == "poweroff" and len(sys.argv) == 1:
+        break
+    sys.stdout.write("nsh> ")
+    sys.stdout.flush()
+"""
+
 
 # need to define start which is specific for device implementation
 class DeviceHost2(DeviceHost):
@@ -140,6 +159,39 @@ def test_device_host_command(envconfig_dummy):
     assert dev.send_ctrl_cmd("Z") == 0
 
 
+def test_device_host_close_times(tmp_path):
+    script = tmp_path / "device.py"
+    script.write_text(FAKE_DEVICE)
+
+    conf = CoreConfig({"name": "main", "device": "sim", "write_mode": "bulk"})
+    dev = DeviceHost2(conf)
+    dev.stop()
+
+    # device exits on poweroff, no fixed sleep
+    dev.host_open([sys.executable, " ", str(script)])
+    start = time.time()
+    dev.host_close()
+    assert time.time() - start < 0.5
+    assert list(dev.close_times[-1]) == ["poweroff", "total"]
+
+    # device ignores poweroff and SIGTERM
+    dev._POWEROFF_TIMEOUT = 0.1
+    dev._TERM_TIMEOUT = 0.2
+    dev.host_open([sys.executable, " ", str(script), " stubborn"])
+    child = dev._child
+    dev.stop()
+    assert dev.notalive is True
+    assert not child.isalive()
+    times = dev.close_times[-1]
+    assert list(times) == ["poweroff", "sigterm", "sigkill", "total"]
+    assert times["sigterm"] >= 0.2
+    assert len(dev.close_times) == 2
+
+    # process already gone
+    assert dev._kill_process_group(child) == {}
+    assert dev._wait_exit(child, 1) is True
+
+
 # TODO: more tests for host device !!!!
 #   - test for timeout
 #   - test for very long output
@@ -0,0 +1,137 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import re
+
+import pytest
+
+from ntfc.device.matcher import StreamMatcher, pattern_overlap
+
+
+def test_matcher_pattern_overlap():
+    assert pattern_overlap(b"hello") == 6
+    assert pattern_overlap(b"nsh>(?!.*hello)") is None
+    assert pattern_overlap(b"(?!a)b") is None
+    assert pattern_overlap(b"a[^b]") is None
+    assert pattern_overlap(b"(aaa|bb)") == 4
+    assert pattern_overlap(b"a.*b") is None
+    assert pattern_overlap(b"(?=.*aaa)") is None
+    assert pattern_overlap(b"(?<=a)b") is None
+    assert pattern_overlap(b"(?<!a)b") is None
+
+
+def test_matcher_single():
+    with pytest.raises(ValueError):
+        StreamMatcher([])
+
+    with pytest.raises(ValueError):
+        StreamMatcher([[]])
+
+    m = StreamMatcher.from_pattern(b"Hello, World!!")
+    assert m.patterns == [[b"Hello, World!!"]]
+    assert m.feed(b"") is None
+    assert m.feed(b"") is None
+    assert m.feed(b"xxx Hello, ") is None
+    ret = m.feed(b"World!! yyy")
+    assert ret is not None
+    assert ret.group() == b"Hello, World!!"
+    assert m.match is ret
+    assert m.output == b"xxx Hello, World!! yyy"
+
+    # no more data processed after match
+    assert m.feed(b"zzz") is ret
+    assert m.output == b"xxx Hello, World!! yyy"
+
+
+def test_matcher_split_bytes():
+    m = StreamMatcher.from_pattern(b"nsh> ")
+    for c in b"xxxxx nsh":
+        assert m.feed(bytes([c])) is None
+    assert m.feed(b"> ").group() == b"nsh> "
+
+
+def test_matcher_negative_lookahead():
+    m = StreamMatcher.from_pattern(b"(?s)nsh>(?!.*hello)")
+    assert m.feed(b"nsh> hel") is not None
+
+    m = StreamMatcher.from_pattern(b"(?s)nsh>(?!.*hello)")
+    assert m.feed(b"nsh> hello\n") is None
+    assert m.feed(b"Hello, World!!\n") is None
+    ret = m.feed(b"nsh> ")
+    assert ret is not None
+    assert ret.start() == 26
+
+
+def test_matcher_negative_lookahead_chunks():
+    # prompt and command echo in separate chunks give the same result as
+    # search in the whole output, for every split point
+    pattern = b"nsh> (?!.*cmd)"
+    data = b"nsh> cmd\nHello, World!!\nnsh> "
+    for i in range(1, len(data)):
+        m = StreamMatcher.from_pattern(pattern, flags=re.DOTALL)
+        first = m.feed(data[:i])
+        expected = re.search(pattern, data[:i], re.DOTALL)
+        assert bool(first) == bool(expected)
+        if first:
+            continue
+
+        ret = m.feed(data[i:])
+        assert ret is not None
+        assert ret.start() == len(data) - len(b"nsh> ")
+
+    # stale prompt is not matched once the echo follows it
+    m = StreamMatcher.from_pattern(pattern, flags=re.DOTALL)
+    assert m.feed(b"nsh> cmd") is None
+    assert m.feed(b"\n") is None
+    assert m.feed(b"nsh> ").start() == len(b"nsh> cmd\n")
+
+
+def test_matcher_match_all():
+    m = StreamMatcher([[b"aaa", b"bbb"], [b"not found"]], flags=re.DOTALL)
+    assert m.feed(b"bbb\n") is None
+    assert m.feed(b"xxx\n") is None
+    ret = m.feed(b"aaa\n")
+    assert ret is not None
+    assert ret.group() == b"aaa"
+
+    # alternative completed first wins
+    m = StreamMatcher([[b"aaa", b"bbb"], [b"not found"]], flags=re.DOTALL)
+    ret = m.feed(b"aaa not found bbb")
+    assert ret.group() == b"not found"
+
+
+def test_matcher_large_output():
+    # match is not lost when output is much larger than rescan window
+    m = StreamMatcher([[b"START", b"END"]], max_output=1000, window=100)
+    assert m.feed(b"START" + b"x" * 5000) is None
+    for _ in range(100):
+        assert m.feed(b"y" * 100) is None
+    ret = m.feed(b"END")
+    assert ret is not None
+    assert ret.group() == b"END"
+    assert len(m.output) <= 2000
+
+    # unbounded patterns are searched in window
+    m = StreamMatcher.from_pattern(b"a.*b", window=100)
+    assert m.feed(b"a" + b"x" * 50) is None
+    assert m.feed(b"b").group() == b"a" + b"x" * 50 + b"b"
+    m = StreamMatcher.from_pattern(b"a.*b", window=100)
+    assert m.feed(b"a" + b"x" * 200) is None
+    assert m.feed(b"b") is None
@@ -18,11 +18,14 @@
 #
 ############################################################################
 
+import os
 from unittest.mock import patch
 
 import pytest
 
+from ntfc.coreconfig import CoreConfig
 from ntfc.device.qemu import DeviceQemu
+from ntfc.device.qmp import QmpError
 
 
 def host_open_dummy(cmd, uptime):
@@ -61,3 +64,132 @@ def test_device_qemu_open():
         config.uptime = 3
 
         qemu.start()
+
+
+class FakeQmp:
+    fail_connect = False
+    fail_savevm = False
+    fail_reset = False
+
+    def __init__(self, path):
+        self.path = path
+        self.cmds = []
+
+    def connect(self):
+        if FakeQmp.fail_connect:
+            raise OSError("no socket")
+
+    def close(self):
+        self.cmds.append("close")
+
+    def human(self, cmd):
+        if FakeQmp.fail_savevm and cmd.startswith("savevm"):
+            raise QmpError("no snapshot")
+        if FakeQmp.fail_reset:
+            raise QmpError("failed")
+        self.cmds.append(cmd)
+        return ""
+
+    def execute(self, cmd):
+        if FakeQmp.fail_reset:
+            raise QmpError("failed")
+        self.cmds.append(cmd)
+
+
+def test_device_qemu_snapshot(monkeypatch):
+    opened = []
+    relaunched = []
+
+    monkeypatch.setattr("ntfc.device.qemu.QmpClient", FakeQmp)
+    monkeypatch.setattr(
+        "ntfc.device.host.DeviceHost.host_open",
+        lambda self, cmd, uptime=0: opened.append(cmd) or "child",
+    )
+    monkeypatch.setattr(
+        "ntfc.device.host.DeviceHost.reboot",
+        lambda self, timeout: relaunched.append(timeout) or True,
+    )
+
+    conf = CoreConfig(
+        {
+            "name": "main",
+            "device": "qemu",
+            "exec_path": "qemu",
+            "exec_args": "-M virt",
+            "elf_path": "./tests/resources/nuttx/sim/nuttx",
+            "reset": "snapshot",
+        }
+    )
+    qemu = DeviceQemu(conf)
+    qemu._dev_is_health_priv = lambda: True
+    qemu._wait_for_boot = lambda timeout: True
+    qemu._read = lambda: b""
+
+    qemu.start()
+    assert f"-qmp unix:{qemu._qmp_path},server=on,wait=off" in opened[0]
+    assert qemu._qmp.cmds == ["savevm ntfc-boot"]
+    assert qemu._snapshot is True
+
+    # reboot restores snapshot
+    assert qemu.reboot(1) is True
+    assert qemu._qmp.cmds[-1] == "loadvm ntfc-boot"
+    assert relaunched == []
+
+    # no prompt after reset
+    qemu._wait_for_boot = lambda timeout: False
+    assert qemu.reboot(1) is True
+    assert relaunched == [1]
+    qemu._wait_for_boot = lambda timeout: True
+
+    # snapshot not supported
+    FakeQmp.fail_savevm = True
+    qemu.start()
+    assert qemu._snapshot is False
+    assert qemu.reboot(2) is True
+    assert qemu._qmp.cmds[-1] == "system_reset"
+    FakeQmp.fail_savevm = False
+
+    # reset failed, relaunch
+    FakeQmp.fail_reset = True
+    assert qemu.reboot(3) is True
+    assert relaunched == [1, 3]
+    FakeQmp.fail_reset = False
+
+    # QMP not available
+    FakeQmp.fail_connect = True
+    qemu.start()
+    assert qemu._qmp is None
+    assert qemu.reboot(4) is True
+    assert relaunched == [1, 3, 4]
+    FakeQmp.fail_connect = False
+
+    # device dead
+    qemu.start()
+    qemu._dev_is_health_priv = lambda: False
+    assert qemu.reboot(5) is True
+    assert relaunched == [1, 3, 4, 5]
+
+
+def test_device_qemu_close(monkeypatch):
+    closed = []
+    monkeypatch.setattr(
+        "ntfc.device.host.DeviceHost.host_close",
+        lambda self: closed.append(True),
+    )
+
+    conf = CoreConfig({"name": "main", "device": "qemu"})
+    qemu = DeviceQemu(conf)
+    qemu._qmp = FakeQmp(qemu._qmp_path)
+    qmp = qemu._qmp
+
+    # stale socket is removed
+    open(qemu._qmp_path, "w").close()
+    qemu.host_close()
+    assert closed == [True]
+    assert qmp.cmds == ["close"]
+    assert qemu._qmp is None
+    assert not os.path.exists(qemu._qmp_path)
+
+    conf = CoreConfig({"name": "main", "reset": "dummy"})
+    with pytest.raises(ValueError):
+        _ = conf.reset
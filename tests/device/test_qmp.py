@@ -0,0 +1,114 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import json
+import socket
+import threading
+
+import pytest
+
+from ntfc.device.qmp import QmpClient, QmpError
+
+
+def fake_qemu(server, greeting=True):
+    conn, _ = server.accept()
+    f = conn.makefile("rb")
+    if greeting:
+        conn.sendall(b'{"QMP": {"version": {}}}\r\n')
+    else:
+        conn.sendall(b'{"return": {}}\r\n')
+    for line in f:
+        req = json.loads(line)
+        cmd = req["execute"]
+        if cmd == "qmp_capabilities":
+            rsp = {"return": {}}
+        elif cmd == "human-monitor-command":
+            arg = req["arguments"]["command-line"]
+            out = "Error: no snapshot" if "bad" in arg else ""
+            rsp = {"return": out}
+        elif cmd == "system_reset":
+            # events are skipped by client
+            conn.sendall(b'{"event": "RESET"}\r\n\r\n')
+            rsp = {"return": {}}
+        elif cmd == "quit":
+            break
+        else:
+            rsp = {"error": {"class": "CommandNotFound", "desc": "bad cmd"}}
+        conn.sendall(json.dumps(rsp).encode() + b"\r\n")
+    conn.close()
+
+
+@pytest.fixture
+def qmp_server(tmp_path):
+    path = str(tmp_path / "qmp.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    yield path, server
+    server.close()
+
+
+def test_qmp_client(qmp_server):
+    path, server = qmp_server
+    thread = threading.Thread(target=fake_qemu, args=(server,))
+    thread.start()
+
+    qmp = QmpClient(path)
+    assert qmp.connected is False
+    with pytest.raises(QmpError):
+        qmp.execute("system_reset")
+
+    qmp.connect()
+    assert qmp.connected is True
+
+    assert qmp.execute("system_reset") == {}
+    assert qmp.human("savevm snap") == ""
+
+    with pytest.raises(QmpError):
+        qmp.human("loadvm bad")
+    with pytest.raises(QmpError, match="bad cmd"):
+        qmp.execute("dummy", {"a": 1})
+
+    # connection closed by QEMU
+    with pytest.raises(QmpError):
+        qmp.execute("quit")
+
+    qmp.close()
+    assert qmp.connected is False
+    thread.join()
+
+
+def test_qmp_client_connect(qmp_server):
+    path, server = qmp_server
+
+    # no socket
+    qmp = QmpClient(path + "x", timeout=0.1)
+    with pytest.raises(OSError):
+        qmp.connect()
+    assert qmp.connected is False
+
+    # not QMP
+    thread = threading.Thread(target=fake_qemu, args=(server, False))
+    thread.start()
+    qmp = QmpClient(path)
+    with pytest.raises(QmpError):
+        qmp.connect()
+    assert qmp.connected is False
+    thread.join()
@@ -0,0 +1,96 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import threading
+
+import pytest
+
+from ntfc.device.reader import ConsoleReader, RingBuffer
+
+
+def test_reader_ringbuffer():
+
+    with pytest.raises(ValueError):
+        _ = RingBuffer(0)
+
+    b = RingBuffer(8)
+    assert b.size == 8
+    assert b.head == 0
+    assert b.tail == 0
+    assert b.wait(0, 0.01) is False
+
+    b.write(b"")
+    b.write(b"abcd")
+    assert b.head == 4
+    assert b.wait(0, 0.01) is True
+    assert b.read(0) == (b"abcd", 4)
+    assert b.read(2) == (b"cd", 4)
+    assert b.read(4) == (b"", 4)
+
+    # overrun - oldest data dropped, cursor moved to tail
+    b.write(b"efghijkl")
+    assert b.tail == 4
+    assert b.head == 12
+    assert b.read(0) == (b"efghijkl", 12)
+
+
+def test_reader_console_reader():
+
+    data = [b"abc", b"", b"def"]
+    received = []
+    done = threading.Event()
+
+    def read():
+        return data.pop(0) if data else b""
+
+    def wait(timeout):
+        # report data ready once to exercise spurious wake up path
+        return not done.is_set()
+
+    def on_data(chunk):
+        received.append(chunk)
+        if chunk == b"def":
+            done.set()
+
+    r = ConsoleReader(read, wait, on_data, "test")
+    assert r.running is False
+
+    r.start()
+    assert r.running is True
+    r.start()
+
+    assert done.wait(2)
+    r.stop()
+    r.stop()
+    assert r.running is False
+    assert received == [b"abc", b"def"]
+
+
+def test_reader_console_reader_idle():
+
+    idle = threading.Event()
+
+    # poll interval without data reported as idle
+    r = ConsoleReader(
+        lambda: b"", lambda timeout: False, lambda _: None, "test", idle.set
+    )
+    r.start()
+    assert idle.wait(2)
+    r.stop()
@@ -122,5 +122,9 @@ def test_device_sim_init(serial_config, serial_pair):
     assert ser._write_ctrl("a") is None
     assert ser.reboot() is False
 
+    ser.stop()
+    assert ser.notalive is True
+    ser.stop()
+
     stop.set()
     device_thread.join(timeout=1)
@@ -0,0 +1,184 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import sys
+import threading
+import time
+
+import psutil
+import pytest
+
+from ntfc.coreconfig import CoreConfig
+from ntfc.device.host import DeviceHost
+from ntfc.device.spares import SparePool
+
+FAKE_DEVICE = """
+import sys
+sys.stdout.write("NuttShell\\nnsh> ")
+sys.stdout.flush()
+for line in sys.stdin:
+    if line.strip() == "poweroff":
+        break
+    sys.stdout.write("nsh> ")
+    sys.stdout.flush()
+"""
+
+
+class DeviceHost2(DeviceHost):
+    def start(self):
+        pass
+
+
+def wait_for(cond, timeout=10):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_spare_pool():
+    booted = []
+    killed = []
+    lock = threading.Lock()
+
+    def boot():
+        with lock:
+            booted.append(len(booted))
+            return booted[-1]
+
+    with pytest.raises(ValueError):
+        SparePool(0, boot, killed.append)
+
+    pool = SparePool(2, boot, killed.append, "dummy")
+    assert pool.take() is None
+    assert pool.running is False
+
+    pool.start()
+    pool.start()
+    assert pool.running is True
+    assert wait_for(lambda: pool.ready == 2)
+
+    # taken spare is replaced
+    assert pool.take() == 0
+    assert wait_for(lambda: pool.ready == 2)
+    assert booted == [0, 1, 2]
+
+    pool.stop()
+    assert pool.running is False
+    assert sorted(killed) == [1, 2]
+    assert pool.take() is None
+
+
+def test_spare_pool_failures():
+    calls = []
+
+    def boot():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("spawn failed")
+        return None
+
+    pool = SparePool(1, boot, lambda _: None)
+    pool.start()
+
+    # pool disabled after many failures
+    assert wait_for(lambda: not pool.running)
+    assert len(calls) == SparePool._MAX_FAILURES
+    assert pool.ready == 0
+    pool.stop()
+
+
+def test_spare_pool_stop_while_booting():
+    started = threading.Event()
+    release = threading.Event()
+    killed = []
+
+    def boot():
+        started.set()
+        release.wait(10)
+        return "spare"
+
+    pool = SparePool(1, boot, killed.append)
+    pool.start()
+    assert started.wait(10)
+
+    thread = threading.Thread(target=pool.stop)
+    thread.start()
+    release.set()
+    thread.join()
+    assert killed == ["spare"]
+
+
+def test_device_host_spares(tmp_path):
+    script = tmp_path / "device.py"
+    script.write_text(FAKE_DEVICE)
+    cmd = [sys.executable, " ", str(script)]
+
+    conf = CoreConfig(
+        {"name": "main", "device": "sim", "spares": 1, "write_mode": "bulk"}
+    )
+    dev = DeviceHost2(conf)
+
+    dev.host_open(cmd)
+    assert dev._spares is not None
+    assert wait_for(lambda: dev._spares.ready == 1)
+
+    # crashed device is replaced with spare
+    old = dev._child
+    spare = dev._spares._ready[0]
+    assert dev._dev_reopen() is spare
+    assert dev._child is spare
+    # old instance is reaped in background
+    assert wait_for(lambda: not psutil.pid_exists(old.pid))
+    assert wait_for(lambda: dev._spares.ready == 1)
+
+    # spare not responding, device is relaunched
+    dead = dev._spawn([sys.executable, " -c pass"])
+    assert wait_for(lambda: not dead.isalive())
+    dev._spares._ready[0] = dead
+    old = dev._child
+    child = dev._dev_reopen()
+    assert child is not dead
+    assert child is not old
+    assert dev._dev_is_health_priv() is True
+
+    dev._spares.stop()
+    dev.host_close()
+    assert dev.notalive is True
+
+
+def test_device_host_spare_boot(tmp_path):
+    conf = CoreConfig({"name": "main", "device": "sim"})
+    dev = DeviceHost2(conf)
+    assert dev._spares_count() == 0
+    dev._BOOT_TIMEOUT = 0.5
+
+    # process exits
+    dev._cmd = [sys.executable, " -c pass"]
+    assert dev._spare_boot() is None
+
+    # no prompt
+    dev._cmd = [sys.executable, " -c 'import time; time.sleep(10)'"]
+    assert dev._spare_boot() is None
+
+    with pytest.raises(ValueError):
+        _ = CoreConfig({"name": "main", "spares": -1}).spares
@@ -82,6 +82,15 @@ class DeviceDummy:  # pragma: no cover
         """Check if the device is dead."""
         return False
 
+    @property
+    def console_offset(self) -> int:
+        """Get number of bytes read from device console so far."""
+        return 0
+
+    def faults(self):
+        """Get faults detected on device."""
+        return {}
+
     def poweroff(self):
         """Poweroff the device."""
         return -1
@@ -95,3 +104,11 @@ class DeviceDummy:  # pragma: no cover
 
     def stop_log_collect(self) -> None:
         """Stop device log collector."""
+
+    def stop(self) -> None:
+        """Stop dummy device."""
+
+    @property
+    def close_times(self):
+        """Get stage timings of device teardowns."""
+        return []
@@ -19,11 +19,16 @@
 ############################################################################
 
 
+import os
 import re
+import shutil
+import subprocess
+from array import array
+from unittest.mock import patch
 
 import pytest
 
-from ntfc.lib.elf.elf_parser import ElfParser
+from ntfc.lib.elf.elf_parser import ElfParser, SymbolTable
 
 
 def test_lib_elf_parser():
@@ -46,3 +51,125 @@ def test_lib_elf_parser():
 
     with pytest.raises(ValueError):
         _ = a.has_symbol(b"xx")
+
+
+def test_lib_elf_parser_nm():
+    if not shutil.which("nm"):
+        pytest.skip("nm not available")
+
+    path = "./tests/resources/nuttx/sim/nuttx"
+    out = subprocess.run(
+        ["nm", "--defined-only", path],
+        stdout=subprocess.PIPE,
+        text=True,
+        check=True,
+    ).stdout
+    nm = sorted(tuple(line.split()[::-1]) for line in out.splitlines())
+
+    a = ElfParser(path)
+    assert sorted((s.name, s.type, s.address) for s in a.symbols) == nm
+
+
+def test_lib_elf_parser_cache(cache_dir, monkeypatch):
+    path = "./tests/resources/nuttx/sim/nuttx"
+
+    ElfParser._tables.clear()
+    a = ElfParser(path)
+    assert a.has_symbol("hello_main") is True
+    assert len(os.listdir(cache_dir / "elf")) == 1
+
+    # parsers for the same file share symbol table
+    b = ElfParser(path)
+    assert b.symbols is a.symbols
+
+    # symbols loaded from cache
+    ElfParser._tables.clear()
+    with patch.object(ElfParser, "_extract_symbols") as extract:
+        b = ElfParser(path)
+        assert b.has_symbol("hello_main") is True
+        assert extract.call_count == 0
+    assert b.symbols is not a.symbols
+    assert [s.name for s in b.symbols] == [s.name for s in a.symbols]
+
+    # cache not used
+    ElfParser._tables.clear()
+    with patch.object(
+        ElfParser, "_extract_symbols", return_value=([("x", 0, "T")], 16)
+    ) as extract:
+        c = ElfParser(path, use_cache=False)
+        assert c.has_symbol("x") is True
+        assert extract.call_count == 1
+
+    # cache disabled
+    ElfParser._tables.clear()
+    monkeypatch.setenv("NTFC_CACHE_DIR", "")
+    with patch.object(
+        ElfParser, "_extract_symbols", return_value=([("x", 0, "T")], 16)
+    ) as extract:
+        c = ElfParser(path)
+        assert c.has_symbol("x") is True
+        assert extract.call_count == 1
+
+
+def test_lib_elf_parser_digests(cache_dir):
+    path = "./tests/resources/nuttx/sim/nuttx"
+
+    a = ElfParser(path)
+    digests = a.symbol_digests()
+    assert len(os.listdir(cache_dir / "elfdigest")) == 1
+    assert "hello_main" in digests
+    assert digests["hello_main"] != digests["nsh_main"]
+    # only functions and objects have content
+    assert all(a.has_symbol(name) for name in digests)
+
+    # digests loaded from cache
+    with patch.object(ElfParser, "_extract_digests") as extract:
+        assert ElfParser(path).symbol_digests() == digests
+        assert extract.call_count == 0
+
+    # cache not used
+    b = ElfParser(path, use_cache=False)
+    with patch.object(
+        ElfParser, "_extract_digests", return_value={"x": "0"}
+    ) as extract:
+        assert b.symbol_digests() == {"x": "0"}
+        assert extract.call_count == 1
+
+
+def test_lib_elf_symbol_table():
+    symbols = [
+        ("main", 0x1000, "T"),
+        ("data", 0x2000, "D"),
+        ("zzz", 0x10, "t"),
+        ("data", 0x3000, "d"),
+        ("abc_main", 0x4000, "T"),
+    ]
+    t = SymbolTable.from_symbols(symbols, width=8)
+
+    assert len(t) == 5
+    assert [s.name for s in t] == ["abc_main", "data", "data", "main", "zzz"]
+    assert t[0].address == "00004000"
+    assert t[0].type == "T"
+    assert t[-1].name == "zzz"
+    assert t[-1].address == "00000010"
+    with pytest.raises(IndexError):
+        _ = t[5]
+
+    assert t.find("main") == 3
+    assert t.find("data") == 1
+    assert t.find("ma") == -1
+    assert t.find("zzzz") == -1
+    assert t.lower_bound("d") == 1
+    assert list(t.names()) == [s.name for s in t]
+
+    c = SymbolTable.from_cache(t.to_cache())
+    assert [(s.name, s.address, s.type) for s in c] == [
+        (s.name, s.address, s.type) for s in t
+    ]
+
+    with pytest.raises(ValueError):
+        SymbolTable(b"a\n", array("I", [0, 2]), array("Q"), b"")
+
+    s = t[0]
+    with pytest.raises(AttributeError):
+        s.other = 1
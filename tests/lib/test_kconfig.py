@@ -0,0 +1,116 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import os
+
+from ntfc.lib.kconfig.kconfig import Kconfig, KconfigHex, parse_value
+
+CONFIG = """\
+#
+# Automatically generated file; DO NOT EDIT.
+#
+CONFIG_ARCH_SIM=y
+# CONFIG_DEBUG_FEATURES is not set
+CONFIG_NAME="nuttx \\"sim\\""
+CONFIG_PRIORITY=224
+CONFIG_OFFSET=-1
+CONFIG_MASK=0xff
+CONFIG_DISABLED=n
+CONFIG_EQ="a=b"
+"""
+
+
+def test_kconfig_parse_value():
+    assert parse_value("y") is True
+    assert parse_value("n") is False
+    assert parse_value("0") == 0
+    assert parse_value("-10") == -10
+    assert parse_value("0x10") == 16
+    assert isinstance(parse_value("0x10"), KconfigHex)
+    assert str(parse_value("0x10")) == "0x10"
+    assert parse_value('""') == ""
+    assert parse_value('"a\\\\b"') == "a\\b"
+    assert parse_value("m") == "m"
+
+
+def test_kconfig_parse():
+    k = Kconfig.parse(CONFIG)
+
+    assert k.path is None
+    assert len(k) == 8
+    assert k["CONFIG_ARCH_SIM"] is True
+    assert k["CONFIG_DEBUG_FEATURES"] is False
+    assert k["CONFIG_NAME"] == 'nuttx "sim"'
+    assert k["CONFIG_PRIORITY"] == 224
+    assert k["CONFIG_OFFSET"] == -1
+    assert k["CONFIG_MASK"] == 0xFF
+    assert k["CONFIG_DISABLED"] is False
+    assert k["CONFIG_EQ"] == "a=b"
+    assert "CONFIG_MISSING" not in k
+
+    assert k.enabled("CONFIG_ARCH_SIM") is True
+    assert k.enabled("CONFIG_PRIORITY") is True
+    assert k.enabled("CONFIG_DEBUG_FEATURES") is False
+    assert k.enabled("CONFIG_MISSING") is False
+
+
+def test_kconfig_load(tmp_path):
+    path = tmp_path / ".config"
+    path.write_text(CONFIG)
+
+    k = Kconfig.load(str(path))
+    assert k.path == str(path)
+    assert k["CONFIG_PRIORITY"] == 224
+
+    # not modified file is parsed only once
+    assert Kconfig.load(str(path)) is k
+
+    # modified file is parsed again
+    path.write_text(CONFIG.replace("=224", "=100"))
+    os.utime(path, ns=(0, 0))
+    k2 = Kconfig.load(str(path))
+    assert k2 is not k
+    assert k2["CONFIG_PRIORITY"] == 100
+
+
+def test_kconfig_sim():
+    k = Kconfig.load("./tests/resources/nuttx/sim/kv_config")
+
+    assert k["CONFIG_SYSTEM_NSH"] is True
+    assert k["CONFIG_APPS_DIR"] == "../apps"
+    assert k["CONFIG_SIM_LOOPTASK_PRIORITY"] == 224
+    assert repr(k["CONFIG_SYSLOG_DEFAULT_MASK"]) == "0xff"
+
+
+def test_kconfig_diff():
+    old = Kconfig.parse(CONFIG)
+    new = Kconfig.parse(
+        CONFIG.replace("=224", "=100").replace("CONFIG_MASK=0xff\n", "")
+        + "CONFIG_NEW=y\n"
+    )
+
+    assert not old.diff(old)
+
+    d = old.diff(new)
+    assert d
+    assert d.added == {"CONFIG_NEW": True}
+    assert d.removed == {"CONFIG_MASK": 0xFF}
+    assert d.changed == {"CONFIG_PRIORITY": (224, 100)}
+    assert d.options == ("CONFIG_MASK", "CONFIG_NEW", "CONFIG_PRIORITY")
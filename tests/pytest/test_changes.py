@@ -0,0 +1,199 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import json
+import os
+import re
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from ntfc.envconfig import EnvConfig
+from ntfc.pytest.changes import BuildSnapshot, ChangeSet, file_digest
+from ntfc.pytest.history import TestHistory
+from ntfc.pytest.mypytest import MyPytest
+
+TESTS = """
+import pytest
+
+
+@pytest.mark.cmd_check("hello_main")
+def test_changes_hello():
+    assert 1
+
+
+@pytest.mark.dep_config("CONFIG_SYSTEM_NSH")
+def test_changes_nsh():
+    assert 1
+
+
+@pytest.mark.cmd_check("hello_main")
+def test_changes_fail():
+    assert 0
+
+
+def test_changes_plain():
+    assert 1
+"""
+
+
+@pytest.fixture
+def testdir(tmp_path):
+    path = tmp_path / "tests"
+    path.mkdir()
+    (path / "test_changes_sample.py").write_text(TESTS)
+    # test modules are imported by pytest in this process
+    sys.modules.pop("test_changes_sample", None)
+    yield path
+    sys.modules.pop("test_changes_sample", None)
+
+
+def snapshot(symbols, kconfig=None, tests=None, files=None):
+    cores = [{"kconfig": kconfig or {}, "symbols": symbols}]
+    return BuildSnapshot(cores, tests, files)
+
+
+def test_changes_snapshot(config_sim, tmp_path):
+    s = BuildSnapshot.from_config(EnvConfig(config_sim))
+    assert len(s.cores) == 1
+    assert s.cores[0]["kconfig"]["CONFIG_SYSTEM_NSH"] is True
+    assert "hello_main" in s.cores[0]["symbols"]
+
+    s.record("a.py::test_a", "failed", "123")
+    s.record("a.py::test_a", "passed")
+    s.record("a.py::test_b", "passed")
+    assert s.tests == {"a.py::test_a": "failed", "a.py::test_b": "passed"}
+    assert s.files == {"a.py": "123"}
+
+    # run directory or the latest run in results directory
+    assert BuildSnapshot.find(str(tmp_path)) is None
+    s.save(str(tmp_path / "2025-01-01_00-00-00"))
+    snapshot(["x"]).save(str(tmp_path / "2024-01-01_00-00-00"))
+    s2 = BuildSnapshot.load(str(tmp_path))
+    assert s2.tests == s.tests
+    assert s2.cores[0]["kconfig"]["CONFIG_SIM_LOOPTASK_PRIORITY"] == 224
+
+    with pytest.raises(ValueError):
+        BuildSnapshot.load(str(tmp_path / "none"))
+
+    with open(BuildSnapshot.find(str(tmp_path)), "w") as f:
+        json.dump({"version": 0}, f)
+    with pytest.raises(ValueError):
+        BuildSnapshot.load(str(tmp_path))
+
+    assert file_digest(str(tmp_path / "none")) is None
+
+
+def test_changes_changeset(tmp_path):
+    path = tmp_path / "test_a.py"
+    path.write_text("test")
+    digest = file_digest(str(path))
+
+    old = snapshot(
+        {"a": "1", "b": "1", "c_main": "1"},
+        {"CONFIG_A": True, "CONFIG_B": 1},
+        {f"test_a.py::test_{i}": "passed" for i in range(3)},
+        {"test_a.py": digest},
+    )
+    new = snapshot(
+        {"a": "1", "b": "2", "c_main": "1", "d": "1"},
+        {"CONFIG_A": True, "CONFIG_B": 2},
+    )
+
+    changes = ChangeSet(old, new)
+    assert changes.symbols == {"b", "d"}
+    assert changes.options == {"CONFIG_B"}
+
+    def item(name):
+        return SimpleNamespace(nodeid=f"test_a.py::{name}", path=path)
+
+    assert changes.unchanged(item("test_0"), ["a"], ["CONFIG_A"]) is True
+    assert changes.unchanged(item("test_0"), ["c_cmocka"], []) is True
+    assert changes.unchanged(item("test_0"), [re.compile("^a$")], []) is True
+    assert changes.unchanged(item("test_0"), ["b"], []) is False
+    assert changes.unchanged(item("test_0"), [re.compile("d")], []) is False
+    assert changes.unchanged(item("test_0"), [], ["CONFIG_B"]) is False
+    # no requirements, test may depend on anything
+    assert changes.unchanged(item("test_0"), [], []) is False
+    # not passed in the previous run
+    assert changes.unchanged(item("test_9"), ["a"], []) is False
+    assert changes.unchanged_tests == {"test_a.py::test_0": digest}
+
+    # snapshot without symbol digests, Kconfig is still compared
+    unknown = snapshot(None, old.cores[0]["kconfig"], old.tests, old.files)
+    changes = ChangeSet(unknown, new)
+    assert changes.unchanged(item("test_0"), ["a"], []) is False
+    assert changes.unchanged(item("test_0"), [], ["CONFIG_A"]) is True
+
+    # test file changed
+    path.write_text("changed")
+    changes = ChangeSet(old, new)
+    assert changes.unchanged(item("test_0"), ["a"], []) is False
+
+    # different cores can't be compared
+    changes = ChangeSet(old, BuildSnapshot([]))
+    assert changes.unchanged(item("test_0"), ["a"], []) is False
+
+
+def test_changes_runner(config_sim, device_dummy, testdir, tmp_path):
+
+    def run(resdir, changed_since=None):
+        resdir = str(tmp_path / resdir)
+        p = MyPytest(config_sim)
+        ret = p.runner(
+            str(testdir), {"resdir": resdir}, changed_since=changed_since
+        )
+        history = TestHistory(os.path.join(resdir, "history.json"))
+        return ret, sorted(n.split("::")[1] for n in history._tests)
+
+    with patch("ntfc.cores.get_device", return_value=device_dummy):
+        ret, executed = run("run1")
+        assert ret == 1
+        assert len(executed) == 4
+
+        # tests that passed and didn't change are not executed
+        ret, executed = run("run2", str(tmp_path / "run1"))
+        assert ret == 1
+        assert executed == ["test_changes_fail", "test_changes_plain"]
+
+        # results of deselected tests are carried over
+        ret, executed = run("run3", str(tmp_path / "run2"))
+        assert executed == ["test_changes_fail", "test_changes_plain"]
+
+        # symbol changed since the previous run
+        path = BuildSnapshot.find(str(tmp_path / "run3"))
+        with open(path) as f:
+            data = json.load(f)
+        data["cores"][0]["symbols"]["hello_main"] = "0"
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+        ret, executed = run("run4", str(tmp_path / "run3"))
+        assert executed == [
+            "test_changes_fail",
+            "test_changes_hello",
+            "test_changes_plain",
+        ]
+
+        # no previous results - all tests executed
+        ret, executed = run("run5", str(tmp_path / "none"))
+        assert len(executed) == 4
@@ -0,0 +1,154 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import shutil
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from ntfc.pytest.collectcache import CollectCache
+from ntfc.pytest.mypytest import MyPytest
+
+NEW_TEST = """
+
+def test_test1_simple_new():
+    assert 1
+"""
+
+SKIPPED_TEST = """
+import pytest
+
+
+@pytest.mark.dep_config("CONFIG_XXXXX")
+def test_test5_simple_1():
+    assert 1
+"""
+
+
+def unload(path):
+    # test modules are imported by pytest in this process
+    for f in path.glob("*.py"):
+        sys.modules.pop(f.stem, None)
+
+
+@pytest.fixture
+def testdir(tmp_path):
+    path = tmp_path / "tests"
+    shutil.copytree("./tests/resources/tests_collect", path)
+    shutil.rmtree(path / "__pycache__", ignore_errors=True)
+    unload(path)
+    yield path
+    unload(path)
+
+
+def summary(col):
+    return (
+        [i.nodeid for i in col.items],
+        [i.nodeid for i in col.allitems],
+        [(s[0].nodeid, s[0].location[2], s[1]) for s in col.skipped],
+        sorted(col.modules),
+    )
+
+
+def test_collectcache_collect(config_sim, device_dummy, testdir):
+
+    with patch("ntfc.cores.get_device", return_value=device_dummy):
+        p = MyPytest(config_sim)
+        col = p.collect(str(testdir))
+        assert len(col.allitems) == 12
+        first = summary(col)
+
+        # nothing changed - pytest not called
+        p = MyPytest(config_sim)
+        with patch.object(MyPytest, "_run") as run:
+            col = p.collect(str(testdir))
+            assert run.call_count == 0
+        assert summary(col) == first
+        assert col.stats == {}
+
+        # one file changed - only this file collected
+        with open(testdir / "test_test1.py", "a") as f:
+            f.write(NEW_TEST)
+        unload(testdir)
+
+        p = MyPytest(config_sim)
+        with patch.object(MyPytest, "_run", wraps=p._run) as run:
+            col = p.collect(str(testdir))
+            assert run.call_count == 1
+            opt = run.call_args[0][0]
+            assert opt[0] == str(testdir / "test_test1.py")
+            assert opt[1].startswith("--rootdir=")
+
+        assert len(col.allitems) == 13
+        assert len(col.items) == 10
+        assert col.items[2].name == "test_test1_simple_new"
+        assert summary(col)[2] == first[2]
+
+        # collection environment changed - everything collected again
+        config_sim["config"]["timeout"] = 10
+        p = MyPytest(config_sim)
+        with patch.object(MyPytest, "_run", wraps=p._run) as run:
+            col = p.collect(str(testdir))
+            assert run.call_args[0][0] == [str(testdir)]
+        assert len(col.allitems) == 13
+
+        # broken file - full collection to report errors
+        with open(testdir / "test_test2.py", "a") as f:
+            f.write("\nsyntax error\n")
+        unload(testdir)
+
+        p = MyPytest(config_sim)
+        with patch.object(MyPytest, "_run", wraps=p._run) as run:
+            p.collect(str(testdir))
+            assert run.call_count == 2
+            assert run.call_args[0][0] == [str(testdir)]
+
+
+def test_collectcache_runner(config_sim, device_dummy, testdir):
+
+    with open(testdir / "test_test5.py", "w") as f:
+        f.write(SKIPPED_TEST)
+
+    with patch("ntfc.cores.get_device", return_value=device_dummy):
+        p = MyPytest(config_sim)
+        p.collect(str(testdir))
+
+        # test session always collects all files, cache is not used
+        p = MyPytest(config_sim)
+        with patch.object(MyPytest, "_run", return_value=0) as run:
+            with patch.object(MyPytest, "_collect_cache") as cache:
+                p.runner(str(testdir), {}, nologs=True)
+                assert cache.call_count == 0
+            opt = run.call_args[0][0]
+            assert not [o for o in opt if o.startswith("--ignore=")]
+
+
+def test_collectcache_disabled(testdir, monkeypatch):
+
+    monkeypatch.setenv("NTFC_CACHE_DIR", "")
+    cache = CollectCache(str(testdir), {})
+    assert cache.complete is False
+    assert cache.cached == []
+    assert len(cache.stale) == 4
+
+    # single file
+    cache = CollectCache(str(testdir / "test_test1.py"), {})
+    assert cache.stale == [str(testdir / "test_test1.py")]
@@ -0,0 +1,222 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from ntfc.pytest.history import (
+    HistoryPlugin,
+    TestHistory,
+    order_items,
+    session_order_key,
+)
+from ntfc.pytest.mypytest import MyPytest
+
+
+class FakeCollected:
+    def __init__(self, module2):
+        self.module2 = module2
+
+
+class FakeItem:
+    def __init__(self, nodeid, module2="mod"):
+        self.nodeid = nodeid
+        self._collected = FakeCollected(module2)
+
+
+class FakeReport:
+    def __init__(self, nodeid, when, outcome, duration):
+        self.nodeid = nodeid
+        self.when = when
+        self.duration = duration
+        self.failed = outcome == "failed"
+        self.skipped = outcome == "skipped"
+
+
+def test_history_store(tmp_path):
+
+    path = str(tmp_path / "res" / "history.json")
+    h = TestHistory(path)
+    assert h.path == path
+    assert h.runs == 0
+    assert h.duration("a") is None
+    assert h.failed_run("a") is None
+
+    h.new_run()
+    h.record("a", "passed", 1.0)
+    h.record("b", "failed", 2.0)
+    h.record("c", "skipped", 3.0)
+    h.new_run()
+    h.record("a", "passed", 3.0)
+    for _ in range(10):
+        h.record("b", "passed", 4.0)
+    h.save()
+
+    h = TestHistory(path)
+    assert h.runs == 2
+    assert h.duration("a") == 2.0
+    assert h.duration("b") == 4.0
+    assert h.duration("c") is None
+    assert h.failed_run("a") is None
+    assert h.failed_run("b") == 1
+
+
+def test_history_broken(tmp_path):
+
+    path = tmp_path / "history.json"
+    path.write_text("{not json")
+    h = TestHistory(str(path))
+    assert h.runs == 0
+
+    path.write_text(json.dumps({"version": 0, "runs": 5, "tests": {}}))
+    h = TestHistory(str(path))
+    assert h.runs == 0
+
+
+def test_history_session_order_key():
+
+    order = [
+        {"module": "a", "value": "1"},
+        {"module": "b", "value": -1},
+        {"module": "c"},
+        {"module": "d", "value": "x"},
+    ]
+    assert session_order_key(order) == {"a": 1, "b": -1}
+    assert session_order_key([]) == {}
+
+
+def test_history_order_items(tmp_path):
+
+    h = TestHistory(str(tmp_path / "history.json"))
+    h.new_run()
+    h.record("t1", "passed", 1.0)
+    h.record("t2", "failed", 5.0)
+    h.record("t3", "passed", 3.0)
+    h.new_run()
+    h.record("t3", "failed", 3.0)
+
+    items = [FakeItem(f"t{i}") for i in range(1, 5)]
+
+    def ids(items):
+        return [i.nodeid for i in items]
+
+    assert ids(order_items(items)) == ["t1", "t2", "t3", "t4"]
+    assert ids(order_items(items, "collect", h)) == ["t1", "t2", "t3", "t4"]
+    assert ids(order_items(items, "longest", h)) == ["t4", "t2", "t3", "t1"]
+    assert ids(order_items(items, "failed", h)) == ["t3", "t2", "t1", "t4"]
+
+    # no history available
+    assert ids(order_items(items, "longest")) == ["t1", "t2", "t3", "t4"]
+
+    with pytest.raises(ValueError):
+        order_items(items, "random", h)
+
+    # modules order is forced before policy
+    items = [
+        FakeItem("t1", "last"),
+        FakeItem("t2", "other"),
+        FakeItem("t3", "first"),
+        FakeItem("t4", "second"),
+        FakeItem("t5", "other"),
+    ]
+    modules = {"first": 0, "second": 1, "last": -1}
+    ret = order_items(items, "longest", h, modules)
+    assert ids(ret) == ["t3", "t4", "t5", "t2", "t1"]
+
+
+def test_history_plugin(tmp_path):
+
+    h = TestHistory(str(tmp_path / "history.json"))
+    plugin = HistoryPlugin(h)
+    plugin.pytest_sessionstart(None)
+
+    for when in ("setup", "call", "teardown"):
+        plugin.pytest_runtest_logreport(FakeReport("a", when, "passed", 1.0))
+    plugin.pytest_runtest_logreport(FakeReport("b", "setup", "passed", 1.0))
+    plugin.pytest_runtest_logreport(FakeReport("b", "call", "failed", 2.0))
+    plugin.pytest_runtest_logreport(FakeReport("c", "setup", "skipped", 0))
+    plugin.pytest_runtest_logreport(FakeReport("c", "teardown", "passed", 0))
+    # report without teardown
+    plugin.pytest_runtest_logreport(FakeReport("d", "call", "failed", 1.0))
+    plugin.pytest_sessionfinish(None)
+
+    h = TestHistory(str(tmp_path / "history.json"))
+    assert h.runs == 1
+    assert h.duration("a") == 3.0
+    assert h.duration("b") == 3.0
+    assert h.failed_run("b") == 1
+    assert h.duration("c") is None
+    assert h.failed_run("d") == 1
+
+
+def test_history_runner(config_dummy, device_dummy, tmp_path):
+
+    resdir = str(tmp_path / "result")
+    path = "./tests/resources/tests_exitcode/"
+
+    with patch("ntfc.cores.get_device", return_value=device_dummy):
+        p = MyPytest(config_dummy)
+        assert p.runner(path, {"resdir": resdir}) == 1
+
+        h = TestHistory(os.path.join(resdir, "history.json"))
+        assert h.runs == 1
+        failed = [
+            nodeid for nodeid in h._tests if h.failed_run(nodeid) is not None
+        ]
+        assert len(failed) == 1
+
+        p = MyPytest(config_dummy, exit_on_fail=True)
+        assert p.runner(path, {"resdir": resdir}, order="failed") == 1
+
+        # only recently failed test was run
+        h = TestHistory(os.path.join(resdir, "history.json"))
+        assert h.runs == 2
+        assert h.failed_run(failed[0]) == 2
+
+        # nothing stored without logs
+        p = MyPytest(config_dummy)
+        assert p.runner(path, {"resdir": resdir}, nologs=True) == 1
+        assert TestHistory(os.path.join(resdir, "history.json")).runs == 2
+
+
+def test_history_session_order(config_sim, device_dummy):
+
+    confjson = {
+        "module": {
+            "include_module": [],
+            "exclude_module": [],
+            "order": [
+                {"module": "test_Test1", "value": "-1"},
+                {"module": "test_Test3_Test4", "value": "0"},
+            ],
+        },
+    }
+
+    with patch("ntfc.cores.get_device", return_value=device_dummy):
+        p = MyPytest(config_sim, confjson=confjson)
+        col = p.collect("./tests/resources/tests_dirs")
+
+    modules = [item.module2 for item in col.items]
+    assert modules[0] == "test_Test3_Test4"
+    assert modules[-1] == "test_Test1"
+    assert "test_Test2" in modules[1:-1]
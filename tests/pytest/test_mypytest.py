@@ -19,8 +19,12 @@
 ############################################################################
 
 import json
+import os
 from unittest.mock import patch
 
+import pytest
+
+from ntfc.metrics import metrics
 from ntfc.pytest.mypytest import MyPytest
 
 
@@ -82,6 +86,10 @@ def test_collector_collect_dir(config_sim, device_dummy):
         assert col.items[7].name == "test_test4_simple_1"
         assert col.items[8].name == "test_test4_simple_3"
 
+        hits, lookups = col.stats["groups"]
+        assert lookups == len(col.allitems)
+        assert 0 < hits < lookups
+
 
 def test_collector_collect_manydirs(config_sim, device_dummy):
 
@@ -154,3 +162,69 @@ def test_runner_run_exitcode(config_dummy, device_dummy):
         # test directory - should fail due to test_fail.py
         path = "./tests/resources/tests_exitcode/"
         assert p.runner(path, {}) == 1
+
+
+def test_runner_xmlpath(config_dummy, device_dummy, tmp_path):
+
+    with patch("ntfc.cores.get_device", return_value=device_dummy):
+
+        p = MyPytest(config_dummy)
+
+        path = "./tests/resources/tests_exitcode/test_success.py"
+        report = str(tmp_path / "session.xml")
+        result = {"resdir": str(tmp_path), "xmlpath": report}
+        assert p.runner(path, result) == 0
+
+        # report stored in requested file, not in run directory
+        assert os.path.isfile(report)
+        assert not os.path.exists(
+            os.path.join(pytest.result_dir, "report.xml")
+        )
+
+
+def test_runner_teardown(config_dummy, device_dummy, tmp_path):
+
+    with patch("ntfc.cores.get_device", return_value=device_dummy):
+
+        p = MyPytest(config_dummy)
+
+        path = "./tests/resources/tests_exitcode/test_success.py"
+        assert p.runner(path, {"resdir": str(tmp_path)}) == 0
+
+        # devices are stopped and teardown timings stored
+        run = pytest.result_dir
+        with open(os.path.join(run, MyPytest.TEARDOWN_FILE)) as f:
+            times = json.load(f)
+        assert list(times) == [prod.name for prod in pytest.products]
+        assert times[pytest.products[0].name] == {"dummy": []}
+        assert os.path.exists(os.path.join(run, metrics.FILE_NAME))
+
+        # no timings without logs
+        os.remove(os.path.join(run, MyPytest.TEARDOWN_FILE))
+        os.remove(os.path.join(run, metrics.FILE_NAME))
+        assert p.runner(path, {"resdir": str(tmp_path)}, nologs=True) == 0
+        assert not os.path.exists(os.path.join(run, MyPytest.TEARDOWN_FILE))
+        assert not os.path.exists(os.path.join(run, metrics.FILE_NAME))
+
+
+def test_runner_build_stats(config_dummy, device_dummy, tmp_path):
+
+    with patch("ntfc.cores.get_device", return_value=device_dummy):
+
+        path = "./tests/resources/tests_exitcode/test_success.py"
+        stats = {"build": {"build/a": {"time": 1.0}}, "flash": {}}
+        p = MyPytest(config_dummy, build_stats=stats)
+        assert p.runner(path, {"resdir": str(tmp_path)}) == 0
+
+        # build statistics stored in run directory
+        run = pytest.result_dir
+        assert run != str(tmp_path)
+        with open(os.path.join(run, MyPytest.BUILD_STATS_FILE)) as f:
+            assert json.load(f) == stats
+        assert not os.path.exists(tmp_path / MyPytest.BUILD_STATS_FILE)
+
+        # nothing stored without build
+        p = MyPytest(config_dummy)
+        assert p.runner(path, {"resdir": str(tmp_path / "nobuild")}) == 0
+        run = pytest.result_dir
+        assert not os.path.exists(os.path.join(run, MyPytest.BUILD_STATS_FILE))
@@ -0,0 +1,122 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import os
+import stat
+import sys
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from ntfc.pytest.mypytest import MyPytest
+
+FAKE_NSH = """#!{python}
+import sys
+sys.stdout.write("NuttShell (NSH)\\nnsh> ")
+sys.stdout.flush()
+for line in sys.stdin:
+    cmd = line.strip()
+    if cmd:
+        sys.stdout.write(f"nsh: {{cmd.split()[0]}}: command not found\\n")
+    sys.stdout.write("nsh> ")
+    sys.stdout.flush()
+"""
+
+
+@pytest.fixture
+def config_workers(tmp_path):
+    nsh = tmp_path / "nsh"
+    nsh.write_text(FAKE_NSH.format(python=sys.executable))
+    nsh.chmod(nsh.stat().st_mode | stat.S_IEXEC)
+
+    return {
+        "config": {},
+        "product": {
+            "name": "product-qemu",
+            "cores": {
+                "core0": {
+                    "name": "qemu",
+                    "device": "qemu",
+                    "exec_path": str(nsh),
+                    "elf_path": "./tests/resources/nuttx/sim/nuttx",
+                    "conf_path": "./tests/resources/nuttx/sim/kv_config",
+                    "uptime": 0,
+                }
+            },
+        },
+    }
+
+
+def test_workers_run(config_workers, tmp_path):
+
+    resdir = str(tmp_path / "result")
+    result = {"resdir": resdir, "xml": True}
+
+    p = MyPytest(config_workers)
+    path = "./tests/resources/tests_collect"
+    assert p.runner(path, result, workers=2) == 0
+
+    # merged report
+    run_dir = [
+        d.path for d in os.scandir(resdir) if d.is_dir()  # skip history
+    ][0]
+    root = ET.parse(os.path.join(run_dir, "report.xml")).getroot()
+    assert len(root.findall(".//testcase")) == 9
+
+    # separate directory for each worker
+    assert os.path.isdir(os.path.join(run_dir, "worker0"))
+    assert os.path.isdir(os.path.join(run_dir, "worker1"))
+
+    p = MyPytest(config_workers)
+    path = "./tests/resources/tests_exitcode/"
+    assert p.runner(path, {}, nologs=True, workers=2) == 1
+
+
+def test_workers_relative_paths(config_workers, tmp_path, monkeypatch):
+
+    # relative paths are resolved before device starts in worker directory
+    core = config_workers["product"]["cores"]["core0"]
+    monkeypatch.chdir(tmp_path)
+    core["exec_path"] = os.path.join(".", "nsh")
+    core["elf_path"] = os.path.relpath(
+        os.path.join(os.path.dirname(__file__), "../resources/nuttx/sim/nuttx")
+    )
+    core["conf_path"] = os.path.relpath(
+        os.path.join(
+            os.path.dirname(__file__), "../resources/nuttx/sim/kv_config"
+        )
+    )
+
+    resdir = str(tmp_path / "result")
+    testpath = os.path.join(
+        os.path.dirname(__file__), "../resources/tests_collect"
+    )
+
+    p = MyPytest(config_workers)
+    assert p.runner(testpath, {"resdir": resdir}, workers=2) == 0
+
+
+def test_workers_device_not_supported(config_workers):
+
+    config_workers["product"]["cores"]["core0"]["device"] = "serial"
+
+    p = MyPytest(config_workers)
+    with pytest.raises(ValueError):
+        p.runner("./tests/resources/tests_collect", {}, workers=2)
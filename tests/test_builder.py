@@ -18,6 +18,11 @@
 #
 ############################################################################
 
+import subprocess
+import sys
+import threading
+import time
+
 import pytest
 
 from ntfc.builder import NuttXBuilder
@@ -36,7 +41,7 @@ conf_dir = {
 }
 
 
-def builder_run_command_dummy(cmd, env):
+def builder_run_command_dummy(cmd, env, log=None, cancel=None):
     pass
 
 
@@ -72,3 +77,260 @@ def test_builder_init():
         new_confg["product"]["cores"]["core0"]["conf_path"]
         == "bbb/product-xxx-dummy/.config"
     )
+
+
+def build_config(tmp_path, cores, jobs):
+    return {
+        "config": {
+            "cwd": str(tmp_path),
+            "build_dir": str(tmp_path / "build"),
+            "build_jobs": jobs,
+        },
+        "product": {
+            "name": "xxx",
+            "cores": {
+                f"core{i}": {"name": f"c{i}", "defconfig": "dummy/path"}
+                for i in range(cores)
+            },
+        },
+    }
+
+
+def test_builder_build_parallel(tmp_path):
+    b = NuttXBuilder(build_config(tmp_path, 4, 8))
+
+    cmds = []
+    threads = set()
+    barrier = threading.Barrier(4, timeout=10)
+
+    def run_command(cmd, env, log=None, cancel=None):
+        # all configure steps run at the same time
+        if "--build" not in cmd:
+            threads.add(threading.current_thread().name)
+            barrier.wait()
+        cmds.append((cmd, log))
+
+    b._run_command = run_command
+    b._make_dir = builder_make_dir_dummy
+    b.build_all()
+
+    assert len(threads) == 4
+    assert len(cmds) == 8
+
+    # job budget split between concurrent builds
+    builds = [cmd for cmd, _ in cmds if "--build" in cmd]
+    assert all(cmd[-2:] == ["--parallel", "2"] for cmd in builds)
+
+    # each build has its own log
+    logs = {log for _, log in cmds}
+    assert len(logs) == 4
+    assert str(tmp_path / "build/product-xxx-c0/build.log") in logs
+
+
+def test_builder_build_fail_fast(tmp_path):
+    b = NuttXBuilder(build_config(tmp_path, 3, 1))
+
+    cmds = []
+
+    def run_command(cmd, env, log=None, cancel=None):
+        cmds.append(cmd)
+        raise subprocess.CalledProcessError(1, cmd)
+
+    b._run_command = run_command
+    b._make_dir = builder_make_dir_dummy
+
+    # one build at a time, builds after the failed one are not started
+    with pytest.raises(subprocess.CalledProcessError):
+        b.build_all()
+    assert len(cmds) == 1
+
+
+def test_builder_run_command(tmp_path):
+    b = NuttXBuilder(build_config(tmp_path, 1, 1))
+    log = str(tmp_path / "build.log")
+
+    b._run_command([sys.executable, "-c", "print('first')"], None, log)
+    b._run_command([sys.executable, "-c", "print('second')"], None, log)
+    with open(log) as f:
+        data = f.read()
+    assert "first\n" in data
+    assert "second\n" in data
+    assert b._log_tail(log, 1) == "second"
+    assert b._log_tail(str(tmp_path / "none")) == ""
+
+    with pytest.raises(subprocess.CalledProcessError):
+        b._run_command([sys.executable, "-c", "exit(3)"], None, log)
+
+    # the first command of a new builder truncates log
+    b = NuttXBuilder(build_config(tmp_path, 1, 1))
+    b._run_command([sys.executable, "-c", "print('third')"], None, log)
+    with open(log) as f:
+        assert "first" not in f.read()
+
+
+def test_builder_cancel(tmp_path):
+    b = NuttXBuilder(build_config(tmp_path, 1, 1))
+    log = str(tmp_path / "build.log")
+
+    errors = []
+
+    def run():
+        try:
+            b._run_command(
+                [sys.executable, "-c", "import time; time.sleep(30)"],
+                None,
+                log,
+                cancel=b._cancel,
+            )
+        except Exception as e:
+            errors.append(e)
+
+    t = threading.Thread(target=run)
+    t.start()
+    while not b._procs:
+        time.sleep(0.01)
+
+    # running commands are terminated, new commands are not started
+    b._cancel_builds()
+    t.join(10)
+    assert not t.is_alive()
+    assert type(errors[0]).__name__ == "_BuildCancelled"
+
+    run()
+    assert len(errors) == 2
+
+
+def flash_config(tmp_path):
+    conf = {"config": {"flash_retries": 1}}
+    for p in range(2):
+        conf[f"product{p}"] = {
+            "name": f"p{p}",
+            "cores": {
+                f"core{i}": {
+                    "name": f"c{i}",
+                    "elf_path": str(tmp_path / f"p{p}c{i}/nuttx"),
+                    "flash": f"flash {p} {i} $IMAGE_BIN",
+                    "reboot": f"reboot {p} {i}",
+                }
+                for i in range(2)
+            },
+        }
+    return conf
+
+
+def test_builder_flash_parallel(tmp_path):
+    conf = flash_config(tmp_path)
+    # the last core has its own probe
+    conf["product1"]["cores"]["core1"]["probe"] = "probe1"
+    b = NuttXBuilder(conf)
+
+    cmds = []
+    active = {}
+    lock = threading.Lock()
+    barrier = threading.Barrier(3, timeout=10)
+
+    def run_command(cmd, env, log=None, timeout=None):
+        probe = cmd[1] if cmd[1:3] != ["1", "1"] else "probe1"
+        with lock:
+            # cores with the same probe are flashed one by one
+            assert active.get(probe) is None
+            active[probe] = cmd
+            cmds.append((cmd, log, timeout))
+        # the first core of every probe is flashed at the same time
+        if cmd[0] == "flash" and (cmd[2] == "0" or probe == "probe1"):
+            barrier.wait()
+        time.sleep(0.01)
+        with lock:
+            active[probe] = None
+
+    b._run_command = run_command
+    b.flash_all()
+
+    assert len(cmds) == 8
+    # cores flashed in configuration order, reboot after flash
+    product0 = [cmd[:3] for cmd, _, _ in cmds if cmd[1] == "0"]
+    assert product0 == [
+        ["flash", "0", "0"],
+        ["reboot", "0", "0"],
+        ["flash", "0", "1"],
+        ["reboot", "0", "1"],
+    ]
+    assert cmds[0][2] == 300
+    assert cmds[0][1].endswith("/flash.log")
+    assert str(tmp_path / "p0c0/nuttx.bin") in [c[0][-1] for c in cmds]
+
+    assert set(b.flash_stats) == {
+        "product0/core0",
+        "product0/core1",
+        "product1/core0",
+        "product1/core1",
+    }
+    assert b.flash_stats["product0/core0"]["attempts"] == 1
+
+
+def test_builder_flash_retry(tmp_path):
+    conf = flash_config(tmp_path)
+    conf["product1"]["cores"]["core0"]["flash_timeout"] = 5
+    b = NuttXBuilder(conf)
+
+    failed = []
+
+    def run_command(cmd, env, log=None, timeout=None):
+        # fail the first flash of product1/core0
+        if cmd[:3] == ["flash", "1", "0"] and not failed:
+            assert timeout == 5
+            failed.append(cmd)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+
+    b._run_command = run_command
+    b.flash_all()
+    assert b.flash_stats["product1/core0"]["attempts"] == 2
+    assert b.flash_stats["product1/core1"]["attempts"] == 1
+
+    # retries exhausted
+    flashed = []
+
+    def run_command_fail(cmd, env, log=None, timeout=None):
+        if cmd[:3] == ["flash", "0", "0"]:
+            raise subprocess.CalledProcessError(1, cmd)
+        flashed.append(cmd)
+        # other probes don't start new jobs after failure
+        time.sleep(0.1)
+
+    b = NuttXBuilder(conf)
+    b._run_command = run_command_fail
+    with pytest.raises(subprocess.CalledProcessError):
+        b.flash_all()
+    assert "product0/core0" not in b.flash_stats
+    assert "product1/core1" not in b.flash_stats
+
+
+def test_builder_flash_not_cancelled(tmp_path):
+    conf = flash_config(tmp_path)
+    b = NuttXBuilder(conf)
+
+    # failed build doesn't stop flashing
+    b._cancel_builds()
+    cmds = []
+    b._run_command = lambda cmd, env, log=None, timeout=None: cmds.append(cmd)
+    b.flash_all()
+    assert len(cmds) == 8
+
+    b = NuttXBuilder({"config": {}})
+    b._cancel_builds()
+    log = str(tmp_path / "flash.log")
+    b._run_command([sys.executable, "-c", "exit(0)"], None, log)
+
+
+def test_builder_run_command_timeout(tmp_path):
+    b = NuttXBuilder({"config": {}})
+    log = str(tmp_path / "flash.log")
+
+    with pytest.raises(subprocess.TimeoutExpired):
+        b._run_command(
+            [sys.executable, "-c", "import time; time.sleep(30)"],
+            None,
+            log,
+            timeout=0.1,
+        )
+    assert not b._procs
@@ -0,0 +1,63 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import os
+
+import pytest
+
+from ntfc.cache import cache_dir, cache_key, cache_load, cache_store
+
+
+def test_cache_dir(monkeypatch, tmp_path):
+
+    monkeypatch.setenv("NTFC_CACHE_DIR", str(tmp_path))
+    assert cache_dir() == str(tmp_path)
+
+    monkeypatch.setenv("NTFC_CACHE_DIR", "")
+    assert cache_dir() is None
+
+    monkeypatch.delenv("NTFC_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert cache_dir() == os.path.join(str(tmp_path), "ntfc")
+
+
+def test_cache_store_load(cache_dir, monkeypatch):
+
+    key = cache_key("a", 1, None)
+    assert key == cache_key("a", 1, None)
+    assert key != cache_key("a", 2, None)
+
+    assert cache_load("test", key) is None
+    cache_store("test", key, {"a": [1, 2]})
+    assert cache_load("test", key) == {"a": [1, 2]}
+
+    # broken cache file
+    (cache_dir / "test" / (key + ".json")).write_text("{")
+    assert cache_load("test", key) is None
+
+    # temporary file removed when data can't be stored
+    with pytest.raises(TypeError):
+        cache_store("test", key, {"a": object()})
+    assert not list((cache_dir / "test").glob("*.tmp"))
+
+    # cache disabled
+    monkeypatch.setenv("NTFC_CACHE_DIR", "")
+    cache_store("test", key, {"a": [1, 2]})
+    assert cache_load("test", key) is None
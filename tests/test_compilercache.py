@@ -0,0 +1,141 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from ntfc.builder import NuttXBuilder
+from ntfc.compilercache import CompilerCache, ccache_stats, sccache_stats
+
+CCACHE_LOG = """\
+# /nuttx/sched/init.c
+direct_cache_hit
+# /nuttx/sched/irq.c
+preprocessed_cache_hit
+# /nuttx/sched/task.c
+cache_miss
+# /nuttx/sched/conf.c
+could_not_use_precompiled_header
+"""
+
+SCCACHE_JSON = {
+    "stats": {
+        "cache_hits": {"counts": {"C/C++": 3, "Asm": 1}},
+        "cache_misses": {"counts": {"C/C++": 2}},
+    }
+}
+
+
+def test_compilercache_config(cache_dir, tmp_path):
+    assert CompilerCache.from_config({}) is None
+
+    c = CompilerCache.from_config({"compiler_cache": "ccache"})
+    assert c.tool == "ccache"
+    assert c.directory == os.path.join(cache_dir, "ccache")
+    assert c.defines() == {
+        "CMAKE_C_COMPILER_LAUNCHER": "ccache",
+        "CMAKE_CXX_COMPILER_LAUNCHER": "ccache",
+    }
+
+    c = CompilerCache.from_config(
+        {"compiler_cache": "sccache", "compiler_cache_dir": str(tmp_path)}
+    )
+    assert c.directory == str(tmp_path)
+
+    with pytest.raises(ValueError):
+        CompilerCache.from_config({"compiler_cache": "xxx"})
+
+
+def test_compilercache_ccache(tmp_path):
+    c = CompilerCache("ccache", str(tmp_path / "cache"), str(tmp_path))
+    build = str(tmp_path / "build")
+
+    env = c.env(build)
+    assert env["CCACHE_DIR"] == str(tmp_path / "cache")
+    assert env["CCACHE_BASEDIR"] == str(tmp_path)
+    assert env["CCACHE_STATSLOG"] == os.path.join(build, "ccache-stats.log")
+    assert c.finish(build, env) == {"hits": 0, "misses": 0}
+
+    with open(env["CCACHE_STATSLOG"], "w") as f:
+        f.write(CCACHE_LOG)
+    assert c.finish(build, env) == {"hits": 2, "misses": 1}
+
+    # new build starts with empty stats
+    env = c.env(build)
+    assert c.finish(build, env) == {"hits": 0, "misses": 0}
+
+    assert ccache_stats(str(tmp_path / "none")) == {"hits": 0, "misses": 0}
+
+
+def test_compilercache_sccache(tmp_path):
+    c = CompilerCache("sccache", str(tmp_path / "cache"), str(tmp_path))
+
+    env = c.env(str(tmp_path))
+    assert env["SCCACHE_DIR"] == str(tmp_path / "cache")
+    assert int(env["SCCACHE_SERVER_PORT"]) > 0
+    assert c.env(str(tmp_path))["SCCACHE_SERVER_PORT"]
+
+    with patch("ntfc.compilercache.subprocess.run") as run:
+        run.return_value.stdout = json.dumps(SCCACHE_JSON)
+        assert c.finish(str(tmp_path), env) == {"hits": 4, "misses": 2}
+        # stats and stop server
+        assert run.call_count == 2
+        port = run.call_args[1]["env"]["SCCACHE_SERVER_PORT"]
+        assert port == env["SCCACHE_SERVER_PORT"]
+
+    with patch("ntfc.compilercache.subprocess.run", side_effect=OSError):
+        assert c.finish(str(tmp_path), env) == {"hits": 0, "misses": 0}
+
+    assert sccache_stats("xxx") == {"hits": 0, "misses": 0}
+
+
+def test_compilercache_builder(tmp_path):
+    conf = {
+        "config": {
+            "cwd": str(tmp_path),
+            "build_dir": str(tmp_path / "build"),
+            "compiler_cache": "ccache",
+        },
+        "product": {
+            "name": "xxx",
+            "cores": {"core0": {"name": "c0", "defconfig": "dummy/path"}},
+        },
+    }
+    b = NuttXBuilder(conf)
+
+    cmds = []
+
+    def run_command(cmd, env, log=None, cancel=None):
+        cmds.append(cmd)
+        if "--build" in cmd:
+            with open(env["CCACHE_STATSLOG"], "w") as f:
+                f.write(CCACHE_LOG)
+
+    b._run_command = run_command
+    b.build_all()
+
+    assert "-DCMAKE_C_COMPILER_LAUNCHER=ccache" in cmds[0]
+    build = str(tmp_path / "build/product-xxx-c0")
+    assert b.stats[build]["hits"] == 2
+    assert b.stats[build]["misses"] == 1
+    assert b.stats[build]["time"] >= 0
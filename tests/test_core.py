@@ -25,6 +25,8 @@ import pytest
 
 from ntfc.core import ProductCore
 from ntfc.device.common import CmdReturn, CmdStatus
+from ntfc.health import Fault
+from ntfc.metrics import metrics
 
 
 def test_core_init(envconfig_dummy):
@@ -64,21 +66,15 @@ def test_core_internals(envconfig_dummy):
         assert p._prepare_command("aaa", "bbb") == "aaa bbb"
         assert p._prepare_command("aaa", ["bbb", "ccc"]) == "aaa bbb ccc"
 
-        assert (
-            p._build_expect_pattern(["aaa", "bbb"], False, False)
-            == "(aaa|bbb)"
-        )
-        assert (
-            p._build_expect_pattern(["aaa", "bbb"], True, False)
-            == "(?=.*aaa)(?=.*bbb)"
-        )
-        assert (
-            p._build_expect_pattern(["aaa", "bbb"], True, True)
-            == "(?=.*aaa)(?=.*bbb)"
-        )
-        assert (
-            p._build_expect_pattern(["aaa", "bbb"], False, True) == "(aaa|bbb)"
-        )
+        m = p._prepare_matcher("aaa", ["bbb", "ccc"], "", True, False)
+        assert m.patterns == [
+            [b"bbb", b"ccc"],
+            [b"aaa:\\ command\\ not\\ found"],
+        ]
+        m = p._prepare_matcher("aaa", ["bbb", "ccc"], "", False, False)
+        assert m.patterns[:2] == [[b"bbb"], [b"ccc"]]
+        m = p._prepare_matcher("aaa", "b.b", "", True, True)
+        assert m.patterns[0] == [b"b.b"]
 
         assert p._encode_for_device("aaa", ["bbb", "ccc"]) == (
             b"aaa",
@@ -182,6 +178,7 @@ def test_core_reboot(envconfig_dummy):
     with patch("ntfc.device.common.DeviceCommon") as mockdevice:
         dev = mockdevice.return_value
         p = ProductCore(dev, envconfig_dummy.product[0].cfg_core(0))
+        metrics.reset()
 
         dev.reboot.return_value = False
         assert p.reboot() is False
@@ -189,6 +186,13 @@ def test_core_reboot(envconfig_dummy):
         dev.reboot.return_value = True
         assert p.reboot() is True
 
+        # reboot time is recorded in command metrics
+        stats = metrics.to_dict()["commands"]
+        assert len(stats) == 1
+        assert stats[0]["command"] == ProductCore.REBOOT_METRIC
+        assert stats[0]["status"] == {"FAILED": 1, "SUCCESS": 1}
+        assert stats[0]["match"]["count"] == 1
+
 
 def test_core_busyloop(envconfig_dummy):
     with patch("ntfc.device.common.DeviceCommon") as mockdevice:
@@ -223,6 +227,24 @@ def test_core_notalive(envconfig_dummy):
         assert p.notalive is True
 
 
+def test_core_health(envconfig_dummy):
+    with patch("ntfc.device.common.DeviceCommon") as mockdevice:
+        dev = mockdevice.return_value
+        p = ProductCore(dev, envconfig_dummy.product[0].cfg_core(0))
+
+        dev.console_offset = 100
+        dev.faults.return_value = {}
+        health = p.health()
+        assert health.ok is True
+        assert health.console_offset == 100
+
+        dev.faults.return_value = {"flood": Fault(1.0, 50)}
+        health = p.health()
+        assert health.ok is False
+        assert health.flood == Fault(1.0, 50)
+        assert health.reason == "flood"
+
+
 def test_core_status_checker(envconfig_dummy):
     with patch("ntfc.device.common.DeviceCommon") as mockdevice:
         dev = mockdevice.return_value
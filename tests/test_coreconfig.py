@@ -36,9 +36,18 @@ def test_product_core_config():
 
     assert p.kv_check("aaa") is False
     assert p.kv_check("CONFIG_SYSTEM_NSH") is True
+    assert p.kv_check("CONFIG_SIM_LOOPTASK_PRIORITY") == 224
+    assert p.kv_check("CONFIG_FORTIFY_SOURCE") == 0
+    assert p.kv_check("CONFIG_APPS_DIR") == "../apps"
+    assert p.kconfig["CONFIG_ARCH_SIM"] is True
+
+    # the same build shares parsed configuration
+    assert CoreConfig(conf).kconfig is p.kconfig
 
     assert p.cmd_check("aaa") is False
     assert p.cmd_check("hello_main") is True
+    assert p.uptime == 1
+    assert p.boot_banner is None
 
     conf = {
         "name": "product",
@@ -50,3 +59,29 @@ def test_product_core_config():
         p.cmd_check("aaa")
     with pytest.raises(AttributeError):
         p.kv_check("aaa")
+
+
+def test_product_core_config_write():
+    p = CoreConfig({"name": "product"})
+
+    assert p.write_mode == "char"
+    assert p.write_chunk == 64
+    assert p.write_delay == 0.01
+
+    p = CoreConfig(
+        {
+            "name": "product",
+            "write_mode": "chunk",
+            "write_chunk": 32,
+            "write_delay": 0,
+        }
+    )
+
+    assert p.write_mode == "chunk"
+    assert p.write_chunk == 32
+    assert p.write_delay == 0
+
+    p = CoreConfig({"name": "product", "write_mode": "aaa"})
+
+    with pytest.raises(ValueError):
+        _ = p.write_mode
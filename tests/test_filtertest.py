@@ -43,6 +43,7 @@ def test_filterest_filter():
         assert skip is False
         assert reason is None
 
+        f.clear_cache()
         config.kv_check.return_value = False
         config.cmd_check.return_value = False
         config.extra_check.return_value = False
@@ -51,6 +52,7 @@ def test_filterest_filter():
         assert skip is True
         assert reason == "Required config 'CONFIG1' not enabled"
 
+        f.clear_cache()
         config.kv_check.return_value = True
         config.cmd_check.return_value = False
         config.extra_check.return_value = False
@@ -59,6 +61,7 @@ def test_filterest_filter():
         assert skip is True
         assert reason == "Required symbol 'CMD1' not found in ELF"
 
+        f.clear_cache()
         config.kv_check.return_value = True
         config.cmd_check.return_value = True
         config.extra_check.return_value = False
@@ -66,3 +69,42 @@ def test_filterest_filter():
         skip, reason = f.check_test_support(None)
         assert skip is True
         assert reason == "Extra parameter 'EXTRA1' not found"
+
+
+def test_filterest_cache():
+
+    with patch("ntfc.envconfig.EnvConfig") as mockdevice:
+        config = mockdevice.return_value
+        config.kv_check.return_value = "y"
+        config.cmd_check.side_effect = lambda c: c != "CMD3"
+
+        f = FilterTest(config)
+        f.extract_test_requirements = mock_extract_test_requirements2
+        config.extra_check.return_value = True
+
+        for _ in range(10):
+            assert f.check_test_support(None) == (False, None)
+
+        # requirements checked only once for the same requirements
+        assert config.kv_check.call_count == 2
+        assert config.cmd_check.call_count == 2
+        assert f.stats["groups"] == (9, 10)
+        assert f.stats["requirements"] == (0, 6)
+
+        # different requirements set reuses cached requirements
+        f.extract_test_requirements = lambda _: (
+            ["CMD1", "CMD3"],
+            ["CONFIG2"],
+            [],
+        )
+        skip, reason = f.check_test_support(None)
+        assert skip is True
+        assert reason == "Required symbol 'CMD3' not found in ELF"
+        assert config.kv_check.call_count == 2
+        assert config.cmd_check.call_count == 3
+        assert f.stats["groups"] == (9, 11)
+        assert f.stats["requirements"] == (2, 9)
+
+        f.clear_cache()
+        assert f.check_test_support(None) == (True, reason)
+        assert config.cmd_check.call_count == 5
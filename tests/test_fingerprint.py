@@ -0,0 +1,173 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from ntfc.builder import NuttXBuilder
+from ntfc.fingerprint import (
+    build_fingerprint,
+    defconfig_content,
+    git_state,
+    load_fingerprint,
+    store_fingerprint,
+    toolchain_version,
+)
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("git") is None, reason="git not available"
+)
+
+
+def git(path, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=ntfc", "-c", "user.email=ntfc@ntfc", *args],
+        cwd=path,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+@pytest.fixture
+def cwd(tmp_path):
+    for repo in ("nuttx", "apps"):
+        path = tmp_path / repo
+        os.makedirs(path / "boards/sim/configs/nsh")
+        (path / "boards/sim/configs/nsh/defconfig").write_text("CONFIG_A=y\n")
+        git(path, "init", "-q")
+        git(path, "add", ".")
+        git(path, "commit", "-q", "-m", "init")
+    return tmp_path
+
+
+def configure(build_path):
+    os.makedirs(build_path, exist_ok=True)
+    with open(os.path.join(build_path, "CMakeCache.txt"), "w") as f:
+        f.write(f"CMAKE_C_COMPILER:FILEPATH={sys.executable}\n")
+
+
+def test_fingerprint_parts(cwd, tmp_path):
+    nuttx = str(cwd / "nuttx")
+
+    state = git_state(nuttx)
+    assert state is not None
+    assert git_state(nuttx) == state
+    assert git_state(str(tmp_path / "none")) is None
+
+    # modified and untracked files change state
+    (cwd / "nuttx/new.c").write_text("new")
+    untracked = git_state(nuttx)
+    assert untracked != state
+    (cwd / "nuttx/new.c").write_text("new file")
+    assert git_state(nuttx) != untracked
+
+    # edits of files in untracked directory change state
+    os.makedirs(cwd / "nuttx/newdir")
+    (cwd / "nuttx/newdir/a.c").write_text("a")
+    newdir = git_state(nuttx)
+    (cwd / "nuttx/newdir/a.c").write_text("a changed")
+    assert git_state(nuttx) != newdir
+
+    assert defconfig_content(nuttx, "boards/sim/configs/nsh") == "CONFIG_A=y\n"
+    assert defconfig_content(nuttx, "boards/xxx") is None
+
+    build = str(tmp_path / "build")
+    assert toolchain_version(build) is None
+    configure(build)
+    assert toolchain_version(build).startswith("Python")
+
+    assert load_fingerprint(build) == {}
+    store_fingerprint(build, {"build": "1"})
+    assert load_fingerprint(build) == {"build": "1"}
+    store_fingerprint(str(tmp_path / "none"), {"build": "1"})
+
+
+def test_fingerprint_build(cwd, tmp_path):
+    build = str(tmp_path / "build")
+    defconfig = "boards/sim/configs/nsh"
+
+    # build not configured yet
+    fp = build_fingerprint(str(cwd), build, defconfig, {})
+    assert fp == {"configure": None, "build": None}
+
+    configure(build)
+    fp = build_fingerprint(str(cwd), build, defconfig, {})
+    assert fp["configure"] and fp["build"]
+    assert build_fingerprint(str(cwd), build, defconfig, {}) == fp
+
+    # defines change configuration
+    fp2 = build_fingerprint(str(cwd), build, defconfig, {"A": "1"})
+    assert fp2["configure"] != fp["configure"]
+
+    # sources change only build
+    (cwd / "apps/app.c").write_text("app")
+    fp2 = build_fingerprint(str(cwd), build, defconfig, {})
+    assert fp2["configure"] == fp["configure"]
+    assert fp2["build"] != fp["build"]
+
+    # defconfig change configuration
+    (cwd / "nuttx" / defconfig / "defconfig").write_text("CONFIG_B=y\n")
+    fp2 = build_fingerprint(str(cwd), build, defconfig, {})
+    assert fp2["configure"] != fp["configure"]
+
+
+def test_fingerprint_builder(cwd, tmp_path):
+    build = str(tmp_path / "build")
+    defconfig = "boards/sim/configs/nsh"
+    b = NuttXBuilder({"config": {}})
+
+    cmds = []
+
+    def run_command(cmd, env, log=None, cancel=None):
+        if "--build" in cmd:
+            cmds.append("build")
+            (tmp_path / "build/nuttx").write_text("elf")
+        else:
+            cmds.append("configure")
+            configure(build)
+
+    b._run_command = run_command
+
+    b._build_image(str(cwd), build, defconfig, {}, False)
+    assert cmds == ["configure", "build"]
+
+    # nothing changed
+    cmds.clear()
+    b._build_image(str(cwd), build, defconfig, {}, True)
+    assert cmds == []
+
+    # sources changed
+    (cwd / "nuttx/file.c").write_text("x")
+    b._build_image(str(cwd), build, defconfig, {}, True)
+    assert cmds == ["build"]
+
+    # configuration changed
+    cmds.clear()
+    b._build_image(str(cwd), build, defconfig, {"A": "1"}, True)
+    assert cmds == ["configure", "build"]
+
+    # image not available
+    cmds.clear()
+    b._build_image(str(cwd), build, defconfig, {"A": "1"}, False)
+    assert cmds == ["build"]
@@ -0,0 +1,67 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from ntfc.health import CoreHealth, Fault, HealthSnapshot
+
+
+def test_health_core():
+    core = CoreHealth("core0")
+    assert core.ok is True
+    assert core.reason is None
+
+    with pytest.raises(FrozenInstanceError):
+        core.crash = Fault(0, 0)
+
+    assert CoreHealth("c", notalive=Fault(0, 0)).reason == "not_alive"
+    assert CoreHealth("c", flood=Fault(0, 0)).reason == "flood"
+    assert CoreHealth("c", busyloop=Fault(0, 0)).reason == "busy_loop"
+    core = CoreHealth("c", busyloop=Fault(0, 0), crash=Fault(1.0, 20))
+    assert core.reason == "crash"
+    assert core.crash.offset == 20
+
+
+def test_health_snapshot():
+    empty = HealthSnapshot()
+    assert empty.ok is True
+    assert empty.reason is None
+    assert empty.faulty == ()
+
+    a = HealthSnapshot((CoreHealth("core0"), CoreHealth("core1")))
+    b = HealthSnapshot((CoreHealth("core0", flood=Fault(0, 0)),))
+    c = HealthSnapshot((CoreHealth("core0", notalive=Fault(0, 0)),))
+
+    s = HealthSnapshot.merge(a.for_product("p0"), b.for_product("p1"))
+    assert len(s.cores) == 3
+    assert [core.product for core in s.cores] == ["p0", "p0", "p1"]
+    assert s.ok is False
+    assert s.flood is True
+    assert s.crash is False
+    assert s.busyloop is False
+    assert s.notalive is False
+    assert s.reason == "flood"
+    assert s.faulty == (s.cores[2],)
+
+    s = HealthSnapshot.merge(c, b)
+    assert s.reason == "flood"
+    assert s.notalive is True
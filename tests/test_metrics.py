@@ -0,0 +1,153 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import json
+import threading
+
+from ntfc.metrics import CommandMetrics, CommandTrace, Histogram
+
+
+def test_metrics_histogram():
+
+    h = Histogram()
+    assert h.percentile(95) == 0.0
+    assert h.to_dict() == {"count": 0}
+
+    for value in (0, 0.5, 1, 3, 3, 100):
+        h.add(value)
+
+    d = h.to_dict()
+    assert d["count"] == 6
+    assert d["min"] == 0
+    assert d["max"] == 100
+    assert d["sum"] == 107.5
+    assert d["buckets"] == {
+        f"<={2.0**-64:g}": 1,
+        "<=0.5": 1,
+        "<=1": 1,
+        "<=4": 2,
+        "<=128": 1,
+    }
+
+    # percentile is the upper bound of bucket, limited to max value
+    assert h.percentile(50) == 1
+    assert h.percentile(60) == 4
+    assert h.percentile(95) == 100
+
+
+def test_metrics_trace():
+
+    trace = CommandTrace("cmd", "main")
+    trace.written()
+    trace.data(0)
+    assert trace.first_byte is None
+    trace.data(5)
+    trace.data(3)
+    trace.scanned(0.5)
+    trace.scanned(0.25)
+    trace.matched()
+    trace.finish()
+
+    assert trace.nbytes == 8
+    assert trace.scan == 0.75
+    assert trace.write <= trace.first_byte <= trace.match <= trace.total
+
+
+def test_metrics_command_name():
+
+    assert CommandMetrics.command_name(b"ls -l /dev") == "ls"
+    assert CommandMetrics.command_name("  hello ") == "hello"
+    assert CommandMetrics.command_name(b"") == ""
+
+
+def test_metrics_record(tmp_path):
+
+    m = CommandMetrics(slowest=2)
+    assert m.summary() == []
+
+    for i, cmd in enumerate((b"ls /", b"ls /dev", b"ps")):
+        trace = m.trace(cmd, "main")
+        trace.written()
+        trace.data(10 * (i + 1))
+        trace.finish()
+        trace.total = float(i + 1)
+        m.record(trace, "SUCCESS")
+
+    # command without finish is finished on record
+    m.test = "test_x.py::test_x"
+    trace = m.trace(b"ls", "cpu1")
+    m.record(trace, "TIMEOUT")
+    assert trace.total is not None
+
+    d = m.to_dict()
+    assert d["units"] == {"time": "ms", "bytes": "bytes"}
+    keys = [(c["command"], c["core"], c["test"]) for c in d["commands"]]
+    assert keys == [
+        ("ls", "cpu1", "test_x.py::test_x"),
+        ("ls", "main", ""),
+        ("ps", "main", ""),
+    ]
+
+    ls = d["commands"][1]
+    assert ls["status"] == {"SUCCESS": 2}
+    assert ls["total"]["count"] == 2
+    assert ls["total"]["max"] == 2000
+    assert ls["bytes"]["sum"] == 30
+    assert ls["match"] == {"count": 0}
+
+    # only the slowest commands are kept, the slowest first
+    slowest = m.slowest()
+    assert [s["command"] for s in slowest] == ["ps", "ls"]
+    assert [s["total"] for s in slowest] == [3000, 2000]
+    assert "match" not in slowest[0]
+
+    lines = m.summary(1)
+    assert len(lines) == 2
+    assert "ps" in lines[1]
+    assert "3000.0" in lines[1]
+
+    path = tmp_path / CommandMetrics.FILE_NAME
+    m.save(str(path))
+    assert json.loads(path.read_text()) == d
+
+    m.reset()
+    assert m.to_dict()["commands"] == []
+    assert m.slowest() == []
+
+
+def test_metrics_threads():
+
+    m = CommandMetrics()
+
+    def worker(core):
+        for _ in range(100):
+            m.record(m.trace(b"cmd", core), "SUCCESS")
+
+    threads = [
+        threading.Thread(target=worker, args=(f"core{i}",)) for i in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = m.to_dict()["commands"]
+    assert [s["total"]["count"] for s in stats] == [100] * 4
+    assert len(m.slowest()) == 20
@@ -0,0 +1,126 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import threading
+import time
+
+from ntfc.parallel import (
+    init_executor,
+    run_calls,
+    run_parallel,
+    shutdown_executor,
+)
+
+
+class Item:
+
+    def __init__(self, value, children=None):
+        self.value = value
+        self.children = children or []
+
+    @property
+    def thread(self):
+        return threading.current_thread()
+
+    def add(self, x):
+        time.sleep(0.01)
+        return self.value + x
+
+    def nested(self):
+        return sum(run_parallel(self.children, "add", 1))
+
+
+def test_parallel_run_calls():
+    assert run_calls([]) == []
+    assert run_calls([lambda: 1]) == [1]
+    assert run_calls([lambda: 1, lambda: 2, lambda: 3]) == [1, 2, 3]
+
+
+def test_parallel_run_parallel():
+    init_executor(4)
+
+    items = [Item(i) for i in range(4)]
+    assert run_parallel([], "add", 1) == []
+    assert run_parallel(items, "value") == [0, 1, 2, 3]
+    assert run_parallel(items, "add", 1) == [1, 2, 3, 4]
+    assert run_parallel(items, "add", x=2) == [2, 3, 4, 5]
+
+    # properties are read in the calling thread
+    current = threading.current_thread()
+    assert run_parallel(items, "thread") == [current] * 4
+
+    shutdown_executor()
+    shutdown_executor()
+
+
+def test_parallel_nested():
+    # nested calls don't deadlock even if pool is too small
+    init_executor(1)
+
+    items = [Item(0, [Item(i) for i in range(3)]) for _ in range(3)]
+    assert run_parallel(items, "nested") == [6, 6, 6]
+
+    shutdown_executor()
+
+    # default pool created on demand
+    assert run_parallel(items, "nested") == [6, 6, 6]
+    shutdown_executor()
+
+
+class FlagCore:
+
+    def __init__(self, crash=False):
+        self._crash = crash
+        self.threads = []
+
+    @property
+    def crash(self):
+        self.threads.append(threading.current_thread())
+        return self._crash
+
+
+class FlagProduct:
+
+    def __init__(self, cores):
+        self.cores = cores
+
+    def __getattr__(self, name):
+        if name != "crash":
+            raise AttributeError(name)
+        return any(run_parallel(self.cores, name))
+
+
+def test_parallel_flag_reads():
+    # flag reads done by makereport hook don't go through the pool
+    init_executor(4)
+
+    cores = [FlagCore(crash=(i == 3)) for i in range(4)]
+    products = [FlagProduct(cores[:2]), FlagProduct(cores[2:])]
+    assert run_parallel(cores, "crash") == [False, False, False, True]
+    assert run_parallel(products, "crash") == [False, True]
+
+    current = threading.current_thread()
+    assert all(core.threads == [current] * 2 for core in cores)
+
+    # first call runs in the calling thread
+    calls = [threading.current_thread for _ in range(3)]
+    assert run_calls(calls)[0] is current
+
+    shutdown_executor()
@@ -0,0 +1,291 @@
+############################################################################
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.  The
+# ASF licenses this file to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance with the
+# License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.  See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+############################################################################
+
+import json
+import os
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+import pytest
+import yaml
+
+from ntfc.pipeline import ProductPipeline, merge_junit
+
+JUNIT = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<testsuites><testsuite name="pytest" errors="0" failures="{f}" '
+    'skipped="0" tests="{t}" time="1.5">'
+    '<testcase classname="a" name="test_a" time="1.5"/>'
+    "</testsuite></testsuites>"
+)
+SLEEP = "import time; time.sleep(60)"
+
+
+def pipeline_config(defconfig=False):
+    conf = {"config": {"cwd": "aaa", "build_dir": "bbb", "build_jobs": 4}}
+    for name in ("product", "product1"):
+        core = {"name": "main", "device": "sim", "flash": "cmd"}
+        if defconfig:
+            core["defconfig"] = "dummy/path"
+        conf[name] = {"name": name, "cores": {"core0": core}}
+    return conf
+
+
+class FakeBuilder:
+    built = []
+    fail = None
+
+    def __init__(self, conf, rebuild):
+        self._conf = conf
+        self.product = [key for key in conf if "product" in key][0]
+
+    def need_build(self):
+        return True
+
+    def build_all(self):
+        if self.product == FakeBuilder.fail:
+            raise RuntimeError("build failed")
+        FakeBuilder.built.append(
+            (self.product, self._conf["config"]["build_jobs"])
+        )
+
+    def flash_all(self):
+        pass
+
+    def new_conf(self):
+        for core in self._conf[self.product]["cores"].values():
+            core["elf_path"] = "nuttx"
+        return self._conf
+
+
+def fake_tests(ret):
+    calls = []
+
+    def run_tests(cmd, log):
+        calls.append(cmd)
+        path = [a for a in cmd if a.startswith("--xmlpath=")][0][10:]
+        with open(path, "w") as f:
+            f.write(JUNIT.format(f=ret, t=2))
+        return ret
+
+    return run_tests, calls
+
+
+def test_merge_junit(tmp_path):
+    a = tmp_path / "a.xml"
+    a.write_text(JUNIT.format(f=1, t=2))
+    b = tmp_path / "b.xml"
+    b.write_text(
+        '<testsuite name="pytest" tests="3" failures="0" errors="1" '
+        'skipped="1" time="0.5"/>'
+    )
+    path = str(tmp_path / "report.xml")
+
+    merge_junit(
+        {"p1": str(a), "p2": str(b), "p3": str(tmp_path / "missing")}, path
+    )
+
+    root = ET.parse(path).getroot()
+    assert root.tag == "testsuites"
+    assert [s.get("name") for s in root] == ["p1", "p2"]
+    assert root.get("tests") == "5"
+    assert root.get("failures") == "1"
+    assert root.get("errors") == "1"
+    assert root.get("skipped") == "1"
+    assert root.get("time") == "2.000"
+    assert len(root.findall("testsuite/testcase")) == 1
+
+
+def test_pipeline_init():
+    with pytest.raises(TypeError):
+        ProductPipeline(None, "res")
+
+    p = ProductPipeline({"config": {}}, "res")
+    assert p.products == []
+    with pytest.raises(ValueError):
+        p.run([])
+
+
+def test_pipeline_run(tmp_path):
+    resdir = str(tmp_path / "res")
+    p = ProductPipeline(pipeline_config(), resdir)
+    p._run_tests, calls = fake_tests(0)
+
+    assert p.run(["--testpath=tests"], ["--verbose"]) == 0
+
+    assert len(calls) == 2
+    for cmd in calls:
+        assert cmd[3:5] == ["--verbose", "test"]
+        assert cmd[-1] == "--testpath=tests"
+
+    # every session writes its report to known path
+    assert sorted(cmd[-2] for cmd in calls) == [
+        f"--xmlpath={os.path.join(resdir, product, 'report.xml')}"
+        for product in ("product", "product1")
+    ]
+
+    # tests run with a single product and without build options
+    with open(os.path.join(resdir, "product1", "config.yaml")) as f:
+        conf = yaml.safe_load(f)
+    assert list(conf) == ["config", "product1"]
+    assert "flash" not in conf["product1"]["cores"]["core0"]
+
+    root = ET.parse(os.path.join(resdir, "report.xml")).getroot()
+    assert [s.get("name") for s in root] == ["product", "product1"]
+    assert root.get("tests") == "4"
+
+    with open(os.path.join(resdir, "pipeline.json")) as f:
+        stats = json.load(f)
+    assert stats == p.stats
+    assert stats["product"]["result"] == 0
+    assert "test" in stats["product"]
+    assert "build" not in stats["product"]
+
+
+def test_pipeline_failed(tmp_path):
+    resdir = str(tmp_path / "res")
+    p = ProductPipeline(pipeline_config(), resdir)
+    p._run_tests, _ = fake_tests(1)
+
+    assert p.run([]) == 1
+    assert p.stats["product"]["result"] == 1
+    assert p.stats["product1"]["result"] == 1
+
+
+def test_pipeline_stale_report(tmp_path):
+    resdir = str(tmp_path / "res")
+    p = ProductPipeline(pipeline_config(), resdir)
+    p._run_tests, _ = fake_tests(0)
+    assert p.run([]) == 0
+
+    # report of the previous run is not merged if session didn't write one
+    p = ProductPipeline(pipeline_config(), resdir)
+    p._run_tests = lambda cmd, log: 1
+    assert p.run([]) == 1
+    assert not p._reports
+    assert not os.path.exists(os.path.join(resdir, "product", "report.xml"))
+
+
+def test_pipeline_interrupt(tmp_path):
+    p = ProductPipeline(pipeline_config(), str(tmp_path / "res"))
+
+    def run_tests(cmd, log):
+        raise KeyboardInterrupt
+
+    # interrupt is not turned into product failure
+    p._run_tests = run_tests
+    with pytest.raises(KeyboardInterrupt):
+        p.run([])
+
+
+def test_pipeline_interrupt_main(tmp_path, monkeypatch):
+    p = ProductPipeline(pipeline_config(), str(tmp_path / "res"))
+    run_tests = p._run_tests
+    procs = []
+
+    def sleep_tests(cmd, log):
+        return run_tests([sys.executable, "-c", SLEEP], log)
+
+    def interrupted_wait(futures):
+        # interrupt arrives when both test sessions are running
+        end = time.monotonic() + 10
+        while len(p._procs) < 2 and time.monotonic() < end:
+            time.sleep(0.01)
+        procs.extend(p._procs)
+        raise KeyboardInterrupt
+
+    p._run_tests = sleep_tests
+    monkeypatch.setattr("ntfc.pipeline.wait", interrupted_wait)
+
+    start = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        p.run([])
+    assert time.monotonic() - start < 10
+
+    # running sessions are stopped, new sessions are not started
+    assert len(procs) == 2
+    assert all(proc.poll() is not None for proc in procs)
+    assert run_tests([sys.executable, "-c", ""], str(tmp_path / "log")) == 1
+
+
+def test_pipeline_build(tmp_path, monkeypatch):
+    monkeypatch.setattr("ntfc.pipeline.NuttXBuilder", FakeBuilder)
+    FakeBuilder.built = []
+    FakeBuilder.fail = "product1"
+
+    resdir = str(tmp_path / "res")
+    p = ProductPipeline(pipeline_config(True), resdir, flash=True)
+    p._run_tests, calls = fake_tests(0)
+
+    assert p.run([]) == 1
+
+    # job budget split between products
+    assert FakeBuilder.built == [("product", 2)]
+    assert set(p.stats["product"]) == {"build", "flash", "test", "result"}
+    assert p.stats["product1"] == {"result": 1}
+
+    # failed product is not tested
+    assert len(calls) == 1
+    with open(os.path.join(resdir, "product", "config.yaml")) as f:
+        conf = yaml.safe_load(f)
+    core = conf["product"]["cores"]["core0"]
+    assert core["elf_path"] == "nuttx"
+    assert "defconfig" not in core
+
+    root = ET.parse(os.path.join(resdir, "report.xml")).getroot()
+    assert [s.get("name") for s in root] == ["product"]
+
+
+def test_pipeline_overlap(tmp_path, monkeypatch):
+    tested = threading.Event()
+
+    class SlowBuilder(FakeBuilder):
+        def build_all(self):
+            # the second product is built while the first one is tested
+            if self.product == "product1":
+                assert tested.wait(10)
+
+    monkeypatch.setattr("ntfc.pipeline.NuttXBuilder", SlowBuilder)
+
+    resdir = str(tmp_path / "res")
+    p = ProductPipeline(pipeline_config(True), resdir)
+    run_tests, calls = fake_tests(0)
+
+    def signal_tests(cmd, log):
+        ret = run_tests(cmd, log)
+        tested.set()
+        return ret
+
+    p._run_tests = signal_tests
+
+    assert p.run([]) == 0
+    assert len(calls) == 2
+
+
+def test_pipeline_run_tests(tmp_path):
+    p = ProductPipeline(pipeline_config(), str(tmp_path))
+    log = str(tmp_path / "pipeline.log")
+
+    cmd = [sys.executable, "-c", "print('hello'); exit(3)"]
+    assert p._run_tests(cmd, log) == 3
+    with open(log) as f:
+        assert "hello" in f.read()
@@ -21,6 +21,7 @@
 from unittest.mock import patch
 
 from ntfc.device.common import CmdReturn, CmdStatus
+from ntfc.health import CoreHealth, Fault, HealthSnapshot
 from ntfc.products import ProductsHandler
 
 
@@ -79,6 +80,26 @@ def test_products_init_inval():
         dev.notalive = True
         assert h.notalive is True
 
+        dev.health.return_value = HealthSnapshot(
+            (CoreHealth("core0", crash=Fault(1.0, 10), product="p"),)
+        )
+        with patch("ntfc.products.logger") as logger:
+            health = h.health()
+            assert len(health.cores) == 2
+            assert health.crash is True
+            assert health.reason == "crash"
+
+            # fault logged only when it appears
+            h.health()
+            assert logger.info.call_count == 1
+            dev.health.return_value = HealthSnapshot((CoreHealth("core0"),))
+            assert h.health().ok is True
+            dev.health.return_value = HealthSnapshot(
+                (CoreHealth("core0", flood=Fault(1.0, 10), product="p"),)
+            )
+            h.health()
+            assert logger.info.call_count == 2
+
         dev.reboot.return_value = True
         assert h.reboot() is True
         dev.reboot.return_value = False